@@ -1,22 +1,59 @@
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+from contextlib import asynccontextmanager
+from time import perf_counter
 
 from os import environ
 from dotenv import load_dotenv; load_dotenv()
 
 
 # Routes
-from routes.UserRoutes import user_router
-from routes.CommunityRoutes import community_router
+from routes.UserRoutes import user_router, user_util
+from routes.CommunityRoutes import community_router, community_util
+from routes.SearchRoutes import search_router, search_util
+from utils.utility import asyncMongoDBHandler, passwordHasher, writePipeline, skillCatalog
+from utils.dbHandler import poolStats, pool_options
+from utils.responses import FastJSONResponse
+from utils.metrics import Gauges, requestDuration, utilityDuration, commandMetrics, shedRequests, render_metrics
+from utils.rateLimit import RateLimitMiddleware, loadShedder
+
+
+# Lifespan: nothing is dialled at startup so cold starts serve straight away.
+# The MongoDB client opens on the first query and the skill index builds on the first search
+# (SKILL_INDEX_PRELOAD=1 builds it at startup instead, for long-running servers; likewise
+# the autocomplete index builds on the first autocomplete request unless AUTOCOMPLETE_PRELOAD=1)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    try:
+        asyncMongoDBHandler.open()
+    except Exception as e:
+        print(e)
+    if environ.get("SKILL_INDEX_PRELOAD") == "1":
+        community_util.start_skill_index_build()
+    if environ.get("AUTOCOMPLETE_PRELOAD") == "1":
+        search_util.start_autocomplete_build()
+    yield
+    community_util.stop_skill_index_build()
+    search_util.stop_autocomplete_build()
+    # Queued writes go out before the client closes
+    await writePipeline.close()
+    passwordHasher.shutdown()
+    await asyncMongoDBHandler.close()
 
 
 # FastAPI Setup
 app = FastAPI(
     title="ConnectSaathi",
     description="FastAPI is a modern, fast (high performance), web framework for building APIs with Python 3.6+.",
-    version="0.1.1"
+    version="0.1.1",
+    lifespan=lifespan
 )
 
+# Rate limiting and load shedding, added before CORS so it runs inside it
+# and 429/503 responses still carry the CORS headers browsers need to read them
+app.add_middleware(RateLimitMiddleware)
+
 # CORS
 # origins = environ.get("ALLOWED_ORIGINS", "").split(",")
 origins = ["*"]
@@ -34,14 +71,85 @@ app.add_middleware(
 )
 
 
+# Request latency per route template (not raw path, to keep label cardinality bounded)
+@app.middleware("http")
+async def record_latency(request: Request, call_next):
+    start = perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        requestDuration.observe(perf_counter() - start, route_path, request.method, str(status))
+
+
+pool_gauges = Gauges(
+    "mongodb_pool", "MongoDB connection pool", (),
+    lambda: {(): poolStats.snapshot()}
+)
+cache_gauges = Gauges(
+    "cache", "In-process cache", ("cache",),
+    lambda: {
+        **{(name,): stats for name, stats in user_util.cache_stats().items()},
+        ("skill_miss",): skillCatalog.missing.stats()
+    }
+)
+write_gauges = Gauges(
+    "write_pipeline", "Queued background writes", (),
+    lambda: {(): writePipeline.stats()}
+)
+
+load_gauges = Gauges(
+    "load_shedder", "Requests admitted by the load shedder", (),
+    lambda: {(): loadShedder.stats()}
+)
+
+
 # FastAPI Routes
 @app.get("/")
 async def health_check():
     return {"message": "Server is live!"}
 
 
+# Readiness: can this instance reach MongoDB, and how busy is its connection pool
+@app.get("/ready", response_class=FastJSONResponse)
+async def readiness_check():
+    ready = await asyncMongoDBHandler.ping()
+    return FastJSONResponse(
+        status_code=200 if ready else 503,
+        content={
+            "ready": ready,
+            "pool": poolStats.snapshot(),
+            "pool_options": pool_options(asyncMongoDBHandler.uri)
+        }
+    )
+
+
+# Prometheus scrape endpoint
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    content = render_metrics(
+        requestDuration,
+        utilityDuration,
+        commandMetrics.duration,
+        commandMetrics.documents,
+        pool_gauges,
+        cache_gauges,
+        write_gauges,
+        shedRequests,
+        load_gauges
+    )
+    return PlainTextResponse(content, media_type="text/plain; version=0.0.4")
+
+
 # User Routes
 app.include_router(user_router)
 
 # Community Routes
-app.include_router(community_router)
\ No newline at end of file
+app.include_router(community_router)
+
+# Search Routes
+app.include_router(search_router)
@@ -0,0 +1,89 @@
+"""
+Cold-start cost of the app: import time and time to first response.
+
+Usage:
+    python -m benchmarks.coldStart [--runs 5] [--port 8765] [--uri mongodb://localhost:27017]
+
+Each run starts from a fresh interpreter, the way a serverless instance does.
+Import time is measured inside a child process around "import app". Time to
+first response spawns uvicorn and records, from the moment the process is
+started, when GET / first answers (no database involved) and when the first
+GET /community/latest/ answers (pays for connecting to MongoDB), then times a
+second /community/latest/ on the now warm instance. MONGODB_URI is pointed at
+a local mongod unless --uri says otherwise.
+"""
+from argparse import ArgumentParser
+from os import environ
+from statistics import median
+from subprocess import Popen, run, DEVNULL
+from time import perf_counter, sleep
+from urllib.error import URLError
+from urllib.request import urlopen
+import sys
+
+IMPORT_SNIPPET = "from time import perf_counter; start = perf_counter(); import app; print(perf_counter() - start)"
+
+
+def child_env(uri: str) -> dict:
+    env = dict(environ)
+    env["MONGODB_URI"] = uri
+    return env
+
+
+def import_time(uri: str) -> float:
+    result = run([sys.executable, "-c", IMPORT_SNIPPET], env=child_env(uri), capture_output=True, text=True, check=True)
+    return float(result.stdout.strip().splitlines()[-1])
+
+
+def get(url: str, timeout: float = 30) -> bool:
+    try:
+        with urlopen(url, timeout=timeout) as response:
+            response.read()
+            return response.status == 200
+    except (URLError, ConnectionError):
+        return False
+
+
+def first_response(uri: str, port: int, timeout: float = 30) -> dict:
+    base = f"http://127.0.0.1:{port}"
+    start = perf_counter()
+    server = Popen(
+        [sys.executable, "-m", "uvicorn", "app:app", "--port", str(port), "--log-level", "warning"],
+        env=child_env(uri), stdout=DEVNULL, stderr=DEVNULL
+    )
+    try:
+        while not get(f"{base}/", timeout=1):
+            if perf_counter() - start > timeout or server.poll() is not None:
+                raise RuntimeError("Server did not come up")
+            sleep(0.005)
+        health = perf_counter() - start
+
+        if not get(f"{base}/community/latest/?limit=10", timeout=timeout):
+            raise RuntimeError("First query failed, is mongod running?")
+        first_query = perf_counter() - start
+
+        warm_start = perf_counter()
+        get(f"{base}/community/latest/?limit=10", timeout=timeout)
+        warm_query = perf_counter() - warm_start
+
+        return {"health": health, "first_query": first_query, "warm_query": warm_query}
+    finally:
+        server.terminate()
+        server.wait()
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Measure cold-start import time and time to first response")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--uri", default=environ.get("MONGODB_URI", "mongodb://localhost:27017"))
+    args = parser.parse_args()
+
+    imports = [import_time(args.uri) for _ in range(args.runs)]
+    starts = [first_response(args.uri, args.port) for _ in range(args.runs)]
+
+    print(f"runs={args.runs} uri={args.uri}")
+    print(f"import app                        : {median(imports) * 1000:8.1f} ms (median)")
+    print(f"spawn -> first GET /              : {median(s['health'] for s in starts) * 1000:8.1f} ms (median)")
+    print(f"spawn -> first /community/latest/ : {median(s['first_query'] for s in starts) * 1000:8.1f} ms (median)")
+    print(f"warm /community/latest/           : {median(s['warm_query'] for s in starts) * 1000:8.1f} ms (median)")
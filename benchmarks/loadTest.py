@@ -0,0 +1,351 @@
+"""
+Mixed-traffic load test with seeded data, per-route percentiles and latency budgets.
+
+Usage:
+    python -m benchmarks.loadTest [--uri mongodb://localhost:27017 | --stand-in | --url http://host:port]
+                                  [--users 50] [--communities 200] [--concurrency 16] [--duration 30]
+                                  [--seed 1] [--mix latest=30,search=20,...] [--output results.json]
+                                  [--budgets budgets.json] [--baseline previous.json] [--tolerance 0.2]
+
+By default the app runs in-process (httpx over ASGI, lifespan included)
+against a fresh database on --uri; --stand-in swaps MongoDB for the mongomock
+stand-in in benchmarks/mongoStandIn.py, and --url drives an already running
+server over HTTP instead. The same --seed produces the same users, profiles,
+communities and request sequence per worker.
+
+Budgets are a JSON object mapping a route name (or "*" for every route) to
+limits, e.g. {"*": {"p99": 500}, "GET /user/profile/{username}": {"p95": 40},
+"error_rate": 0.01}; percentiles are in milliseconds. With --baseline, any
+route whose p99 grew by more than --tolerance over the saved run also fails.
+The exit status is 1 when anything is over budget.
+"""
+from argparse import ArgumentParser
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from json import dump, load
+from os import environ
+from time import perf_counter, time
+import asyncio
+import math
+import random
+
+try:
+    import httpx
+except ImportError:
+    raise SystemExit("The load test needs httpx: pip install httpx")
+
+SKILLS = [
+    "Python", "JavaScript", "React", "Node.js", "TypeScript", "FastAPI", "Django", "Go",
+    "Docker", "Kubernetes", "MongoDB", "PostgreSQL", "AWS", "Rust", "Java", "Flutter",
+    "Kotlin", "Swift", "C++", "GraphQL", "Redis", "TensorFlow", "PyTorch", "Next.js"
+]
+# Popular skills are much more common than the long tail
+SKILL_WEIGHTS = [1 / rank for rank in range(1, len(SKILLS) + 1)]
+LEVELS = ["beginner", "intermediate", "advanced"]
+PASSWORD = "load-test-password"
+
+DEFAULT_MIX = {
+    "signup": 2,
+    "login": 8,
+    "profile_read": 30,
+    "profile_write": 5,
+    "community_create": 5,
+    "latest": 30,
+    "search": 20
+}
+
+
+def pick_skills(rng: random.Random, low: int = 1, high: int = 5) -> list:
+    count = rng.randint(low, high)
+    skills = set()
+    while len(skills) < count:
+        skills.add(rng.choices(SKILLS, weights=SKILL_WEIGHTS)[0])
+    return sorted(skills)
+
+
+def profile_body(rng: random.Random, username: str) -> dict:
+    return {
+        "bio": f"Hi, I am {username}",
+        "github_url": f"https://github.com/{username}",
+        "years_exp": rng.randint(0, 15),
+        "skills": pick_skills(rng),
+        "projects": [
+            {"title": f"Project {i}", "link": f"https://example.com/{username}/{i}"}
+            for i in range(rng.randint(0, 3))
+        ]
+    }
+
+
+def community_body(rng: random.Random, username: str, number: int) -> dict:
+    return {
+        "creator_username": username,
+        "name": f"{username} community {number}",
+        "tech_stack": pick_skills(rng),
+        "experience": rng.choice(LEVELS)
+    }
+
+
+class Recorder:
+    def __init__(self):
+        self.samples = {}
+        self.errors = {}
+
+    async def call(self, client: httpx.AsyncClient, route: str, method: str, url: str, **kwargs):
+        start = perf_counter()
+        try:
+            response = await client.request(method, url, **kwargs)
+            failed = response.status_code >= 400
+        except httpx.HTTPError:
+            response, failed = None, True
+        self.samples.setdefault(route, []).append((perf_counter() - start) * 1000)
+        if failed:
+            self.errors[route] = self.errors.get(route, 0) + 1
+        return response
+
+
+class Traffic:
+    """
+    One request per call, chosen by weight; usernames come from the seeded set
+    plus whatever the run itself signs up.
+    """
+    def __init__(self, recorder: Recorder, usernames: list, prefix: str):
+        self.recorder = recorder
+        self.usernames = usernames
+        # seed_data gives the first half of the seeded users a profile
+        self.profiled = usernames[:len(usernames) // 2 or 1]
+        self.prefix = prefix
+        self.signups = 0
+        self.created = 0
+
+    async def signup(self, client, rng):
+        self.signups += 1
+        username = f"{self.prefix}new{self.signups}"
+        body = {"username": username, "name": username, "email": f"{username}@example.com", "password": PASSWORD}
+        response = await self.recorder.call(client, "POST /user/signup", "POST", "/user/signup", json=body)
+        if response is not None and response.status_code == 200:
+            self.usernames.append(username)
+
+    async def login(self, client, rng):
+        body = {"username": rng.choice(self.usernames), "password": PASSWORD}
+        await self.recorder.call(client, "POST /user/login", "POST", "/user/login", json=body)
+
+    async def profile_read(self, client, rng):
+        username = rng.choice(self.profiled)
+        await self.recorder.call(client, "GET /user/profile/{username}", "GET", f"/user/profile/{username}")
+
+    async def profile_write(self, client, rng):
+        username = rng.choice(self.profiled)
+        await self.recorder.call(client, "POST /user/update/profile/{username}", "POST", f"/user/update/profile/{username}", json=profile_body(rng, username))
+
+    async def community_create(self, client, rng):
+        self.created += 1
+        body = community_body(rng, rng.choice(self.usernames), self.created)
+        await self.recorder.call(client, "POST /community/create", "POST", "/community/create", json=body)
+
+    async def latest(self, client, rng):
+        # Most readers stay on the first page
+        params = {"limit": 10, "page": 1 if rng.random() < 0.8 else rng.randint(2, 5)}
+        await self.recorder.call(client, "GET /community/latest/", "GET", "/community/latest/", params=params)
+
+    async def search(self, client, rng):
+        body = {"limit": 10, "skills": pick_skills(rng, 1, 3), "match_all": rng.random() < 0.2}
+        await self.recorder.call(client, "POST /community/search/skills", "POST", "/community/search/skills", json=body)
+
+
+async def seed_data(client: httpx.AsyncClient, rng: random.Random, prefix: str, users: int, communities: int) -> list:
+    usernames = [f"{prefix}{i}" for i in range(users)]
+    seeding = Recorder()
+    for username in usernames:
+        body = {"username": username, "name": username, "email": f"{username}@example.com", "password": PASSWORD}
+        await seeding.call(client, "seed signup", "POST", "/user/signup", json=body)
+    # Half the users have a profile; reads and writes target those
+    for username in usernames[:len(usernames) // 2 or 1]:
+        await seeding.call(client, "seed profile", "POST", f"/user/save/profile/{username}", json=profile_body(rng, username))
+    for number in range(communities):
+        await seeding.call(client, "seed community", "POST", "/community/create", json=community_body(rng, rng.choice(usernames), number))
+
+    if seeding.errors:
+        print(f"Seeding errors: {seeding.errors}")
+    return usernames
+
+
+async def worker(client: httpx.AsyncClient, traffic: Traffic, mix: dict, rng: random.Random, deadline: float):
+    actions = list(mix)
+    weights = [mix[action] for action in actions]
+    while perf_counter() < deadline:
+        action = rng.choices(actions, weights=weights)[0]
+        await getattr(traffic, action)(client, rng)
+
+
+def percentile(sorted_samples: list, fraction: float) -> float:
+    # Nearest rank
+    if not sorted_samples:
+        return 0.0
+    rank = max(math.ceil(fraction * len(sorted_samples)) - 1, 0)
+    return sorted_samples[rank]
+
+
+def summarise(samples: list, errors: int, elapsed: float) -> dict:
+    ordered = sorted(samples)
+    return {
+        "count": len(ordered),
+        "errors": errors,
+        "error_rate": round(errors / len(ordered), 4) if ordered else 0.0,
+        "rps": round(len(ordered) / elapsed, 2),
+        "p50": round(percentile(ordered, 0.50), 3),
+        "p95": round(percentile(ordered, 0.95), 3),
+        "p99": round(percentile(ordered, 0.99), 3),
+        "max": round(ordered[-1], 3) if ordered else 0.0
+    }
+
+
+def check_budgets(results: dict, budgets: dict, baseline: dict = None, tolerance: float = 0.2) -> list:
+    violations = []
+    for route, stats in results["routes"].items():
+        limits = {**budgets.get("*", {}), **budgets.get(route, {})}
+        for metric, limit in limits.items():
+            if stats.get(metric, 0) > limit:
+                violations.append(f"{route}: {metric} {stats[metric]} > budget {limit}")
+
+        previous = (baseline or {}).get("routes", {}).get(route)
+        if previous and previous["p99"] and stats["p99"] > previous["p99"] * (1 + tolerance):
+            violations.append(f"{route}: p99 {stats['p99']} regressed from {previous['p99']} (> {tolerance:.0%})")
+
+    max_error_rate = budgets.get("error_rate")
+    if max_error_rate is not None and results["total"]["error_rate"] > max_error_rate:
+        violations.append(f"total: error_rate {results['total']['error_rate']} > budget {max_error_rate}")
+    return violations
+
+
+@asynccontextmanager
+async def app_client(args):
+    if args.url:
+        async with httpx.AsyncClient(base_url=args.url, timeout=60) as client:
+            yield client
+        return
+
+    if args.uri:
+        environ["MONGODB_URI"] = args.uri
+    # In process every worker is the same client, which the per-client limits would throttle
+    environ.setdefault("RATE_LIMIT", "0")
+    # Imported late so MONGODB_URI is in place before the handlers read it
+    from app import app
+    from utils.utility import asyncMongoDBHandler
+
+    if args.stand_in:
+        from benchmarks.mongoStandIn import StandInClient
+        asyncMongoDBHandler.open(database_name=args.database, client=StandInClient())
+    else:
+        asyncMongoDBHandler.open(database_name=args.database)
+    # Every in-process run starts from an empty database, so the seed fully defines the data
+    await asyncMongoDBHandler.client.drop_database(args.database)
+
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=60) as client:
+            yield client
+
+
+async def run(args, mix: dict) -> dict:
+    rng = random.Random(args.seed)
+    # Over HTTP the target database may hold an earlier run, so make the names unique
+    prefix = f"lt{args.seed}_" if not args.url else f"lt{args.seed}_{int(time())}_"
+
+    async with app_client(args) as client:
+        seed_start = perf_counter()
+        usernames = await seed_data(client, rng, prefix, args.users, args.communities)
+        print(f"Seeded {args.users} users and {args.communities} communities in {perf_counter() - seed_start:.1f}s")
+
+        recorder = Recorder()
+        traffic = Traffic(recorder, usernames, prefix)
+        start = perf_counter()
+        deadline = start + args.duration
+        await asyncio.gather(*[
+            worker(client, traffic, mix, random.Random(args.seed * 1000 + number), deadline)
+            for number in range(args.concurrency)
+        ])
+        elapsed = perf_counter() - start
+
+    all_samples = [sample for samples in recorder.samples.values() for sample in samples]
+    return {
+        "meta": {
+            "started_at": datetime.now(timezone.utc).isoformat(),
+            "backend": args.url or ("stand-in" if args.stand_in else args.uri),
+            "seed": args.seed,
+            "users": args.users,
+            "communities": args.communities,
+            "concurrency": args.concurrency,
+            "duration": round(elapsed, 3),
+            "mix": mix
+        },
+        "routes": {
+            route: summarise(samples, recorder.errors.get(route, 0), elapsed)
+            for route, samples in sorted(recorder.samples.items())
+        },
+        "total": summarise(all_samples, sum(recorder.errors.values()), elapsed)
+    }
+
+
+def parse_mix(text: str) -> dict:
+    mix = dict(DEFAULT_MIX)
+    if text:
+        for item in text.split(","):
+            action, weight = item.split("=")
+            if action not in DEFAULT_MIX:
+                raise SystemExit(f"Unknown traffic type {action}, expected one of {', '.join(DEFAULT_MIX)}")
+            mix[action] = float(weight)
+    return {action: weight for action, weight in mix.items() if weight > 0}
+
+
+def print_results(results: dict):
+    print(f"{'route':42} {'count':>7} {'err':>5} {'rps':>8} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}")
+    for route, stats in [*results["routes"].items(), ("total", results["total"])]:
+        print(
+            f"{route:42} {stats['count']:7d} {stats['errors']:5d} {stats['rps']:8.1f} "
+            f"{stats['p50']:8.2f} {stats['p95']:8.2f} {stats['p99']:8.2f} {stats['max']:8.2f}"
+        )
+    print("latencies in ms")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Mixed-traffic load test with per-route percentiles")
+    target = parser.add_mutually_exclusive_group()
+    target.add_argument("--uri", default=None, help="MongoDB to run the in-process app against (default: MONGODB_URI or localhost)")
+    target.add_argument("--stand-in", action="store_true", help="use the in-process mongomock stand-in")
+    target.add_argument("--url", default=None, help="drive an already running server instead")
+    parser.add_argument("--database", default="saathi_loadtest")
+    parser.add_argument("--users", type=int, default=50)
+    parser.add_argument("--communities", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--duration", type=float, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--mix", default="", help="traffic weights, e.g. latest=30,search=20,signup=0")
+    parser.add_argument("--output", default=None, help="write the results as JSON")
+    parser.add_argument("--budgets", default=None, help="JSON file of latency budgets")
+    parser.add_argument("--baseline", default=None, help="earlier results JSON to compare p99 against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="allowed p99 growth over the baseline")
+    args = parser.parse_args()
+
+    if not args.url and not args.stand_in and not args.uri:
+        args.uri = environ.get("MONGODB_URI", "mongodb://localhost:27017")
+
+    results = asyncio.run(run(args, parse_mix(args.mix)))
+    print_results(results)
+
+    if args.output:
+        with open(args.output, "w") as file:
+            dump(results, file, indent=2)
+        print(f"Results written to {args.output}")
+
+    budgets, baseline = {}, None
+    if args.budgets:
+        with open(args.budgets) as file:
+            budgets = load(file)
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = load(file)
+
+    violations = check_budgets(results, budgets, baseline, args.tolerance)
+    for violation in violations:
+        print(f"OVER BUDGET  {violation}")
+    raise SystemExit(1 if violations else 0)
@@ -0,0 +1,103 @@
+"""
+In-process stand-in for AsyncMongoClient, backed by mongomock.
+
+Only for benchmarks/loadTest.py when no mongod is at hand: it exercises the
+app, the serialization and the in-memory caches/indexes, but query latencies
+say nothing about MongoDB itself and explain() is not supported. Needs the
+optional mongomock package (pip install mongomock).
+"""
+try:
+    import mongomock
+except ImportError:
+    raise SystemExit("The in-process stand-in needs mongomock: pip install mongomock")
+
+
+class StandInCursor:
+    def __init__(self, cursor):
+        self.cursor = cursor
+
+    def sort(self, *args, **kwargs):
+        self.cursor = self.cursor.sort(*args, **kwargs)
+        return self
+
+    def skip(self, count):
+        self.cursor = self.cursor.skip(count)
+        return self
+
+    def limit(self, count):
+        self.cursor = self.cursor.limit(count)
+        return self
+
+    def batch_size(self, size):
+        return self
+
+    def collation(self, collation):
+        # mongomock has no collations, so the autocomplete fallback's range stays case-sensitive
+        return self
+
+    async def to_list(self, length=None):
+        return list(self.cursor)
+
+    def __aiter__(self):
+        self.iterator = iter(self.cursor)
+        return self
+
+    async def __anext__(self):
+        try:
+            return next(self.iterator)
+        except StopIteration:
+            raise StopAsyncIteration
+
+    async def close(self):
+        pass
+
+
+class StandInCollection:
+    def __init__(self, collection):
+        self.collection = collection
+
+    def find(self, *args, **kwargs):
+        kwargs.pop("batch_size", None)
+        kwargs.pop("hint", None)
+        return StandInCursor(self.collection.find(*args, **kwargs))
+
+    async def aggregate(self, pipeline, **kwargs):
+        return StandInCursor(iter(list(self.collection.aggregate(pipeline))))
+
+    def __getattr__(self, name):
+        # insert_one, update_one, bulk_write, create_index, ... awaited like the real client
+        method = getattr(self.collection, name)
+
+        async def call(*args, **kwargs):
+            return method(*args, **kwargs)
+        return call
+
+
+class StandInDatabase:
+    def __init__(self, database):
+        self.database = database
+
+    def __getitem__(self, name):
+        return StandInCollection(self.database[name])
+
+    async def command(self, *args, **kwargs):
+        # ping and friends
+        return {"ok": 1}
+
+
+class StandInClient:
+    def __init__(self):
+        self.client = mongomock.MongoClient()
+
+    def __getitem__(self, name):
+        return StandInDatabase(self.client[name])
+
+    @property
+    def admin(self):
+        return StandInDatabase(self.client.admin)
+
+    async def drop_database(self, name):
+        self.client.drop_database(name)
+
+    async def close(self):
+        pass
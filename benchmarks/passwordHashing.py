@@ -0,0 +1,77 @@
+"""
+Login throughput per core with scrypt verification on the worker pool.
+
+Usage:
+    python -m benchmarks.passwordHashing [--logins 200] [--n 16384]
+
+For each pool size up to the number of CPUs, runs --logins concurrent
+verifications through PasswordHasher and reports logins/s overall and per
+core. It also reports the worst event-loop stall seen while hashing inline
+on the loop versus on the pool, which is what other requests would feel.
+"""
+import asyncio
+from argparse import ArgumentParser
+from os import cpu_count
+from time import perf_counter
+
+from utils.passwords import PasswordHasher
+
+
+async def watch_loop(stop: asyncio.Event, interval: float = 0.001) -> float:
+    # Largest delay between when a 1 ms sleep should wake up and when it did
+    worst = 0.0
+    while not stop.is_set():
+        start = perf_counter()
+        await asyncio.sleep(interval)
+        worst = max(worst, perf_counter() - start - interval)
+    return worst
+
+
+async def run_pool(hasher: PasswordHasher, stored: str, logins: int):
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch_loop(stop))
+    start = perf_counter()
+    results = await asyncio.gather(*(hasher.verify("correct horse", stored) for _ in range(logins)))
+    elapsed = perf_counter() - start
+    stop.set()
+    assert all(results)
+    return elapsed, await watcher
+
+
+async def run_inline(hasher: PasswordHasher, stored: str, logins: int):
+    stop = asyncio.Event()
+    watcher = asyncio.create_task(watch_loop(stop))
+    await asyncio.sleep(0)
+    start = perf_counter()
+    for _ in range(logins):
+        assert hasher.verify_sync("correct horse", stored)
+        await asyncio.sleep(0)
+    elapsed = perf_counter() - start
+    stop.set()
+    return elapsed, await watcher
+
+
+async def main(logins: int, n: int):
+    cores = cpu_count() or 1
+    reference = PasswordHasher(n=n, max_workers=1)
+    stored = reference.hash_sync("correct horse")
+    print(f"scrypt n={reference.n} r={reference.r} p={reference.p}, {logins} logins, {cores} CPU(s)")
+
+    elapsed, stall = await run_inline(reference, stored, logins)
+    print(f"{'inline on loop':<16}: {logins / elapsed:8.1f} logins/s {'':12} worst loop stall {stall * 1000:7.1f} ms")
+
+    for workers in sorted({1, 2, cores, cores * 2}):
+        hasher = PasswordHasher(n=n, max_workers=workers)
+        elapsed, stall = await run_pool(hasher, stored, logins)
+        hasher.shutdown()
+        throughput = logins / elapsed
+        per_core = throughput / min(workers, cores)
+        print(f"{f'pool x{workers}':<16}: {throughput:8.1f} logins/s {per_core:6.1f}/core  worst loop stall {stall * 1000:7.1f} ms")
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Benchmark password verification throughput")
+    parser.add_argument("--logins", type=int, default=200)
+    parser.add_argument("--n", type=int, default=None, help="scrypt cost, defaults to PASSWORD_SCRYPT_N or 16384")
+    args = parser.parse_args()
+    asyncio.run(main(args.logins, args.n))
@@ -0,0 +1,80 @@
+"""
+CPU cost of rendering a /community/latest/ response, old path vs fast path.
+
+Usage:
+    python -m benchmarks.serialization [--limit 100] [--iterations 2000]
+
+Old path: validate every document into Community, model_dump() it and render
+the dicts with the stdlib-json JSONResponse. Fast path: shape the trusted
+documents with CommunityUtility.public_community and render them with
+FastJSONResponse (orjson). Both are timed with process_time, i.e. CPU only.
+"""
+from argparse import ArgumentParser
+from datetime import datetime, timedelta
+from time import process_time
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+from schema.CommunityClient import Community
+from utils.responses import FastJSONResponse
+from utils.utility import CommunityUtility
+
+community_util = CommunityUtility()
+
+SKILLS = ["Python", "React", "Node.js", "Go", "Rust", "Docker", "Kubernetes", "TypeScript", "MongoDB", "FastAPI"]
+
+
+def make_documents(count: int) -> list:
+    now = datetime(2025, 4, 4, 12, 0, 0)
+    return [
+        {
+            "_id": ObjectId(),
+            "creator_username": f"user{i}",
+            "name": f"Community {i}",
+            "experience": "intermediate" if i % 2 else None,
+            "tech_stack": SKILLS[i % 5:i % 5 + 4],
+            "registeration_date_time": now - timedelta(minutes=i)
+        }
+        for i in range(count)
+    ]
+
+
+def old_path(documents: list) -> bytes:
+    communities = [Community(**comm) for comm in documents]
+    return JSONResponse(content={
+        "message": "Communities fetched successfully",
+        "communities": [comm.model_dump() for comm in communities],
+        "next_cursor": None
+    }).body
+
+
+def fast_path(documents: list) -> bytes:
+    return FastJSONResponse(content={
+        "message": "Communities fetched successfully",
+        "communities": [community_util.public_community(comm) for comm in documents],
+        "next_cursor": None
+    }).body
+
+
+def measure(render, documents: list, iterations: int) -> float:
+    start = process_time()
+    for _ in range(iterations):
+        render(documents)
+    return (process_time() - start) / iterations * 1e6
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Compare response rendering CPU cost")
+    parser.add_argument("--limit", type=int, default=100)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    documents = make_documents(args.limit)
+    old_path(documents), fast_path(documents)  # warm up
+
+    old_us = measure(old_path, documents, args.iterations)
+    fast_us = measure(fast_path, documents, args.iterations)
+    print(f"limit={args.limit} iterations={args.iterations}")
+    print(f"pydantic + stdlib json : {old_us:8.1f} us CPU per response")
+    print(f"trusted dicts + orjson : {fast_us:8.1f} us CPU per response")
+    print(f"speedup                : {old_us / fast_us:8.1f}x")
@@ -1,8 +1,13 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import StreamingResponse
+from bson import ObjectId
 
 from schema.CommunityClient import *
 from utils.utility import CommunityUtility
+from utils.responses import FastJSONResponse, NDJSON_MEDIA_TYPE, ndjson_stream
+from utils.pagination import encode_cursor, decode_cursor, clamp_batch_size, SEARCH_CURSOR
+from utils.fields import COMMUNITY_FIELDS, COMMUNITY_SUMMARY_FIELDS, parse_fields
+from utils.httpCache import cache_control_for, make_etag, etag_matches, cache_headers, not_modified
 
 community_router = APIRouter(
     prefix='/community',
@@ -12,98 +17,246 @@ community_router = APIRouter(
 community_util = CommunityUtility()
 
 
-@community_router.post('/create', response_class=JSONResponse)
+def invalid_cursor_response(cursor: str) -> FastJSONResponse:
+    error_response = ErrorResponse(
+        status=False,
+        error="Invalid cursor",
+        detail=f"Cursor {cursor} is not a valid page token"
+    )
+    return FastJSONResponse(
+        status_code=400,
+        content=error_response.model_dump()
+    )
+
+
+def invalid_fields_response(error: ValueError) -> FastJSONResponse:
+    error_response = ErrorResponse(
+        status=False,
+        error="Invalid fields",
+        detail=str(error)
+    )
+    return FastJSONResponse(
+        status_code=400,
+        content=error_response.model_dump()
+    )
+
+
+@community_router.post('/create', response_class=FastJSONResponse)
 async def create_community(community: Community):
 
     try:
-        community_id = community_util.save_community(community)
+        community_id = await community_util.save_community(community)
         if not community_id:
             error_response = ErrorResponse(
                 status=False,
                 error="Failed to save community details",
                 detail=f"Failed to save community details"
             )
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=409,
                 content=error_response.model_dump()
             )
-        return JSONResponse(content={"message": "Community created successfully", "community_id": str(community_id)})    
+        return FastJSONResponse(content={"message": "Community created successfully", "community_id": str(community_id)})    
     except Exception as e:
         print("Exception while getting data from MongoDB\nError Message from routes/CommunityRoutes.py create_community function")
         print(e)
         raise HTTPException(status_code=400, detail=str(e))
     
-@community_router.get('/id/{community_id}', response_class=JSONResponse)
-async def get_community(community_id: str):
+@community_router.get('/id/{community_id}', response_class=FastJSONResponse)
+async def get_community(community_id: str, fields: Optional[str] = None, if_none_match: Optional[str] = Header(None)):
     try:
-        community_data: Community = community_util.get_community(community_id)
+        # ?fields=name,tech_stack narrows both the response and the MongoDB projection
+        try:
+            fields = parse_fields(fields, COMMUNITY_FIELDS)
+        except ValueError as e:
+            return invalid_fields_response(e)
+
+        community_data = await community_util.get_community(community_id, fields)
         if not community_data:
             error_response = ErrorResponse(
                 status=False,
                 error="Community not found",
                 detail=f"Community {community_id} not found"
             )
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=404,
                 content=error_response.model_dump()
             )
-        return JSONResponse(content=community_data.model_dump(), status_code=200)
+        
+        # Hashed from the stored document rather than remembered per process: migrations
+        # (scripts/migrateTechStack.py, scripts/migrateSkillIds.py) rewrite communities in place
+        cache_control = cache_control_for("community")
+        etag = make_etag(community_data)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, cache_control)
+        return FastJSONResponse(content=community_data, status_code=200, headers=cache_headers(etag, cache_control))
     except Exception as e:
         print("Exception while getting data from MongoDB\nError Message from routes/CommunityRoutes.py get_community function")
         print(e)
         raise HTTPException(status_code=400, detail=str(e))
     
-@community_router.get('/user/{username}', response_class=JSONResponse)
-async def get_user_communities(username: str):
+@community_router.post('/batch', response_class=FastJSONResponse)
+async def get_communities(batch: CommunityBatch, fields: Optional[str] = None):
+    try:
+        try:
+            fields = parse_fields(fields, COMMUNITY_FIELDS)
+        except ValueError as e:
+            return invalid_fields_response(e)
+
+        # Two queries at most for the whole batch, missing ids reported inline
+        communities = await community_util.get_communities(batch.ids, fields)
+        if communities is None:
+            error_response = ErrorResponse(
+                status=False,
+                error="Failed to fetch communities",
+                detail="Failed to fetch communities"
+            )
+            return FastJSONResponse(
+                status_code=500,
+                content=error_response.model_dump()
+            )
+
+        # One result per requested id, in request order, repeats included
+        results = [
+            {"id": community_id, "found": True, "community": communities[community_id]}
+            if communities[community_id] else
+            {"id": community_id, "found": False, "error": "Community not found"}
+            for community_id in batch.ids
+        ]
+        return FastJSONResponse(content={"message": "Communities fetched successfully", "communities": results})
+    except Exception as e:
+        print("Exception while getting data from MongoDB\nError Message from routes/CommunityRoutes.py get_communities function")
+        print(e)
+        raise HTTPException(status_code=400, detail=str(e))
+
+@community_router.get('/user/{username}', response_class=FastJSONResponse)
+async def get_user_communities(username: str, limit: int = 10, cursor: Optional[str] = None, fields: Optional[str] = None):
     try:
-        communities = community_util.get_user_communities(username)
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return invalid_cursor_response(cursor)
+        try:
+            fields = parse_fields(fields, COMMUNITY_SUMMARY_FIELDS)
+        except ValueError as e:
+            return invalid_fields_response(e)
+
+        communities, next_key = await community_util.get_user_communities(username, limit=limit, after=after, fields=fields)
         if not communities:
-            return JSONResponse(
-                content={"message": "No communities found", "communities": []},
+            return FastJSONResponse(
+                content={"message": "No communities found", "communities": [], "next_cursor": None},
                 status_code=200
             )
         
-        return JSONResponse(
+        return FastJSONResponse(
             content={"message": "Communities fetched successfully", 
-                    "communities": [comm.model_dump(mode='json') for comm in communities]},
+                    "communities": communities,
+                    "next_cursor": encode_cursor(next_key)},
             status_code=200
         )
     except Exception as e:
         print("Exception while fetching latest communities:", e)
         raise HTTPException(status_code=400, detail=str(e))
 
-@community_router.get('/latest/', response_class=JSONResponse)
-async def get_latest_communities(limit: int = 10, page:int = 1):
+@community_router.get('/export')
+async def export_communities(tech_stack: bool = False, batch_size: int = 1000, after: Optional[str] = None):
+    # Every community as NDJSON in _id order; a sync job resumes from the last id it stored with ?after=
+    if after and not ObjectId.is_valid(after):
+        error_response = ErrorResponse(
+            status=False,
+            error="Invalid id",
+            detail=f"{after} is not a valid community id"
+        )
+        return FastJSONResponse(
+            status_code=400,
+            content=error_response.model_dump()
+        )
+
+    batches = community_util.export_communities(
+        with_tech_stack=tech_stack,
+        batch_size=clamp_batch_size(batch_size),
+        after=ObjectId(after) if after else None
+    )
+    return StreamingResponse(ndjson_stream(batches), media_type=NDJSON_MEDIA_TYPE)
+
+@community_router.get('/latest/', response_class=FastJSONResponse)
+async def get_latest_communities(limit: int = 10, page:int = 1, cursor: Optional[str] = None, fields: Optional[str] = None, if_none_match: Optional[str] = Header(None)):
     try:
-        communities = community_util.get_latest_communities(limit)
+        # cursor (keyset) takes precedence over page (offset)
+        try:
+            after = decode_cursor(cursor) if cursor else None
+        except ValueError:
+            return invalid_cursor_response(cursor)
+        if page < 1:
+            # Would become a negative skip, which MongoDB rejects
+            error_response = ErrorResponse(
+                status=False,
+                error="Invalid page",
+                detail=f"page must be 1 or more, got {page}"
+            )
+            return FastJSONResponse(
+                status_code=400,
+                content=error_response.model_dump()
+            )
+        try:
+            fields = parse_fields(fields, COMMUNITY_FIELDS)
+        except ValueError as e:
+            return invalid_fields_response(e)
+
+        communities, next_key = await community_util.get_latest_communities(limit, page=page, after=after, fields=fields)
+        # Hashed from the page itself: a new community shifts it, and migrations rewrite tech_stack in place
+        cache_control = cache_control_for("latest")
+        next_cursor = encode_cursor(next_key)
+        etag = make_etag(communities, next_cursor)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, cache_control)
+
         if not communities:
-            return JSONResponse(
-                content={"message": "No communities found", "communities": []},
-                status_code=200
+            return FastJSONResponse(
+                content={"message": "No communities found", "communities": [], "next_cursor": None},
+                status_code=200,
+                headers=cache_headers(etag, cache_control)
             )
         
-        return JSONResponse(
+        return FastJSONResponse(
             content={"message": "Communities fetched successfully", 
-                    "communities": [comm.model_dump() for comm in communities]},
-            status_code=200
+                    "communities": communities,
+                    "next_cursor": next_cursor},
+            status_code=200,
+            headers=cache_headers(etag, cache_control)
         )
     except Exception as e:
         print("Exception while fetching latest communities:", e)
         raise HTTPException(status_code=400, detail=str(e))
     
-@community_router.post('/search/skills', response_class=JSONResponse)
+@community_router.post('/search/skills', response_class=FastJSONResponse)
 async def search_communities_by_skills(search: SearchCommunityBySkills):
     try:
-        communities = community_util.search_community_by_skills(skills=search.skills, limit=search.limit)
+        try:
+            # (matched, registeration_date_time, _id)
+            after = decode_cursor(search.cursor, SEARCH_CURSOR) if search.cursor else None
+        except ValueError:
+            return invalid_cursor_response(search.cursor)
+
+        communities, next_key, total = await community_util.search_community_by_skills(
+            skills=search.skills,
+            limit=search.limit,
+            after=after,
+            match_all=search.match_all,
+            with_total=search.with_total
+        )
+        totals = {"total": total} if search.with_total else {}
         if not communities:
-            return JSONResponse(
-                content={"message": "No communities found", "communities": []},
+            return FastJSONResponse(
+                content={"message": "No communities found", "communities": [], "next_cursor": None, **totals},
                 status_code=200
             )
         
-        return JSONResponse(
+        return FastJSONResponse(
             content={"message": "Communities fetched successfully", 
-                    "communities": [comm.model_dump() for comm in communities]},
+                    "communities": communities,
+                    "next_cursor": encode_cursor(next_key),
+                    **totals},
             status_code=200
         )
     except Exception as e:
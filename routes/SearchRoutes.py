@@ -0,0 +1,54 @@
+from fastapi import APIRouter, HTTPException
+
+from schema.CommunityClient import ErrorResponse
+from utils.utility import SearchUtility, AUTOCOMPLETE_SOURCES
+from utils.responses import FastJSONResponse
+from utils.httpCache import cache_control_for
+
+search_router = APIRouter(
+    prefix='/search',
+    tags=['search']
+)
+
+search_util = SearchUtility()
+
+
+@search_router.get('/autocomplete', response_class=FastJSONResponse)
+async def autocomplete(q: str, limit: int = 8, kinds: str = "community,user,skill"):
+    try:
+        requested = [kind.strip() for kind in kinds.split(",") if kind.strip()]
+        unknown = [kind for kind in requested if kind not in AUTOCOMPLETE_SOURCES]
+        if unknown or not requested:
+            error_response = ErrorResponse(
+                status=False,
+                error="Invalid kinds",
+                detail=f"kinds must be a comma separated subset of {', '.join(AUTOCOMPLETE_SOURCES)}"
+            )
+            return FastJSONResponse(
+                status_code=400,
+                content=error_response.model_dump()
+            )
+
+        if not q.strip():
+            return FastJSONResponse(content={kind: [] for kind in requested})
+
+        suggestions = await search_util.autocomplete(q, requested, limit)
+        if suggestions is None:
+            error_response = ErrorResponse(
+                status=False,
+                error="Autocomplete failed",
+                detail=f"Could not complete {q}"
+            )
+            return FastJSONResponse(
+                status_code=500,
+                content=error_response.model_dump()
+            )
+
+        return FastJSONResponse(
+            content=suggestions,
+            headers={"Cache-Control": cache_control_for("autocomplete")}
+        )
+    except Exception as e:
+        print("Exception while getting data from MongoDB\nError Message from routes/SearchRoutes.py autocomplete function")
+        print(e)
+        raise HTTPException(status_code=400, detail=str(e))
@@ -1,8 +1,15 @@
-from fastapi import APIRouter, HTTPException
-from fastapi.responses import JSONResponse
+from hmac import compare_digest
+from os import environ
+from fastapi import APIRouter, HTTPException, Header
+from fastapi.responses import StreamingResponse
+from bson import ObjectId
 
 from schema.UserClient import *
 from utils.utility import UserUtility
+from utils.responses import FastJSONResponse, NDJSON_MEDIA_TYPE, ndjson_stream
+from utils.pagination import clamp_batch_size
+from utils.fields import USER_FIELDS, PROFILE_FIELDS, parse_fields
+from utils.httpCache import cache_control_for, make_etag, etag_matches, cache_headers, not_modified
 
 user_router = APIRouter(
     prefix='/user',
@@ -12,36 +19,48 @@ user_router = APIRouter(
 user_util = UserUtility()
 
 
-@user_router.post('/signup', response_class=JSONResponse)
+def invalid_fields_response(error: ValueError) -> FastJSONResponse:
+    error_response = ErrorResponse(
+        status=False,
+        error="Invalid fields",
+        detail=str(error)
+    )
+    return FastJSONResponse(
+        status_code=400,
+        content=error_response.model_dump()
+    )
+
+
+@user_router.post('/signup', response_class=FastJSONResponse)
 async def signup(user: Register):
     try:
         # Check if user already exists
-        user_data = user_util.get_user(user.username)
+        user_data = await user_util.get_user(user.username)
         if user_data:
             error_response = ErrorResponse(
                 status=False,
                 error="User already exists",
                 detail=f"User {user.username} already exists"
             )
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=409,
                 content=error_response.model_dump()
             )
 
         # Save student details
-        saved_id = user_util.save_user(user)
+        saved_id = await user_util.save_user(user)
         if not saved_id:
             error_response = ErrorResponse(
                 status=False,
                 error="Failed to save student details",
                 detail=f"Failed to save student details"
             )
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=404,
                 content=error_response.model_dump()
             )
         
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,
             content={"message": "User registered successfully"}
         )
@@ -50,35 +69,35 @@ async def signup(user: Register):
         raise HTTPException(status_code=400, detail=str(e))
 
 
-@user_router.post('/login', response_class=JSONResponse)
+@user_router.post('/login', response_class=FastJSONResponse)
 async def login(user: Login):
     try:
         # Check if user exists
-        user_data = user_util.get_user(user.username)
+        user_data = await user_util.get_user(user.username)
         if not user_data:
             error_response = ErrorResponse(
                 status=False,
                 error="User not found",
                 detail=f"User {user.username} not found"
             )
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=404,
                 content=error_response.model_dump()
             )
 
         # Check if password is correct
-        if not user_util.validate_password(user.password, user_data['password']):
+        if not await user_util.validate_password(user.password, user_data):
             error_response = ErrorResponse(
                 status=False,
                 error="Invalid password",
                 detail=f"Invalid password for user {user.username}"
             )
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=401,
                 content=error_response.model_dump()
             )
 
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,
             content={"message": "User logged in successfully"}
         )
@@ -87,25 +106,78 @@ async def login(user: Login):
         raise HTTPException(status_code=400, detail=str(e))
     
 
-@user_router.get('/{username}', response_class=JSONResponse)
-async def get_user(username: str):
+@user_router.get('/cache/stats', response_class=FastJSONResponse)
+async def get_cache_stats():
+    return FastJSONResponse(
+        status_code=200,
+        content=user_util.cache_stats()
+    )
+
+
+def export_allowed(token: Optional[str]) -> bool:
+    # The export carries names and emails: only callers holding EXPORT_TOKEN get it, nobody when it is unset
+    expected = environ.get("EXPORT_TOKEN")
+    return bool(expected and token) and compare_digest(token.encode(), expected.encode())
+
+
+# Declared before /{username}, which would otherwise capture it
+@user_router.get('/export')
+async def export_users(skills: bool = False, batch_size: int = 1000, after: Optional[str] = None, x_export_token: Optional[str] = Header(None)):
+    # Every user as NDJSON in _id order, without passwords; resume with ?after=<last id>
+    if not export_allowed(x_export_token):
+        error_response = ErrorResponse(
+            status=False,
+            error="Forbidden",
+            detail="A valid X-Export-Token header is required"
+        )
+        return FastJSONResponse(
+            status_code=403,
+            content=error_response.model_dump()
+        )
+
+    if after and not ObjectId.is_valid(after):
+        error_response = ErrorResponse(
+            status=False,
+            error="Invalid id",
+            detail=f"{after} is not a valid user id"
+        )
+        return FastJSONResponse(
+            status_code=400,
+            content=error_response.model_dump()
+        )
+
+    batches = user_util.export_users(
+        with_skills=skills,
+        batch_size=clamp_batch_size(batch_size),
+        after=ObjectId(after) if after else None
+    )
+    return StreamingResponse(ndjson_stream(batches), media_type=NDJSON_MEDIA_TYPE)
+
+
+@user_router.get('/{username}', response_class=FastJSONResponse)
+async def get_user(username: str, fields: Optional[str] = None):
     try:
-        user_data = user_util.get_user(username)
+        try:
+            fields = parse_fields(fields, USER_FIELDS)
+        except ValueError as e:
+            return invalid_fields_response(e)
+
+        # Served from the user cache, which login shares, so fields only narrows the response
+        user_data = await user_util.get_user(username)
         if not user_data:
             error_response = ErrorResponse(
                 status=False,
                 error="User not found",
                 detail=f"User {username} not found"
             )
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=404,
                 content=error_response.model_dump()
             )
         
-        user_data: Register = user_util.filter_user_data(user_data)
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,
-            content=user_data.model_dump()
+            content=user_util.public_user(user_data, fields)
         )
         
     except Exception as e:
@@ -113,43 +185,58 @@ async def get_user(username: str):
         print(e)
         raise HTTPException(status_code=400, detail=str(e))
 
-@user_router.get('/profile/{username}', response_class=JSONResponse)
-async def get_profile(username: str):
+@user_router.get('/profile/{username}', response_class=FastJSONResponse)
+async def get_profile(username: str, fields: Optional[str] = None, if_none_match: Optional[str] = Header(None)):
     try:
-        user_data = user_util.get_user(username)
-        if not user_data:
+        # ?fields=bio,skills narrows the response; skills and projects are only joined when asked for
+        try:
+            fields = parse_fields(fields, PROFILE_FIELDS)
+        except ValueError as e:
+            return invalid_fields_response(e)
+
+        # Revalidate against the profile's version stamp before assembling it
+        cache_control = cache_control_for("profile")
+        if if_none_match:
+            version = await user_util.get_profile_version(username)
+            etag = make_etag("profile", username, version, fields) if version else None
+            if etag_matches(if_none_match, etag):
+                return not_modified(etag, cache_control)
+
+        # One round trip for the user, profile, skills and projects
+        full_profile = await user_util.get_full_profile(username, fields)
+        if not full_profile:
             error_response = ErrorResponse(
                 status=False,
                 error="User not found",
                 detail=f"User {username} not found"
             )
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=404,
                 content=error_response.model_dump()
             )
         
-        user_profile = user_util.get_profile(user_data['_id'])
-        if not user_profile:
+        if not full_profile["profile"]:
             error_response = ErrorResponse(
                 status=False,
                 error="Profile not found",
                 detail=f"Profile for user {username} not found"
             )
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=404,
                 content=error_response.model_dump()
             )
-        
-        user_skills = user_util.get_skills(user_data["_id"])
-        user_projects = user_util.get_projects(user_data["_id"])
 
-        user_profile["skills"] = user_skills
-        user_profile["projects"] = user_projects
+        version = full_profile["profile"].get("version")
+        user_profile = user_util.public_profile(full_profile, fields)
+        # Profiles saved before versions existed fall back to a content hash
+        etag = make_etag("profile", username, version, fields) if version else make_etag(user_profile)
+        if etag_matches(if_none_match, etag):
+            return not_modified(etag, cache_control)
 
-        user_profile = UserProfile(**user_profile)        
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,
-            content=user_profile.model_dump()
+            content=user_profile,
+            headers=cache_headers(etag, cache_control)
         )
         
     except Exception as e:
@@ -157,36 +244,73 @@ async def get_profile(username: str):
         print(e)
         raise HTTPException(status_code=400, detail=str(e))
 
-@user_router.post('/save/profile/{username}', response_class=JSONResponse)
+@user_router.post('/profiles/batch', response_class=FastJSONResponse)
+async def get_profiles(batch: ProfileBatch, fields: Optional[str] = None):
+    try:
+        try:
+            fields = parse_fields(fields, PROFILE_FIELDS)
+        except ValueError as e:
+            return invalid_fields_response(e)
+
+        # One aggregation for the whole batch, missing users and profiles reported inline
+        full_profiles = await user_util.get_full_profiles(batch.usernames, fields)
+        if full_profiles is None:
+            error_response = ErrorResponse(
+                status=False,
+                error="Failed to fetch profiles",
+                detail="Failed to fetch profiles"
+            )
+            return FastJSONResponse(
+                status_code=500,
+                content=error_response.model_dump()
+            )
+
+        results = []
+        for username, full_profile in full_profiles.items():
+            if not full_profile:
+                results.append({"username": username, "found": False, "error": "User not found"})
+            elif not full_profile["profile"]:
+                results.append({"username": username, "found": False, "error": "Profile not found"})
+            else:
+                results.append({"username": username, "found": True, "profile": user_util.public_profile(full_profile, fields)})
+
+        return FastJSONResponse(content={"message": "Profiles fetched successfully", "profiles": results})
+
+    except Exception as e:
+        print("Exception while getting data from MongoDB\nError Message from routes/UserRoutes.py get_profiles function")
+        print(e)
+        raise HTTPException(status_code=400, detail=str(e))
+
+@user_router.post('/save/profile/{username}', response_class=FastJSONResponse)
 async def save_profile(username: str, profile_data: UserProfile):
     try:
         # Check if username exists in the database
-        user_data = user_util.get_user(username)
-        if not user_data:
+        user_id = await user_util.get_user_id(username)
+        if not user_id:
             error_response = ErrorResponse(
                 status=False,
                 error="User not found",
                 detail=f"User {username} not found"
             )
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=404,
                 content=error_response.model_dump()
             )
         
-        result: bool = user_util.save_profile(user_data['_id'], profile_data)
+        result: bool = await user_util.save_profile(user_id, profile_data)
         if not result:
             error_response = ErrorResponse(
                 status=False,
                 error="Failed to save profile",
                 detail=f"Failed to save profile"
             )
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=404,
                 content=error_response.model_dump()
             )
 
 
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,
             content={"message": "Profile saved successfully"}
         )
@@ -197,36 +321,36 @@ async def save_profile(username: str, profile_data: UserProfile):
         raise HTTPException(status_code=400, detail=str(e))
     
 
-@user_router.post('/update/profile/{username}', response_class=JSONResponse)
+@user_router.post('/update/profile/{username}', response_class=FastJSONResponse)
 async def update_profile(username: str, profile_data: UserProfile):
     try:
         # Check if username exists in the database
-        user_data = user_util.get_user(username)
-        if not user_data:
+        user_id = await user_util.get_user_id(username)
+        if not user_id:
             error_response = ErrorResponse(
                 status=False,
                 error="User not found",
                 detail=f"User {username} not found"
             )
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=404,
                 content=error_response.model_dump()
             )
         
-        result: bool = user_util.update_profile(user_data['_id'], profile_data)
+        result: bool = await user_util.update_profile(user_id, profile_data, username=username)
         if not result:
             error_response = ErrorResponse(
                 status=False,
                 error="Failed to update profile",
                 detail=f"Failed to update profile"
             )
-            return JSONResponse(
+            return FastJSONResponse(
                 status_code=404,
                 content=error_response.model_dump()
             )
 
 
-        return JSONResponse(
+        return FastJSONResponse(
             status_code=200,
             content={"message": "Profile updated successfully"}
         )
@@ -25,6 +25,15 @@ class Community(BaseModel):
 class SearchCommunityBySkills(BaseModel):
     limit:int
     skills:List[str]
+    cursor: Optional[str] = None
+    # Require every skill instead of any of them
+    match_all: bool = False
+    # Also count every matching community, across all pages
+    with_total: bool = False
+
+# Batch read of community cards, at most 100 per request
+class CommunityBatch(BaseModel):
+    ids: List[str] = Field(min_length=1, max_length=100)
 
 # Search Community By Skills Response Model
 class CommunityBySkillsResponse(BaseModel):
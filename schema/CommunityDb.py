@@ -1,5 +1,5 @@
 from pydantic import BaseModel, Field
-from typing import Dict, Optional
+from typing import Dict, Optional, List
 from bson import ObjectId
 from datetime import datetime
 
@@ -19,6 +19,9 @@ class CommunityData(BaseModel):
     creator_username:str
     name: str
     experience:Optional[str] = None
+    tech_stack: List[str] = []
+    # Catalog ids of tech_stack, in the same order
+    skill_ids: List[int] = []
     registeration_date_time: datetime
 
     class Config:
@@ -29,6 +32,7 @@ class CommunityData(BaseModel):
 class CommunitySkill(BaseModel):
     community_id: PyObjectId = Field(default_factory=PyObjectId)
     skill: str
+    skill_id: Optional[int] = None
 
     model_config = {
         "json_encoders": {ObjectId: str}
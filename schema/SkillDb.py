@@ -0,0 +1,13 @@
+from pydantic import BaseModel, Field
+
+
+# One entry of the skill catalog; _id is a small integer from the "skills" counter
+class SkillData(BaseModel):
+    id: int = Field(alias="_id")
+    # canonical_key of the name, unique
+    key: str
+    name: str
+
+    model_config = {
+        "populate_by_name": True
+    }
@@ -16,6 +16,12 @@ class Register(BaseModel):
     email: EmailStr
     password: str
 
+# Public user details, without the password
+class UserDetails(BaseModel):
+    username: str
+    name: str
+    email: EmailStr
+
 # class SkillLevel(Enum):
 #     BEGINNER = "beginner"
 #     INTERMEDIATE = "intermediate"
@@ -43,6 +49,11 @@ class UserProfile(BaseModel):
         use_enum_values = True
 
 
+# Batch read of member profiles, at most 100 per request
+class ProfileBatch(BaseModel):
+    usernames: List[str] = Field(min_length=1, max_length=100)
+
+
 class ErrorResponse(BaseModel):
     status: bool = False
     error: str
@@ -39,6 +39,8 @@ class UserProfileData(BaseModel):
     github_url: Optional[str] = None
     portfolio_url: Optional[str] = None
     years_exp: int
+    # Changes on every write, backs the profile ETag
+    version: Optional[str] = None
 
     class Config:
         json_encoders = {ObjectId: str}
@@ -54,6 +56,7 @@ class SkillLevel(str, Enum):
 class UserSkills(BaseModel):
     user_id: PyObjectId = Field(default_factory=PyObjectId)
     skill: str
+    skill_id: Optional[int] = None
     # level: SkillLevel
 
     class Config:
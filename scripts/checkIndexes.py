@@ -0,0 +1,105 @@
+"""
+Verify that every query shape used by UserUtility/CommunityUtility is served by an index.
+
+Usage:
+    python -m scripts.checkIndexes [--apply]
+
+Runs explain() (queryPlanner verbosity, nothing is executed) for each shape
+and exits with status 1 if any winning plan contains a COLLSCAN. --apply
+creates the indexes from utils/indexes.py first. Full scans that are
+deliberate (building the skill index) are not listed.
+"""
+from argparse import ArgumentParser
+from datetime import datetime, timezone
+from bson import ObjectId
+
+from utils.dbHandler import MongoDB, seek_query
+from utils.indexes import INDEXES, CASE_INSENSITIVE
+from utils.utility import UserUtility, CommunityUtility
+
+LATEST_SORT = [("registeration_date_time", -1), ("_id", -1)]
+
+
+def query_shapes() -> list:
+    user_util = UserUtility()
+    community_util = CommunityUtility()
+    some_id = ObjectId()
+    position = (datetime.now(timezone.utc), some_id)
+
+    return [
+        ("UserUtility.get_user", "user", {"query": {"username": "someone"}}),
+        ("UserUtility.get_full_profile", "user", {"pipeline": user_util.build_profile_pipeline({"username": "someone"})}),
+        ("UserUtility.get_full_profiles", "user", {"pipeline": user_util.build_profile_pipeline({"username": {"$in": ["someone", "someone_else"]}})}),
+        ("get_full_profile $lookup user_profiles", "user_profiles", {"query": {"user_id": some_id}}),
+        ("get_full_profile $lookup user_skills", "user_skills", {"query": {"user_id": some_id}}),
+        ("get_full_profile $lookup user_projects", "user_projects", {"query": {"user_id": some_id}}),
+        ("UserUtility.get_profile_version", "user_profiles", {"query": {"user_id": some_id}}),
+        ("CommunityUtility.get_community", "community", {"query": {"_id": some_id}}),
+        ("CommunityUtility.get_communities", "community", {"query": {"_id": {"$in": [some_id, ObjectId()]}}}),
+        ("CommunityUtility.get_latest_communities", "community", {"query": {}, "sort": LATEST_SORT}),
+        ("CommunityUtility.get_latest_communities (cursor)", "community", {"query": seek_query({}, "registeration_date_time", position), "sort": LATEST_SORT}),
+        ("CommunityUtility.get_user_communities", "community", {"query": {"creator_username": "someone"}, "sort": LATEST_SORT}),
+        ("CommunityUtility.get_user_communities (cursor)", "community", {"query": seek_query({"creator_username": "someone"}, "registeration_date_time", position), "sort": LATEST_SORT}),
+        ("CommunityUtility.search_skills_in_db", "community", {"pipeline": community_util.build_search_pipeline([1, 2], 11)}),
+        ("CommunityUtility.search_skills_in_db (all)", "community", {"pipeline": community_util.build_search_pipeline([1, 2], 11, match_all=True)}),
+        ("CommunityUtility.search_skills_in_db (total)", "community", {"pipeline": community_util.build_search_pipeline([1, 2], 11, with_total=True)}),
+        ("CommunityUtility.search_skill_index", "community", {"query": {"_id": {"$in": [some_id, ObjectId()]}}}),
+        ("SearchUtility.complete_in_db community", "community", {"query": {"name": {"$gte": "py", "$lt": "py\uffff"}}, "sort": [("name", 1)], "collation": CASE_INSENSITIVE}),
+        ("SearchUtility.complete_in_db user", "user", {"query": {"username": {"$gte": "py", "$lt": "py\uffff"}}, "sort": [("username", 1)], "collation": CASE_INSENSITIVE}),
+        ("SearchUtility.complete_in_db skill", "skills", {"query": {"name": {"$gte": "py", "$lt": "py\uffff"}}, "sort": [("name", 1)], "collation": CASE_INSENSITIVE}),
+        ("SkillUtility.lookup", "skills", {"query": {"key": "python"}}),
+        ("CommunityUtility.fill_missing_tech_stacks", "community_skills", {"query": {"community_id": {"$in": [some_id, ObjectId()]}}}),
+    ]
+
+
+def winning_stages(explain_output) -> list:
+    # Every stage name inside any winningPlan, however deeply the explain output nests it
+    stages = []
+
+    def walk(node, in_plan: bool):
+        if isinstance(node, dict):
+            if in_plan and "stage" in node:
+                stages.append(node["stage"])
+            for key, value in node.items():
+                walk(value, in_plan or key == "winningPlan")
+        elif isinstance(node, list):
+            for item in node:
+                walk(item, in_plan)
+
+    walk(explain_output, False)
+    return stages
+
+
+def check(db: MongoDB) -> bool:
+    ok = True
+    for name, collection, shape in query_shapes():
+        explain_output = db.explain(collection, **shape)
+        if explain_output is None:
+            print(f"ERROR     {name}: explain failed")
+            ok = False
+            continue
+
+        stages = winning_stages(explain_output)
+        if "COLLSCAN" in stages:
+            ok = False
+            print(f"COLLSCAN  {name} on {collection}: {' > '.join(stages)}")
+        else:
+            print(f"ok        {name} on {collection}: {' > '.join(stages) or 'no plan stages'}")
+    return ok
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Fail if any utility query shape needs a collection scan")
+    parser.add_argument("--apply", action="store_true", help="create the registry's indexes before checking")
+    args = parser.parse_args()
+
+    db = MongoDB()
+    if not db.connect():
+        raise SystemExit(1)
+
+    if args.apply:
+        db.apply_indexes(INDEXES)
+
+    passed = check(db)
+    db.close()
+    raise SystemExit(0 if passed else 1)
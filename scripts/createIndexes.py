@@ -0,0 +1,28 @@
+"""
+Create every index in utils/indexes.py.
+
+Usage:
+    python -m scripts.createIndexes
+
+Run once per deployment (and again whenever the registry changes) instead of
+at import time, so serverless cold starts never pay for index builds.
+Creating an index that already exists is a no-op. Exits with status 1 if any
+index could not be created.
+"""
+from utils.dbHandler import MongoDB
+from utils.indexes import INDEXES
+
+
+if __name__ == "__main__":
+    db = MongoDB()
+    if not db.connect():
+        raise SystemExit(1)
+
+    summary = db.apply_indexes(INDEXES)
+    for name in summary["applied"]:
+        print(f"ok      {name}")
+    for error in summary["errors"]:
+        print(f"FAILED  {error['collection']} {error['keys']}: {error['message']}")
+
+    db.close()
+    raise SystemExit(1 if summary["errors"] else 0)
@@ -0,0 +1,63 @@
+"""
+Export communities or users as NDJSON, one document per line.
+
+Usage:
+    python -m scripts.exportData communities [--joins] [--batch-size 1000] [--after <id>] [--output communities.ndjson]
+    python -m scripts.exportData users [--joins] [--batch-size 1000] [--after <id>] [--output users.ndjson]
+
+Produces the same lines as GET /community/export and GET /user/export, from
+the same utility generators: the cursor is walked in _id order one batch at a
+time, so memory stays flat whatever the collection size. --joins adds tech
+stacks to communities and skills to users. Writes to stdout unless --output
+is given; progress goes to stderr. An interrupted export can be resumed with
+--after set to the last exported id.
+"""
+import asyncio
+import sys
+from argparse import ArgumentParser
+from bson import ObjectId
+
+from utils.utility import UserUtility, CommunityUtility, asyncMongoDBHandler
+from utils.responses import ndjson_stream
+from utils.pagination import clamp_batch_size
+
+
+async def export(args) -> int:
+    if not await asyncMongoDBHandler.connect():
+        raise SystemExit(1)
+
+    after = ObjectId(args.after) if args.after else None
+    batch_size = clamp_batch_size(args.batch_size)
+    if args.kind == "communities":
+        batches = CommunityUtility().export_communities(with_tech_stack=args.joins, batch_size=batch_size, after=after)
+    else:
+        batches = UserUtility().export_users(with_skills=args.joins, batch_size=batch_size, after=after)
+
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    exported = 0
+    try:
+        async for chunk in ndjson_stream(batches):
+            output.write(chunk)
+            exported += chunk.count(b"\n")
+            print(f"{exported} {args.kind} exported", file=sys.stderr)
+    finally:
+        if args.output:
+            output.close()
+        else:
+            output.flush()
+        await asyncMongoDBHandler.close()
+    return exported
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Export communities or users as NDJSON")
+    parser.add_argument("kind", choices=["communities", "users"])
+    parser.add_argument("--joins", action="store_true", help="include tech stacks (communities) or skills (users)")
+    parser.add_argument("--batch-size", type=int, default=1000)
+    parser.add_argument("--after", help="resume after this _id")
+    parser.add_argument("--output", help="file to write instead of stdout")
+    args = parser.parse_args()
+
+    if args.after and not ObjectId.is_valid(args.after):
+        parser.error(f"{args.after} is not a valid id")
+    asyncio.run(export(args))
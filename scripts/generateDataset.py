@@ -0,0 +1,241 @@
+"""
+Generate a large synthetic dataset for scale testing.
+
+Usage:
+    python -m scripts.generateDataset [--users 1000000] [--communities 1000000] [--seed 1]
+                                      [--database saathi_scale] [--batch-size 5000] [--drop] [--indexes]
+
+Writes user, user_profiles, user_skills, user_projects, community and
+community_skills documents shaped like the models in schema/UserDb.py and
+schema/CommunityDb.py (community documents embed tech_stack and skill_ids,
+as save_community writes them), plus the skills catalog and its counter.
+Skill popularity follows a Zipf distribution over a catalog of real skill
+names followed by a long synthetic tail, and community creators are skewed
+towards a few very active users.
+
+Everything, ObjectIds included, is derived from --seed, so the same
+arguments always produce the same data. Documents are produced lazily and
+written with unordered insert_many in --batch-size batches, so memory stays
+flat whatever the size. Every user gets the same password hash, computed
+once: hashing millions of passwords with scrypt would dominate the run.
+--indexes applies utils/indexes.py after loading, which is faster than
+maintaining the indexes during the load.
+"""
+from argparse import ArgumentParser
+from datetime import datetime, timedelta, timezone
+from itertools import accumulate
+from time import perf_counter
+import random
+
+from bson import ObjectId
+
+from utils.dbHandler import MongoDB
+from utils.indexes import INDEXES
+from utils.passwords import PasswordHasher
+from utils.skillCatalog import canonical_key, display_name
+
+PASSWORD = "password123"
+COLLECTIONS = ["user", "user_profiles", "user_skills", "user_projects", "community", "community_skills", "skills", "counters"]
+POPULAR_SKILLS = [
+    "Python", "JavaScript", "React", "Node.js", "TypeScript", "Java", "SQL", "HTML", "CSS", "Git",
+    "Docker", "AWS", "MongoDB", "PostgreSQL", "FastAPI", "Django", "Flask", "Go", "Kubernetes", "C++",
+    "Next.js", "Vue.js", "Angular", "Express", "Redis", "GraphQL", "TensorFlow", "PyTorch", "Rust", "Kotlin",
+    "Swift", "Flutter", "Dart", "C#", ".NET", "Spring Boot", "Linux", "Azure", "GCP", "Terraform"
+]
+EXPERIENCE = ["beginner", "intermediate", "advanced", None]
+IST = timezone(timedelta(hours=5, minutes=30))
+
+
+class ZipfSampler:
+    """
+    Draw skills with probability proportional to 1 / rank ** exponent.
+
+    The cumulative weights are computed once, so each draw is a bisect
+    inside random.choices. A skill's id in the catalog is its rank.
+    """
+    def __init__(self, rng: random.Random, catalog_size: int, exponent: float):
+        tail = [f"skill-{rank}" for rank in range(len(POPULAR_SKILLS) + 1, catalog_size + 1)]
+        self.skills = [display_name(skill) for skill in (POPULAR_SKILLS + tail)[:catalog_size]]
+        self.ids = {skill: rank for rank, skill in enumerate(self.skills, start=1)}
+        self.cum_weights = list(accumulate(1 / rank ** exponent for rank in range(1, len(self.skills) + 1)))
+        self.rng = rng
+
+    def sample(self, low: int, high: int) -> list:
+        count = self.rng.randint(low, high)
+        drawn = self.rng.choices(self.skills, cum_weights=self.cum_weights, k=count)
+        # Duplicates collapse, so popular skills also make stacks a little shorter
+        return list(dict.fromkeys(drawn))
+
+    def catalog(self) -> list:
+        return [{"_id": skill_id, "key": canonical_key(skill), "name": skill} for skill, skill_id in self.ids.items()]
+
+
+class IdFactory:
+    # ObjectIds from a timestamp plus a seeded counter: deterministic and still time-ordered
+    def __init__(self, seed: int):
+        self.next_value = seed << 40
+
+    def make(self, when: datetime) -> ObjectId:
+        self.next_value += 1
+        return ObjectId(int(when.timestamp()).to_bytes(4, "big") + self.next_value.to_bytes(8, "big"))
+
+
+class BatchWriter:
+    def __init__(self, db: MongoDB, collection_name: str, batch_size: int):
+        self.db = db
+        self.collection_name = collection_name
+        self.batch_size = batch_size
+        self.batch = []
+        self.written = 0
+        self.failed = 0
+
+    def add(self, doc: dict):
+        self.batch.append(doc)
+        if len(self.batch) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        if not self.batch:
+            return
+        result = self.db.insert_many(self.collection_name, self.batch, ordered=False)
+        if result is None:
+            raise Exception(f"Writing {self.collection_name} failed after {self.written} documents")
+        self.written += len(result["inserted_ids"])
+        self.failed += len(result["errors"])
+        self.batch = []
+
+
+def generate_users(db: MongoDB, rng: random.Random, ids: IdFactory, skills: ZipfSampler, args, start: datetime):
+    password_hash = PasswordHasher().hash_sync(PASSWORD)
+    writers = {name: BatchWriter(db, name, args.batch_size) for name in ["user", "user_profiles", "user_skills", "user_projects"]}
+    span = timedelta(days=args.days).total_seconds()
+
+    for number in range(args.users):
+        registered = start + timedelta(seconds=span * number / max(args.users, 1))
+        username = f"user{number}"
+        user_id = ids.make(registered)
+        writers["user"].add({
+            "_id": user_id,
+            "username": username,
+            "name": f"User {number}",
+            "email": f"{username}@example.com",
+            "password": password_hash,
+            "role": "user",
+            "registeration_date_time": registered.astimezone(IST).strftime("%d %B %Y %I:%M %p IST")
+        })
+
+        if rng.random() >= args.profile_ratio:
+            continue
+        writers["user_profiles"].add({
+            "_id": ids.make(registered),
+            "user_id": user_id,
+            "bio": f"Hi, I am user {number}",
+            "linkedin_url": f"https://linkedin.com/in/{username}",
+            "github_url": f"https://github.com/{username}",
+            "portfolio_url": None,
+            "years_exp": min(int(rng.expovariate(1 / 4)), 40),
+            "version": str(ids.make(registered))
+        })
+        for skill in skills.sample(1, 8):
+            writers["user_skills"].add({"_id": ids.make(registered), "user_id": user_id, "skill": skill, "skill_id": skills.ids[skill]})
+        for project in range(rng.randint(0, 3)):
+            writers["user_projects"].add({
+                "_id": ids.make(registered),
+                "user_id": user_id,
+                "title": f"Project {project}",
+                "link": f"https://github.com/{username}/project-{project}"
+            })
+
+        if (number + 1) % 100000 == 0:
+            print(f"  {number + 1} users")
+
+    for writer in writers.values():
+        writer.flush()
+    return writers
+
+
+def generate_communities(db: MongoDB, rng: random.Random, ids: IdFactory, skills: ZipfSampler, args, start: datetime):
+    writers = {name: BatchWriter(db, name, args.batch_size) for name in ["community", "community_skills"]}
+    span = timedelta(days=args.days).total_seconds()
+
+    for number in range(args.communities):
+        registered = start + timedelta(seconds=span * number / max(args.communities, 1))
+        community_id = ids.make(registered)
+        # Cubing a uniform draw skews creators towards the first (most active) users
+        creator = int(args.users * rng.random() ** 3)
+        tech_stack = skills.sample(1, 6)
+        writers["community"].add({
+            "_id": community_id,
+            "creator_username": f"user{creator}",
+            "name": f"Community {number}",
+            "experience": rng.choice(EXPERIENCE),
+            "tech_stack": tech_stack,
+            "skill_ids": [skills.ids[skill] for skill in tech_stack],
+            "registeration_date_time": registered
+        })
+        for skill in tech_stack:
+            writers["community_skills"].add({
+                "_id": ids.make(registered),
+                "community_id": community_id,
+                "skill": skill,
+                "skill_id": skills.ids[skill]
+            })
+
+        if (number + 1) % 100000 == 0:
+            print(f"  {number + 1} communities")
+
+    for writer in writers.values():
+        writer.flush()
+    return writers
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Generate a large deterministic dataset for scale testing")
+    parser.add_argument("--users", type=int, default=1000000)
+    parser.add_argument("--communities", type=int, default=1000000)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--database", default="saathi_scale", help="target database, kept apart from the live one by default")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--skills", type=int, default=2000, help="size of the skill catalog")
+    parser.add_argument("--zipf", type=float, default=1.1, help="Zipf exponent of skill popularity")
+    parser.add_argument("--profile-ratio", type=float, default=0.6, help="share of users with a profile")
+    parser.add_argument("--days", type=int, default=730, help="registration dates are spread over this many days")
+    parser.add_argument("--drop", action="store_true", help="drop the generated collections first")
+    parser.add_argument("--indexes", action="store_true", help="apply utils/indexes.py after loading")
+    args = parser.parse_args()
+
+    db = MongoDB()
+    if not db.connect(args.database):
+        raise SystemExit(1)
+
+    if args.drop:
+        for name in COLLECTIONS:
+            db.database.drop_collection(name)
+
+    rng = random.Random(args.seed)
+    ids = IdFactory(args.seed)
+    skills = ZipfSampler(rng, args.skills, args.zipf)
+    start = datetime(2023, 1, 1, tzinfo=timezone.utc)
+
+    began = perf_counter()
+    writers = {"skills": BatchWriter(db, "skills", args.batch_size), "counters": BatchWriter(db, "counters", args.batch_size)}
+    for skill in skills.catalog():
+        writers["skills"].add(skill)
+    writers["skills"].flush()
+    # Skills interned by the app afterwards continue from the end of the generated catalog
+    writers["counters"].add({"_id": "skills", "seq": len(skills.ids)})
+    writers["counters"].flush()
+    print(f"Generating {args.users} users into {args.database}")
+    writers.update(generate_users(db, rng, ids, skills, args, start))
+    print(f"Generating {args.communities} communities into {args.database}")
+    writers.update(generate_communities(db, rng, ids, skills, args, start))
+    elapsed = perf_counter() - began
+
+    total = sum(writer.written for writer in writers.values())
+    for name, writer in writers.items():
+        print(f"{name:18} {writer.written:>10} written {writer.failed:>6} failed")
+    print(f"{total} documents in {elapsed:.1f}s ({total / elapsed:,.0f} docs/s)")
+
+    if args.indexes:
+        db.apply_indexes(INDEXES)
+    db.close()
@@ -0,0 +1,180 @@
+"""
+Intern every stored skill into the skill catalog and backfill skill ids.
+
+Usage:
+    python -m scripts.migrateSkillIds [--batch-size 500]
+
+Every distinct skill name in community, community_skills and user_skills is
+canonicalised (utils/skillCatalog.py) and given a catalog entry and id the
+same way SkillUtility.intern does. Then community documents get skill_ids
+plus their tech_stack rewritten to canonical names, and community_skills /
+user_skills rows get skill_id plus the canonical skill name. Users whose
+skill names change get a new user_profiles version, so profile ETags
+issued before the rewrite stop matching. Run scripts/migrateTechStack.py
+first: communities without an embedded tech_stack are skipped.
+
+The migration is online and resumable. Only documents still missing their
+ids are read, in _id order, and each batch is one unordered bulk_write
+guarded by the same $exists check, so documents written by the current
+save paths are never touched and an interrupted run simply continues.
+"""
+from argparse import ArgumentParser
+from bson import ObjectId
+from pymongo import ReturnDocument, UpdateOne
+from pymongo.errors import DuplicateKeyError
+
+from utils.dbHandler import MongoDB
+from utils.skillCatalog import SkillCatalog, canonical_key, display_name
+from schema.SkillDb import SkillData
+
+MIGRATION_ID = "skill_ids"
+
+
+def load_catalog(db: MongoDB) -> SkillCatalog:
+    catalog = SkillCatalog()
+    catalog.load(db.database["skills"].find({}))
+    return catalog
+
+
+def create_skill(db: MongoDB, catalog: SkillCatalog, key: str, name: str) -> int:
+    counter = db.database["counters"].find_one_and_update(
+        {"_id": "skills"},
+        {"$inc": {"seq": 1}},
+        upsert=True,
+        return_document=ReturnDocument.AFTER
+    )
+    skill = SkillData(id=counter["seq"], key=key, name=display_name(name, key))
+    try:
+        db.database["skills"].insert_one(skill.model_dump(by_alias=True))
+    except DuplicateKeyError:
+        # Interned by the running app meanwhile
+        existing = db.find_one("skills", {"key": key})
+        catalog.remember(existing["_id"], existing["key"], existing["name"])
+        return existing["_id"]
+    catalog.remember(skill.id, skill.key, skill.name)
+    return skill.id
+
+
+def intern_stored_skills(db: MongoDB, catalog: SkillCatalog) -> int:
+    names = set(db.database["community"].distinct("tech_stack"))
+    names.update(db.database["community_skills"].distinct("skill"))
+    names.update(db.database["user_skills"].distinct("skill"))
+
+    created = 0
+    for name in sorted(names):
+        key = canonical_key(name)
+        if key and catalog.ids.get(key) is None:
+            create_skill(db, catalog, key, name)
+            created += 1
+    return created
+
+
+def canonical_skills(catalog: SkillCatalog, names: list) -> list:
+    # (skill id, canonical name) per distinct skill, in stored order, like SkillUtility.intern
+    interned = {}
+    for name in names:
+        key = canonical_key(name)
+        if key and key not in interned:
+            interned[key] = catalog.ids[key]
+    return [(skill_id, catalog.name_of(skill_id)) for skill_id in interned.values()]
+
+
+def backfill(db: MongoDB, collection_name: str, field: str, projection: dict, build_update, batch_size: int, after_batch=None) -> int:
+    """
+    Walk the documents still missing field in _id order and update them in batches
+
+    Args:
+        build_update: document -> $set fields, or None to leave the document alone
+        after_batch: called with the (document, $set fields) pairs of each batch once
+            it is written, before moving on, so a rerun never skips its follow-up
+    """
+    last_id = None
+    total = 0
+
+    while True:
+        query = {field: {"$exists": False}}
+        if last_id:
+            query["_id"] = {"$gt": last_id}
+        batch = list(db.database[collection_name].find(query, projection).sort("_id", 1).limit(batch_size))
+        if not batch:
+            break
+
+        operations = []
+        updated = []
+        for doc in batch:
+            update = build_update(doc)
+            if update is not None:
+                # The $exists guard keeps documents written by the new save paths from being overwritten
+                operations.append(UpdateOne({"_id": doc["_id"], field: {"$exists": False}}, {"$set": update}))
+                updated.append((doc, update))
+        if operations:
+            result = db.bulk_write(collection_name, operations, ordered=False)
+            if result is None or result["errors"]:
+                raise Exception(f"Backfilling {collection_name} failed after {last_id}, rerun to resume")
+            total += result["modified_count"]
+            if after_batch is not None:
+                after_batch(updated)
+
+        last_id = batch[-1]["_id"]
+        print(f"{collection_name}: backfilled up to {last_id} ({total} updated)")
+    return total
+
+
+def migrate(db: MongoDB, batch_size: int = 500) -> dict:
+    catalog = load_catalog(db)
+    created = intern_stored_skills(db, catalog)
+    print(f"Skill catalog: {created} skills created, {len(catalog)} in total")
+
+    def community_update(comm: dict):
+        if "tech_stack" not in comm:
+            return None
+        skills = canonical_skills(catalog, comm["tech_stack"])
+        return {"tech_stack": [skill for _, skill in skills], "skill_ids": [skill_id for skill_id, _ in skills]}
+
+    def row_update(row: dict):
+        skill_id = catalog.resolve(row["skill"])
+        if skill_id is None:
+            # Blank names have no canonical key
+            return None
+        return {"skill": catalog.name_of(skill_id), "skill_id": skill_id}
+
+    def bump_profile_versions(updated: list):
+        # Profiles return skill names only, so a row whose name is already canonical changes nothing
+        user_ids = {row["user_id"] for row, update in updated if update["skill"] != row["skill"]}
+        if not user_ids:
+            return
+        # A new stamp per profile, as UserUtility.new_profile_version does on every write
+        operations = [UpdateOne({"user_id": user_id}, {"$set": {"version": str(ObjectId())}}) for user_id in user_ids]
+        result = db.bulk_write("user_profiles", operations, ordered=False)
+        if result is None or result["errors"]:
+            raise Exception("Bumping user_profiles versions failed, their skill rows are already rewritten")
+
+    counts = {
+        "community": backfill(db, "community", "skill_ids", {"tech_stack": 1}, community_update, batch_size),
+        "community_skills": backfill(db, "community_skills", "skill_id", {"skill": 1}, row_update, batch_size),
+        "user_skills": backfill(db, "user_skills", "skill_id", {"user_id": 1, "skill": 1}, row_update, batch_size, bump_profile_versions),
+    }
+    db.database["migrations"].update_one(
+        {"_id": MIGRATION_ID},
+        {"$set": {"done": True, "skills": len(catalog)}, "$inc": counts},
+        upsert=True
+    )
+    return counts
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Intern stored skills and backfill skill ids")
+    parser.add_argument("--batch-size", type=int, default=500)
+    args = parser.parse_args()
+
+    db = MongoDB()
+    if not db.connect():
+        raise SystemExit(1)
+
+    # Interning relies on the unique key to settle races with the running app
+    db.database["skills"].create_index("key", unique=True)
+    counts = migrate(db, batch_size=args.batch_size)
+    for name, count in counts.items():
+        print(f"{name:18} {count:>10} updated")
+    print(f"Migration {MIGRATION_ID} complete")
+    db.close()
@@ -0,0 +1,88 @@
+"""
+Backfill the embedded tech_stack array on community documents from community_skills.
+
+Usage:
+    python -m scripts.migrateTechStack [--batch-size 500] [--restart]
+
+The migration is online and resumable. Communities are walked in _id order,
+each batch is written with one unordered bulk_write and the last processed
+_id is checkpointed in the migrations collection, so an interrupted run picks
+up where it stopped. Documents that already carry tech_stack (everything
+written by the current save_community) are never touched.
+"""
+from argparse import ArgumentParser
+from pymongo import UpdateOne
+
+from utils.dbHandler import MongoDB
+
+MIGRATION_ID = "embed_tech_stack"
+
+
+def load_checkpoint(db: MongoDB):
+    checkpoint = db.find_one("migrations", {"_id": MIGRATION_ID})
+    return checkpoint.get("last_id") if checkpoint else None
+
+
+def save_checkpoint(db: MongoDB, last_id, migrated: int, done: bool = False):
+    db.database["migrations"].update_one(
+        {"_id": MIGRATION_ID},
+        {"$set": {"last_id": last_id, "done": done}, "$inc": {"migrated": migrated}},
+        upsert=True
+    )
+
+
+def migrate(db: MongoDB, batch_size: int = 500, restart: bool = False) -> int:
+    last_id = None if restart else load_checkpoint(db)
+    total = 0
+
+    while True:
+        query = {"_id": {"$gt": last_id}} if last_id else {}
+        batch = list(
+            db.database["community"]
+            .find(query, {"_id": 1, "tech_stack": 1})
+            .sort("_id", 1)
+            .limit(batch_size)
+        )
+        if not batch:
+            break
+
+        pending = [comm["_id"] for comm in batch if "tech_stack" not in comm]
+        if pending:
+            tech_stacks = {community_id: [] for community_id in pending}
+            for tech_stack in db.find("community_skills", {"community_id": {"$in": pending}}, {"_id": 0, "community_id": 1, "skill": 1}):
+                tech_stacks[tech_stack["community_id"]].append(tech_stack["skill"])
+
+            # The $exists guard keeps a concurrent save_community from being overwritten
+            operations = [
+                UpdateOne(
+                    {"_id": community_id, "tech_stack": {"$exists": False}},
+                    {"$set": {"tech_stack": skills}}
+                )
+                for community_id, skills in tech_stacks.items()
+            ]
+            result = db.bulk_write("community", operations, ordered=False)
+            if result is None or result["errors"]:
+                raise Exception(f"Backfill failed after {last_id}, rerun to resume")
+            total += result["modified_count"]
+
+        last_id = batch[-1]["_id"]
+        save_checkpoint(db, last_id, len(pending))
+        print(f"Backfilled up to {last_id} ({total} communities updated)")
+
+    save_checkpoint(db, last_id, 0, done=True)
+    return total
+
+
+if __name__ == "__main__":
+    parser = ArgumentParser(description="Embed tech_stack on community documents")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--restart", action="store_true", help="ignore the saved checkpoint and start from the first community")
+    args = parser.parse_args()
+
+    db = MongoDB()
+    if not db.connect():
+        raise SystemExit(1)
+
+    migrated = migrate(db, batch_size=args.batch_size, restart=args.restart)
+    print(f"Migration {MIGRATION_ID} complete: {migrated} communities updated")
+    db.close()
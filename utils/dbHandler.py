@@ -1,33 +1,232 @@
 from pymongo.mongo_client import MongoClient
+from pymongo.asynchronous.mongo_client import AsyncMongoClient
 from pymongo.server_api import ServerApi
-from pymongo.errors import ConnectionFailure
+from pymongo.errors import ConnectionFailure, BulkWriteError
 from os import environ
 from dotenv import load_dotenv; load_dotenv()
-from typing import Optional
+from typing import AsyncIterator, List, Optional
+from urllib.parse import urlsplit, parse_qsl
 from icecream import ic
 from bson import ObjectId
 
-class MongoDB:
-    def __init__(self):
-        try:
-            password = environ.get("MONGODB_PASSWORD")
-            user = environ.get("MONGODB_USER")
-            cluster = environ.get("MONGODB_CLUSTER")
+from utils.poolStats import PoolStats
+from utils.metrics import commandMetrics
 
-            if not all([password, user, cluster]):
-                raise ValueError("Missing environment variables")
-            self.uri = f"mongodb+srv://{user}:{password}@{cluster}.mongodb.net/?retryWrites=true&w=majority"
+# Live pool counters for every client built here, served by GET /ready
+poolStats = PoolStats()
+# One client per (driver, uri) for the whole process, so every handler and every
+# warm serverless invocation reuses the same pool instead of opening a new one
+shared_clients = {}
 
-        except ValueError as e:
-            self.client = None
-            print(e)
+# environment variable -> (client option, default)
+POOL_SETTINGS = {
+    "MONGODB_MAX_POOL_SIZE": ("maxPoolSize", 100),
+    "MONGODB_MIN_POOL_SIZE": ("minPoolSize", 0),
+    "MONGODB_MAX_IDLE_TIME_MS": ("maxIdleTimeMS", 60000),
+    "MONGODB_WAIT_QUEUE_TIMEOUT_MS": ("waitQueueTimeoutMS", 5000),
+    "MONGODB_SERVER_SELECTION_TIMEOUT_MS": ("serverSelectionTimeoutMS", 5000),
+    "MONGODB_CONNECT_TIMEOUT_MS": ("connectTimeoutMS", 10000),
+}
+
+def get_mongo_uri() -> Optional[str]:
+    """
+    Build the MongoDB connection string from the environment.
+
+    MONGODB_URI takes precedence so a local mongod (or any other deployment)
+    can be targeted directly; otherwise the Atlas SRV string is assembled
+    from MONGODB_USER, MONGODB_PASSWORD and MONGODB_CLUSTER.
+
+    Returns:
+        Optional[str]: connection string, None when the environment is incomplete
+    """
+    try:
+        uri = environ.get("MONGODB_URI")
+        if uri:
+            return uri
+
+        password = environ.get("MONGODB_PASSWORD")
+        user = environ.get("MONGODB_USER")
+        cluster = environ.get("MONGODB_CLUSTER")
+
+        if not all([password, user, cluster]):
+            raise ValueError("Missing environment variables")
+        return f"mongodb+srv://{user}:{password}@{cluster}.mongodb.net/?retryWrites=true&w=majority"
+
+    except ValueError as e:
+        print(e)
+        return None
+
+
+def pool_options(uri: Optional[str] = None) -> dict:
+    """
+    Connection pool settings for MongoClient/AsyncMongoClient.
+
+    Each setting comes from its environment variable (see POOL_SETTINGS) or
+    falls back to the default. An option already present in the connection
+    string is left out, so the URI keeps the last word.
+
+    Args:
+        uri (Optional[str]): connection string the client will be built with
+
+    Returns:
+        dict: client keyword arguments
+    """
+    in_uri = {key.lower() for key, _ in parse_qsl(urlsplit(uri).query)} if uri else set()
+    return {
+        option: int(environ.get(variable, default))
+        for variable, (option, default) in POOL_SETTINGS.items()
+        if option.lower() not in in_uri
+    }
+
+
+def shared_client(client_class, uri: str):
+    # Build the client on first request only; constructing it does no network I/O
+    key = (client_class.__name__, uri)
+    if key not in shared_clients:
+        shared_clients[key] = client_class(
+            uri,
+            server_api=ServerApi('1'),
+            event_listeners=[poolStats, commandMetrics],
+            **pool_options(uri)
+        )
+    return shared_clients[key]
+
+
+def release_client(client):
+    # Forget a closed client so the next shared_client call builds a fresh one
+    for key, shared in list(shared_clients.items()):
+        if shared is client:
+            del shared_clients[key]
+
+
+def to_document(doc) -> dict:
+    # Accept pydantic models as well as plain dicts
+    return doc.model_dump() if hasattr(doc, "model_dump") else dict(doc)
+
+
+def write_errors(details: dict) -> list:
+    # Per-operation failures reported by the server for a bulk operation
+    return [
+        {
+            "index": error.get("index"),
+            "code": error.get("code"),
+            "message": error.get("errmsg")
+        }
+        for error in details.get("writeErrors", [])
+    ]
+
+
+def insert_many_summary(docs: list, ordered: bool, details: dict = None) -> dict:
+    """
+    Summarise an insert_many call, including partial failures.
+
+    pymongo assigns an _id to every document before sending the batch, so the
+    ids of the documents that made it in can be read back from the inputs.
+    An ordered batch stops at the first failure; an unordered one skips only
+    the failing documents.
+    """
+    errors = write_errors(details or {})
+    failed = {error["index"] for error in errors}
+    if ordered and failed:
+        inserted = docs[:min(failed)]
+    else:
+        inserted = [doc for index, doc in enumerate(docs) if index not in failed]
+
+    return {
+        "acknowledged": True,
+        "inserted_ids": [doc["_id"] for doc in inserted],
+        "errors": errors
+    }
+
+
+def bulk_write_summary(result=None, details: dict = None) -> dict:
+    # Normalise a BulkWriteResult, or the details of a BulkWriteError, into one shape
+    if details is not None:
+        return {
+            "acknowledged": True,
+            "inserted_count": details.get("nInserted", 0),
+            "matched_count": details.get("nMatched", 0),
+            "modified_count": details.get("nModified", 0),
+            "deleted_count": details.get("nRemoved", 0),
+            "upserted_count": details.get("nUpserted", 0),
+            "errors": write_errors(details)
+        }
+
+    return {
+        "acknowledged": result.acknowledged,
+        "inserted_count": result.inserted_count,
+        "matched_count": result.matched_count,
+        "modified_count": result.modified_count,
+        "deleted_count": result.deleted_count,
+        "upserted_count": result.upserted_count,
+        "errors": []
+    }
+
+
+def seek_query(query: dict, sort_field, after: tuple) -> dict:
+    """
+    Restrict query to documents strictly after a keyset position.
+
+    Args:
+        query (dict): base filter
+        sort_field: field (or list of fields) sorted in descending order, ties broken by _id
+        after (tuple): values of the sort fields followed by the _id of the last document seen
+
+    Returns:
+        dict: filter matching only the documents that follow the position
+    """
+    fields = [sort_field] if isinstance(sort_field, str) else list(sort_field)
+    fields.append("_id")
+
+    # (a, b, _id) < (x, y, z)  <=>  a < x  or  (a == x and b < y)  or  (a == x and b == y and _id < z)
+    branches = []
+    for position, field in enumerate(fields):
+        branch = {fields[i]: after[i] for i in range(position)}
+        branch[field] = {"$lt": after[position]}
+        branches.append(branch)
+
+    seek = {"$or": branches}
+    return {"$and": [query, seek]} if query else seek
+
+
+def explain_command(collection_name: str, query: dict = None, sort: list = None, pipeline: list = None, collation: dict = None) -> dict:
+    # The command to explain: a find (query/sort) or an aggregation (pipeline)
+    if pipeline is not None:
+        command = {"aggregate": collection_name, "pipeline": pipeline, "cursor": {}}
+    else:
+        command = {"find": collection_name, "filter": query or {}}
+        if sort:
+            command["sort"] = dict(sort)
+    if collation:
+        command["collation"] = collation
+    return command
+
+
+def record_index(summary: dict, spec, name: Optional[str] = None, error: Optional[Exception] = None):
+    # One create_index outcome into an apply_indexes summary
+    if error is None:
+        summary["applied"].append(f"{spec.collection}.{name}")
+        return
+    summary["errors"].append({"collection": spec.collection, "keys": spec.keys, "message": str(error)})
+    print(f"Error creating index on {spec.collection} {spec.keys}: {error}")
+
+
+def report_indexes(summary: dict) -> dict:
+    print(f"Indexes applied: {len(summary['applied'])}, failed: {len(summary['errors'])}")
+    return summary
+
+
+class MongoDB:
+    def __init__(self):
+        self.client = None
+        self.uri = get_mongo_uri()
 
     def connect(self, database_name:str = "saathi") -> bool:
         try:
             if not self.uri:
                 raise Exception("MongoDB connection failed")
 
-            self.client = MongoClient(self.uri, server_api=ServerApi('1'))
+            self.client = shared_client(MongoClient, self.uri)
             self.database = self.client[database_name]
 
             # Test connection
@@ -50,6 +249,40 @@ class MongoDB:
         except Exception as e:
             print(f"Error creating index: {e}")
 
+    def apply_indexes(self, specs: list) -> dict:
+        """
+        Create every index in a declarative registry (see utils/indexes.py)
+
+        Creating an index that already exists with the same keys and options is a
+        no-op, so this is safe to run repeatedly. Each index is created on its own,
+        so one conflict (e.g. duplicates blocking a unique index) does not stop the rest.
+
+        Args:
+            specs (list): IndexSpec entries
+
+        Returns:
+            dict: {"applied": [index names], "errors": [{"collection", "keys", "message"}]}
+        """
+        summary = {"applied": [], "errors": []}
+        for spec in specs:
+            try:
+                name = self.database[spec.collection].create_index(spec.keys, **spec.options())
+                record_index(summary, spec, name)
+            except Exception as e:
+                record_index(summary, spec, error=e)
+        return report_indexes(summary)
+
+    def explain(self, collection_name: str, query: dict = None, sort: list = None, pipeline: list = None, collation: dict = None) -> Optional[dict]|None:
+        """
+        Query planner output for a find (query/sort) or an aggregation (pipeline)
+        """
+        try:
+            command = explain_command(collection_name, query, sort, pipeline, collation)
+            return self.database.command("explain", command, verbosity="queryPlanner")
+        except Exception as e:
+            print(f"Error explaining query on {collection_name}: {e}")
+            return None
+
     def aggregate(self, collection_name: str, pipeline: list) -> Optional[list]|None:
         # to execute an agregation on a collection
         try:
@@ -71,19 +304,93 @@ class MongoDB:
             print(e)
             return None
     
-    def find(self, collection_name, query):
-        cursor = self.database[collection_name].find(query)
+    def insert_many(self, collection_name: str, docs: list, ordered: bool = True) -> Optional[dict]|None:
+        """
+        Insert a batch of documents in a single round trip
+
+        Args:
+            collection_name (str): target collection
+            docs (list): pydantic models or plain dicts
+            ordered (bool): stop at the first failing document when True, attempt every document when False
+
+        Returns:
+            Optional[dict]|None: {"acknowledged", "inserted_ids", "errors"}; errors holds the index, code and message of each failed document
+        """
+        docs = [to_document(doc) for doc in docs]
+        if not docs:
+            return insert_many_summary(docs, ordered)
+
+        try:
+            self.database[collection_name].insert_many(docs, ordered=ordered)
+            return insert_many_summary(docs, ordered)
+        except BulkWriteError as e:
+            summary = insert_many_summary(docs, ordered, e.details)
+            print(f"Partial failure inserting into {collection_name}: {summary['errors']}")
+            return summary
+        except Exception as e:
+            print("Exception while inserting data in mongo db\nException in utils/dbHandler.py insert_many function")
+            print(e)
+            return None
+
+    def bulk_write(self, collection_name: str, operations: list, ordered: bool = True) -> Optional[dict]|None:
+        """
+        Run a batch of write operations (InsertOne, UpdateOne, DeleteMany, ...) in a single round trip
+
+        Args:
+            collection_name (str): target collection
+            operations (list): pymongo write operations
+            ordered (bool): stop at the first failing operation when True, attempt every operation when False
+
+        Returns:
+            Optional[dict]|None: inserted/matched/modified/deleted/upserted counts plus per-operation errors
+        """
+        if not operations:
+            return bulk_write_summary(details={})
+
+        try:
+            result = self.database[collection_name].bulk_write(operations, ordered=ordered)
+            return bulk_write_summary(result)
+        except BulkWriteError as e:
+            summary = bulk_write_summary(details=e.details)
+            print(f"Partial failure writing to {collection_name}: {summary['errors']}")
+            return summary
+        except Exception as e:
+            print("Exception while writing data in mongo db\nException in utils/dbHandler.py bulk_write function")
+            print(e)
+            return None
+    
+    def find(self, collection_name, query, projection: dict = None):
+        cursor = self.database[collection_name].find(query, projection)
         return list(cursor)
     
-    def find_one(self, collection_name, query):
-        return self.database[collection_name].find_one(query)
+    def find_one(self, collection_name, query, projection: dict = None):
+        return self.database[collection_name].find_one(query, projection)
     
-    def find_with_sort(self, collection_name: str, query: dict = {}, sort_field: str = None, skip: int = None, limit: int = None):
+    def find_with_sort(self, collection_name: str, query: dict = {}, sort_field: str = None, skip: int = None, limit: int = None, after: tuple = None, projection: dict = None):
+        """
+        Find documents newest first, optionally resuming after a keyset position
+
+        Args:
+            collection_name (str): collection to read
+            query (dict): filter
+            sort_field (str): field to sort on in descending order, ties broken by _id
+            skip (int): documents to skip (offset pagination)
+            limit (int): maximum number of documents
+            after (tuple): (sort value, _id) of the last document already seen; seeks
+                straight to the next one through the index instead of skipping
+            projection (dict): fields to return, everything when None; keep sort_field for keyset paging
+
+        Returns:
+            list: matching documents, None on error
+        """
         try:
-            cursor = self.database[collection_name].find(query)
+            if sort_field and after:
+                query = seek_query(query, sort_field, after)
+
+            cursor = self.database[collection_name].find(query, projection)
             if sort_field:
                 # Sort in descending order
-                cursor = cursor.sort(sort_field, -1)
+                cursor = cursor.sort([(sort_field, -1), ("_id", -1)])
             
             if skip:
                 # for pagination
@@ -99,7 +406,7 @@ class MongoDB:
     def update(self, collection_name, query, data):
         try:
             # Update the document with the new data
-            self.database[collection_name].update_one(query, {"$set": data})
+            self.database[collection_name].update_one(query, {"$set": to_document(data)})
             ic("Document updated successfully!")
             return True
         except Exception as e:
@@ -116,9 +423,287 @@ class MongoDB:
             return False
     
     def close(self):
+        release_client(self.client)
         self.client.close()
 
 
+class AsyncMongoDB:
+    """
+    asyncio counterpart of MongoDB with the same method surface.
+
+    Built on pymongo's native AsyncMongoClient so awaiting a query yields the
+    event loop instead of blocking the worker. A pre-built client (for example
+    an in-process stand-in) can be handed to the constructor or to connect().
+
+    Nothing is dialled up front: the client is created the first time the
+    database is used, and AsyncMongoClient only connects when that first
+    operation runs, so a cold start does not wait on MongoDB.
+    """
+    def __init__(self, client: Optional[AsyncMongoClient] = None, database_name: str = "saathi"):
+        self.client = client
+        self.database_name = database_name
+        self.db = None
+        self.uri = get_mongo_uri()
+
+    @property
+    def database(self):
+        if self.db is None:
+            self.open()
+        return self.db
+
+    def open(self, database_name: Optional[str] = None, client: Optional[AsyncMongoClient] = None):
+        # Create the client without any network round trip
+        if client is not None:
+            self.client = client
+        if database_name:
+            self.database_name = database_name
+
+        if self.client is None:
+            if not self.uri:
+                raise Exception("MongoDB connection failed")
+            self.client = shared_client(AsyncMongoClient, self.uri)
+
+        self.db = self.client[self.database_name]
+        return self.db
+
+    async def connect(self, database_name: str = "saathi", client: Optional[AsyncMongoClient] = None) -> bool:
+        try:
+            self.open(database_name, client)
+
+            # Test connection
+            await self.client.admin.command('ping')
+            print("Connected to MongoDB (async) successfully!")
+            return True
+
+        except ConnectionFailure as e:
+            print(f"MongoDB connection failed: {e}")
+            return False
+
+        except Exception as e:
+            print(e)
+            return False
+
+    async def ping(self) -> bool:
+        # Round trip to the server, used by the readiness check
+        try:
+            await self.database.command('ping')
+            return True
+        except Exception as e:
+            print(f"MongoDB ping failed: {e}")
+            return False
+
+    async def create_index(self, collection_name: str, field_name: str, index_type: int = 1):
+        try:
+            await self.database[collection_name].create_index([(field_name, index_type)])
+            print(f"Index created on {collection_name}.{field_name}")
+        except Exception as e:
+            print(f"Error creating index: {e}")
+
+    async def apply_indexes(self, specs: list) -> dict:
+        # See MongoDB.apply_indexes
+        summary = {"applied": [], "errors": []}
+        for spec in specs:
+            try:
+                name = await self.database[spec.collection].create_index(spec.keys, **spec.options())
+                record_index(summary, spec, name)
+            except Exception as e:
+                record_index(summary, spec, error=e)
+        return report_indexes(summary)
+
+    async def explain(self, collection_name: str, query: dict = None, sort: list = None, pipeline: list = None, collation: dict = None) -> Optional[dict]|None:
+        """
+        Query planner output for a find (query/sort) or an aggregation (pipeline)
+        """
+        try:
+            command = explain_command(collection_name, query, sort, pipeline, collation)
+            return await self.database.command("explain", command, verbosity="queryPlanner")
+        except Exception as e:
+            print(f"Error explaining query on {collection_name}: {e}")
+            return None
+
+    async def aggregate(self, collection_name: str, pipeline: list) -> Optional[list]|None:
+        # to execute an agregation on a collection
+        try:
+            cursor = await self.database[collection_name].aggregate(pipeline)
+            return await cursor.to_list()
+        except Exception as e:
+            print(f"Error in aggregation: {e}")
+            return None
+
+    async def insert(self, collection_name, doc) -> Optional[ObjectId]|None:
+        try:
+            doc_dict = doc.model_dump()
+            result = await self.database[collection_name].insert_one(doc_dict)
+            if result.acknowledged:
+                ic(result.inserted_id)
+                return result.inserted_id  # Returns the ObjectId
+            return None
+        except Exception as e:
+            print("Exception while inserting data in mongo db\nException in utils/dbHandler.py AsyncMongoDB.insert function")
+            print(e)
+            return None
+
+    async def insert_many(self, collection_name: str, docs: list, ordered: bool = True) -> Optional[dict]|None:
+        """
+        Insert a batch of documents in a single round trip
+
+        Args:
+            collection_name (str): target collection
+            docs (list): pydantic models or plain dicts
+            ordered (bool): stop at the first failing document when True, attempt every document when False
+
+        Returns:
+            Optional[dict]|None: {"acknowledged", "inserted_ids", "errors"}; errors holds the index, code and message of each failed document
+        """
+        docs = [to_document(doc) for doc in docs]
+        if not docs:
+            return insert_many_summary(docs, ordered)
+
+        try:
+            await self.database[collection_name].insert_many(docs, ordered=ordered)
+            return insert_many_summary(docs, ordered)
+        except BulkWriteError as e:
+            summary = insert_many_summary(docs, ordered, e.details)
+            print(f"Partial failure inserting into {collection_name}: {summary['errors']}")
+            return summary
+        except Exception as e:
+            print("Exception while inserting data in mongo db\nException in utils/dbHandler.py AsyncMongoDB.insert_many function")
+            print(e)
+            return None
+
+    async def bulk_write(self, collection_name: str, operations: list, ordered: bool = True) -> Optional[dict]|None:
+        """
+        Run a batch of write operations (InsertOne, UpdateOne, DeleteMany, ...) in a single round trip
+
+        Args:
+            collection_name (str): target collection
+            operations (list): pymongo write operations
+            ordered (bool): stop at the first failing operation when True, attempt every operation when False
+
+        Returns:
+            Optional[dict]|None: inserted/matched/modified/deleted/upserted counts plus per-operation errors
+        """
+        if not operations:
+            return bulk_write_summary(details={})
+
+        try:
+            result = await self.database[collection_name].bulk_write(operations, ordered=ordered)
+            return bulk_write_summary(result)
+        except BulkWriteError as e:
+            summary = bulk_write_summary(details=e.details)
+            print(f"Partial failure writing to {collection_name}: {summary['errors']}")
+            return summary
+        except Exception as e:
+            print("Exception while writing data in mongo db\nException in utils/dbHandler.py AsyncMongoDB.bulk_write function")
+            print(e)
+            return None
+
+    async def find(self, collection_name, query, projection: dict = None):
+        cursor = self.database[collection_name].find(query, projection)
+        return await cursor.to_list()
+
+    async def find_one(self, collection_name, query, projection: dict = None):
+        return await self.database[collection_name].find_one(query, projection)
+
+    async def stream_batches(self, collection_name: str, query: dict = None, projection: dict = None, batch_size: int = 1000, after: ObjectId = None) -> AsyncIterator[List[dict]]:
+        """
+        Walk a collection in _id order, batch_size documents at a time
+
+        Unlike find, nothing is materialised beyond the batch in hand, and the
+        cursor fetches exactly one batch per getMore, so memory stays flat
+        whatever the collection size.
+
+        Args:
+            collection_name (str): collection to read
+            query (dict): filter
+            projection (dict): fields to return
+            batch_size (int): documents per batch and per round trip
+            after (ObjectId): resume after this _id
+
+        Yields:
+            List[dict]: the next batch of documents
+        """
+        query = dict(query or {})
+        if after is not None:
+            query["_id"] = {"$gt": after}
+        cursor = self.database[collection_name].find(query, projection).sort("_id", 1).batch_size(batch_size)
+        try:
+            batch = []
+            async for doc in cursor:
+                batch.append(doc)
+                if len(batch) == batch_size:
+                    yield batch
+                    batch = []
+            if batch:
+                yield batch
+        finally:
+            # The consumer may stop early (client disconnected); free the server-side cursor
+            await cursor.close()
+
+    async def find_with_sort(self, collection_name: str, query: dict = {}, sort_field: str = None, skip: int = None, limit: int = None, after: tuple = None, projection: dict = None):
+        """
+        Find documents newest first, optionally resuming after a keyset position
+
+        Args:
+            collection_name (str): collection to read
+            query (dict): filter
+            sort_field (str): field to sort on in descending order, ties broken by _id
+            skip (int): documents to skip (offset pagination)
+            limit (int): maximum number of documents
+            after (tuple): (sort value, _id) of the last document already seen; seeks
+                straight to the next one through the index instead of skipping
+            projection (dict): fields to return, everything when None; keep sort_field for keyset paging
+
+        Returns:
+            list: matching documents, None on error
+        """
+        try:
+            if sort_field and after:
+                query = seek_query(query, sort_field, after)
+
+            cursor = self.database[collection_name].find(query, projection)
+            if sort_field:
+                # Sort in descending order
+                cursor = cursor.sort([(sort_field, -1), ("_id", -1)])
+
+            if skip:
+                # for pagination
+                cursor = cursor.skip(skip)
+
+            if limit:
+                cursor = cursor.limit(limit)
+            return await cursor.to_list()
+        except Exception as e:
+            print(f"Error fetching sorted documents: {e}")
+            return None
+
+    async def update(self, collection_name, query, data):
+        try:
+            # Update the document with the new data
+            await self.database[collection_name].update_one(query, {"$set": to_document(data)})
+            ic("Document updated successfully!")
+            return True
+        except Exception as e:
+            print("Exception while updating data in MongoDB\nException in utils/dbHandler.py AsyncMongoDB.update function")
+            print(e)
+            return False
+
+    async def delete_many(self, collection_name: str, query: dict) -> bool:
+        try:
+            result = await self.database[collection_name].delete_many(query)
+            return result.acknowledged
+        except Exception as e:
+            print(f"Error deleting documents: {e}")
+            return False
+
+    async def close(self):
+        if self.client is not None:
+            release_client(self.client)
+            await self.client.close()
+            self.client = None
+            self.db = None
+
+
 
 if __name__ == "__main__":
     db = MongoDB()
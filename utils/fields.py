@@ -0,0 +1,42 @@
+from typing import Dict, Iterable, Optional, Tuple
+
+# Fields a client can pick with ?fields=, per response shape, in response order
+COMMUNITY_FIELDS = ("creator_username", "name", "tech_stack", "experience")
+COMMUNITY_SUMMARY_FIELDS = ("id", "name", "experience")
+USER_FIELDS = ("username", "name", "email")
+PROFILE_FIELDS = ("bio", "linkedin_url", "github_url", "portfolio_url", "years_exp", "skills", "projects")
+
+
+def parse_fields(raw: Optional[str], allowed: Tuple[str, ...]) -> Optional[Tuple[str, ...]]:
+    """
+    Parse a ?fields= value, a comma separated list of response fields
+
+    Args:
+        raw (Optional[str]): the query parameter as received
+        allowed (Tuple[str, ...]): fields of the response shape
+
+    Returns:
+        Optional[Tuple[str, ...]]: the requested fields in response order, None for the whole response
+
+    Raises:
+        ValueError: if a field is not part of the response shape
+    """
+    if raw is None:
+        return None
+    requested = {field.strip() for field in raw.split(",") if field.strip()}
+    if not requested:
+        return None
+    unknown = requested - set(allowed)
+    if unknown:
+        raise ValueError(f"Unknown fields: {', '.join(sorted(unknown))}; choose from {', '.join(allowed)}")
+    return tuple(field for field in allowed if field in requested)
+
+
+def projection(fields: Iterable[str], *required: str) -> Dict[str, int]:
+    # Inclusion projection for the response fields plus whatever the query itself needs (sort keys);
+    # "id" is the document's _id, which MongoDB returns anyway
+    return {field: 1 for field in (*fields, *required) if field != "id"}
+
+
+def pick(doc: Dict, fields: Optional[Iterable[str]]) -> Dict:
+    return doc if fields is None else {field: doc[field] for field in fields if field in doc}
@@ -0,0 +1,52 @@
+from hashlib import sha1
+from json import dumps
+from os import environ
+from typing import Any, Dict, Optional
+from fastapi.responses import Response
+
+# Cache-Control per route; override with CACHE_CONTROL_<ROUTE>, e.g. CACHE_CONTROL_LATEST="public, max-age=5"
+DEFAULT_CACHE_CONTROL = {
+    # Communities only change when a migration rewrites their tech stack
+    "community": "public, max-age=300",
+    # New communities appear at the top, so always revalidate
+    "latest": "public, no-cache",
+    "profile": "private, no-cache",
+    # On top of max-age, suggestions lag other workers' saves until the index refresh (utils/indexRefresh.py) catches up
+    "autocomplete": "public, max-age=30"
+}
+
+
+def cache_control_for(route: str) -> str:
+    return environ.get(f"CACHE_CONTROL_{route.upper()}", DEFAULT_CACHE_CONTROL.get(route, "no-cache"))
+
+
+def make_etag(*parts: Any) -> str:
+    """
+    Strong ETag from a version stamp or from the response content itself
+
+    Args:
+        *parts: values identifying the representation (ids, versions, query parameters or the body)
+
+    Returns:
+        str: quoted entity tag
+    """
+    raw = dumps(parts, sort_keys=True, separators=(",", ":"), default=str)
+    return '"' + sha1(raw.encode()).hexdigest() + '"'
+
+
+def etag_matches(if_none_match: Optional[str], etag: Optional[str]) -> bool:
+    # If-None-Match uses the weak comparison, so a W/ prefix is ignored
+    if not if_none_match or not etag:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    candidates = [candidate.strip() for candidate in if_none_match.split(",")]
+    return any(candidate.removeprefix("W/") == etag for candidate in candidates)
+
+
+def cache_headers(etag: str, cache_control: str) -> Dict[str, str]:
+    return {"ETag": etag, "Cache-Control": cache_control}
+
+
+def not_modified(etag: str, cache_control: str) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, cache_control))
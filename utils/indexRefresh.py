@@ -0,0 +1,61 @@
+import asyncio
+from datetime import datetime, timedelta, timezone
+from os import environ
+from time import monotonic
+from typing import Awaitable, Callable, Optional
+
+
+class IndexRefresher:
+    """
+    Periodic catch-up for an in-process index with other workers' writes.
+
+    Each worker only sees its own saves; communities and users saved by
+    other workers (or other serverless instances) reach its indexes through
+    this. Requests call start(), which launches at most one catch-up in the
+    background per INDEX_REFRESH_INTERVAL seconds (5 by default), so the
+    indexes lag other workers by about that much. There is no timer: an
+    idle or frozen instance simply refreshes on its next request.
+
+    A catch-up reads what was saved since the previous one started, minus
+    INDEX_REFRESH_OVERLAP seconds (60 by default): timestamps come from the
+    saving worker's clock and a save can land after a later one, so the
+    window overlaps and the refresh callback skips entries already indexed.
+    """
+    def __init__(self, name: str, refresh: Callable[[datetime], Awaitable[int]], interval: Optional[float] = None, overlap: Optional[float] = None):
+        # refresh(since) indexes whatever was saved at or after since and returns how many entries it added
+        self.name = name
+        self.refresh = refresh
+        self.interval = interval if interval is not None else float(environ.get("INDEX_REFRESH_INTERVAL", 5))
+        self.overlap = overlap if overlap is not None else float(environ.get("INDEX_REFRESH_OVERLAP", 60))
+        self.since: Optional[datetime] = None
+        self.last_run = 0.0
+        self.task: Optional[asyncio.Task] = None
+
+    def built(self, started: datetime):
+        # A build that began reading its snapshot at started has everything saved before then
+        self.since = started
+        self.last_run = monotonic()
+
+    def start(self):
+        if self.since is None or monotonic() - self.last_run < self.interval:
+            return
+        if self.task is not None and not self.task.done():
+            return
+        self.last_run = monotonic()
+        self.task = asyncio.create_task(self.run())
+
+    async def run(self) -> int:
+        started = datetime.now(timezone.utc)
+        try:
+            added = await self.refresh(self.since - timedelta(seconds=self.overlap))
+            self.since = started
+            return added
+        except Exception as e:
+            print("Error message from utils/indexRefresh.py run function")
+            print(f"Error refreshing {self.name} index:", e)
+            return 0
+
+    def stop(self):
+        if self.task is not None:
+            self.task.cancel()
+            self.task = None
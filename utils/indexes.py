@@ -0,0 +1,56 @@
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from pymongo import ASCENDING, DESCENDING
+
+# Case-insensitive comparisons, used by the autocomplete fallback queries
+CASE_INSENSITIVE = {"locale": "en", "strength": 2}
+
+
+class IndexSpec(NamedTuple):
+    collection: str
+    keys: List[Tuple[str, int]]
+    unique: bool = False
+    # Needed when the same keys are indexed twice, e.g. with and without a collation
+    name: Optional[str] = None
+    collation: Optional[Dict] = None
+
+    def options(self) -> Dict:
+        # create_index keyword arguments
+        options = {"unique": self.unique}
+        if self.name:
+            options["name"] = self.name
+        if self.collation:
+            options["collation"] = self.collation
+        return options
+
+
+# Every index the UserUtility/CommunityUtility queries rely on.
+# Applied idempotently by MongoDB.apply_indexes; scripts/checkIndexes.py verifies the plans.
+INDEXES: List[IndexSpec] = [
+    # signup/login/get_user and the profile pipeline's $match
+    IndexSpec("user", [("username", ASCENDING)], unique=True),
+    # autocomplete fallback: case-insensitive prefix ranges on usernames, community names and skills
+    IndexSpec("user", [("username", ASCENDING)], name="username_ci", collation=CASE_INSENSITIVE),
+    IndexSpec("community", [("name", ASCENDING)], name="name_ci", collation=CASE_INSENSITIVE),
+    IndexSpec("skills", [("name", ASCENDING)], name="name_ci", collation=CASE_INSENSITIVE),
+
+    # skill catalog: one entry per canonical key, also what SkillUtility looks up on a miss
+    IndexSpec("skills", [("key", ASCENDING)], unique=True),
+
+    # profile pipeline $lookups and get_profile_version
+    IndexSpec("user_profiles", [("user_id", ASCENDING)]),
+    IndexSpec("user_skills", [("user_id", ASCENDING)]),
+    IndexSpec("user_projects", [("user_id", ASCENDING)]),
+
+    # get_latest_communities: newest first with an _id tiebreak, keyset seeks
+    IndexSpec("community", [("registeration_date_time", DESCENDING), ("_id", DESCENDING)]),
+    # get_user_communities: equality on creator, then the same keyset
+    IndexSpec("community", [("creator_username", ASCENDING), ("registeration_date_time", DESCENDING), ("_id", DESCENDING)]),
+    # search_community_by_skills (multikey); supersedes tech_stack_1, which can be dropped
+    IndexSpec("community", [("skill_ids", ASCENDING)]),
+
+    # The skill index builds from community.skill_ids, so skill_id_1_community_id_1,
+    # skill_1_community_id_1 and skill_ci on community_skills can be dropped
+
+    # tech stack fallback for communities not yet migrated
+    IndexSpec("community_skills", [("community_id", ASCENDING)]),
+]
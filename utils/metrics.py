@@ -0,0 +1,226 @@
+from bisect import bisect_left
+from functools import wraps
+from inspect import iscoroutinefunction
+from threading import Lock
+from time import perf_counter
+from typing import Callable, Dict, List, Tuple
+from pymongo import monitoring
+
+# Upper bounds in seconds, wide enough for a cached lookup and for a cold Atlas connection
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def format_labels(names: Tuple[str, ...], values: Tuple) -> str:
+    if not names:
+        return ""
+    pairs = []
+    for name, value in zip(names, values):
+        escaped = str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+        pairs.append(f'{name}="{escaped}"')
+    return "{" + ",".join(pairs) + "}"
+
+
+class Histogram:
+    """
+    Prometheus histogram with a fixed label set.
+
+    Each label combination keeps per-bucket counts (cumulated only when
+    rendered), a running sum and a count, so observe() is a bisect and three
+    additions under a lock.
+    """
+    def __init__(self, name: str, description: str, label_names: Tuple[str, ...], buckets: Tuple[float, ...] = LATENCY_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = buckets
+        self.series: Dict[Tuple, List] = {}
+        self.lock = Lock()
+
+    def observe(self, value: float, *labels):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                # counts per bucket (+Inf last), sum, count
+                series = self.series[labels] = [[0] * (len(self.buckets) + 1), 0.0, 0]
+            series[0][bisect_left(self.buckets, value)] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self.lock:
+            series = [(labels, list(counts), total, count) for labels, (counts, total, count) in self.series.items()]
+
+        names = self.label_names + ("le",)
+        for labels, counts, total, count in sorted(series):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f"{self.name}_bucket{format_labels(names, labels + (le,))} {cumulative}")
+            lines.append(f"{self.name}_sum{format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{format_labels(self.label_names, labels)} {count}")
+        return lines
+
+
+class Counter:
+    def __init__(self, name: str, description: str, label_names: Tuple[str, ...]):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.series: Dict[Tuple, float] = {}
+        self.lock = Lock()
+
+    def inc(self, amount: float, *labels):
+        with self.lock:
+            self.series[labels] = self.series.get(labels, 0) + amount
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self.lock:
+            series = sorted(self.series.items())
+        for labels, value in series:
+            lines.append(f"{self.name}{format_labels(self.label_names, labels)} {value}")
+        return lines
+
+
+class Gauges:
+    """
+    Gauges read from a callback at scrape time, e.g. pool or cache counters.
+
+    The callback returns {label values tuple: {field: value}}; every field
+    becomes its own <prefix>_<field> gauge.
+    """
+    def __init__(self, prefix: str, description: str, label_names: Tuple[str, ...], collect: Callable[[], Dict[Tuple, Dict[str, float]]]):
+        self.prefix = prefix
+        self.description = description
+        self.label_names = label_names
+        self.collect = collect
+
+    def render(self) -> List[str]:
+        by_field: Dict[str, List[str]] = {}
+        for labels, fields in self.collect().items():
+            for field, value in fields.items():
+                by_field.setdefault(field, []).append(f"{self.prefix}_{field}{format_labels(self.label_names, labels)} {value}")
+
+        lines = []
+        for field, samples in by_field.items():
+            lines.append(f"# HELP {self.prefix}_{field} {self.description}: {field}")
+            lines.append(f"# TYPE {self.prefix}_{field} gauge")
+            lines.extend(samples)
+        return lines
+
+
+class CommandMetrics(monitoring.CommandListener):
+    """
+    Per-collection, per-command MongoDB timings from pymongo's command events.
+
+    The collection is only named in the started event, so it is remembered
+    per (connection, request id) until the matching succeeded/failed event
+    arrives. Document counts come from the reply: the batch size for
+    find/aggregate/getMore, "n" for writes.
+    """
+    def __init__(self):
+        self.pending: Dict[Tuple, str] = {}
+        self.lock = Lock()
+        self.duration = Histogram(
+            "mongodb_command_duration_seconds",
+            "MongoDB command round trip time",
+            ("collection", "command", "outcome")
+        )
+        self.documents = Counter(
+            "mongodb_command_documents_total",
+            "Documents returned or written by MongoDB commands",
+            ("collection", "command")
+        )
+
+    def collection_of(self, event) -> str:
+        command = event.command
+        if event.command_name == "getMore":
+            return str(command.get("collection", ""))
+        target = command.get(event.command_name)
+        # admin commands such as ping carry a number instead of a collection name
+        return target if isinstance(target, str) else ""
+
+    def document_count(self, command_name: str, reply) -> int:
+        cursor = reply.get("cursor")
+        if isinstance(cursor, dict):
+            return len(cursor.get("firstBatch", cursor.get("nextBatch", [])))
+        if command_name in ("insert", "update", "delete"):
+            return int(reply.get("n", 0))
+        return 0
+
+    def started(self, event):
+        with self.lock:
+            self.pending[(event.connection_id, event.request_id)] = self.collection_of(event)
+
+    def finish(self, event, outcome: str):
+        with self.lock:
+            collection = self.pending.pop((event.connection_id, event.request_id), "")
+        self.duration.observe(event.duration_micros / 1e6, collection, event.command_name, outcome)
+        return collection
+
+    def succeeded(self, event):
+        collection = self.finish(event, "ok")
+        documents = self.document_count(event.command_name, event.reply)
+        if documents:
+            self.documents.inc(documents, collection, event.command_name)
+
+    def failed(self, event):
+        self.finish(event, "error")
+
+
+# Filled by the request middleware in app.py
+requestDuration = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, method and status",
+    ("route", "method", "status")
+)
+# Filled by @instrumented on UserUtility / CommunityUtility
+utilityDuration = Histogram(
+    "utility_call_duration_seconds",
+    "Latency of UserUtility/CommunityUtility calls",
+    ("call", "outcome")
+)
+# Filled by RateLimitMiddleware in utils/rateLimit.py
+shedRequests = Counter(
+    "http_requests_shed_total",
+    "Requests turned away by route class and reason (rate_limit, queue_full, queue_delay)",
+    ("route_class", "reason")
+)
+# Registered on every client built by utils/dbHandler.py
+commandMetrics = CommandMetrics()
+
+
+def instrumented(cls):
+    """
+    Class decorator timing every public coroutine method into utilityDuration
+
+    Labelled "<Class>.<method>", so the slowest utility call at p99 can be read
+    straight off /metrics. Synchronous helpers are left alone: they do no I/O.
+    """
+    def wrap(call_name: str, method):
+        @wraps(method)
+        async def timed(*args, **kwargs):
+            start = perf_counter()
+            outcome = "error"
+            try:
+                result = await method(*args, **kwargs)
+                outcome = "ok"
+                return result
+            finally:
+                utilityDuration.observe(perf_counter() - start, call_name, outcome)
+        return timed
+
+    for name, method in list(vars(cls).items()):
+        if not name.startswith("_") and iscoroutinefunction(method):
+            setattr(cls, name, wrap(f"{cls.__name__}.{name}", method))
+    return cls
+
+
+def render_metrics(*collectors) -> str:
+    # Prometheus text exposition format 0.0.4
+    lines = []
+    for collector in collectors:
+        lines.extend(collector.render())
+    return "\n".join(lines) + "\n"
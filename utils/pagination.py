@@ -0,0 +1,70 @@
+from base64 import urlsafe_b64encode, urlsafe_b64decode
+from datetime import datetime
+from bson import ObjectId, json_util
+from typing import Optional, Tuple, Any
+
+# Upper bound for any page requested through the API
+MAX_PAGE_SIZE = 100
+
+
+def clamp_limit(limit: int) -> int:
+    return max(1, min(limit, MAX_PAGE_SIZE))
+
+
+# Value types of a cursor's key: newest-first listings, and skill search (matched count first)
+LATEST_CURSOR = (datetime, ObjectId)
+SEARCH_CURSOR = (int, datetime, ObjectId)
+
+# Documents per batch (and per cursor round trip) for the NDJSON exports
+MAX_EXPORT_BATCH_SIZE = 5000
+
+
+def clamp_batch_size(batch_size: int) -> int:
+    return max(1, min(batch_size, MAX_EXPORT_BATCH_SIZE))
+
+
+def encode_cursor(key: Optional[Tuple[Any, ...]]) -> Optional[str]:
+    """
+    Encode a keyset position as an opaque, URL-safe token
+
+    Args:
+        key (Optional[Tuple[Any, ...]]): sort values followed by the _id of the last item on the page
+
+    Returns:
+        Optional[str]: cursor token, None when there is no next page
+    """
+    if key is None:
+        return None
+    # Extended JSON keeps datetime and ObjectId types through the round trip
+    raw = json_util.dumps(list(key)).encode()
+    return urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(token: str, types: Tuple[type, ...] = LATEST_CURSOR) -> Tuple[Any, ...]:
+    """
+    Decode a token produced by encode_cursor
+
+    The values go straight into seek_query's filter, so each one must have
+    its expected type: a client-made token holding {"$ne": null} would
+    otherwise inject a query operator.
+
+    Args:
+        token (str): cursor token
+        types (Tuple[type, ...]): expected type of each key value, _id included
+
+    Raises:
+        ValueError: if the token is malformed
+    """
+    try:
+        raw = urlsafe_b64decode(token + "=" * (-len(token) % 4))
+        key = json_util.loads(raw)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+    if not isinstance(key, list) or len(key) != len(types):
+        raise ValueError("Invalid cursor")
+    for value, expected in zip(key, types):
+        # bool is an int subclass, but never a valid count
+        if not isinstance(value, expected) or isinstance(value, bool):
+            raise ValueError("Invalid cursor")
+    return tuple(key)
@@ -0,0 +1,82 @@
+import asyncio
+import hashlib
+import hmac
+from base64 import b64encode, b64decode
+from concurrent.futures import ThreadPoolExecutor
+from os import environ, urandom, cpu_count
+from typing import Optional
+
+SCHEME = "scrypt"
+
+
+class PasswordHasher:
+    """
+    scrypt password hashing that never runs on the event loop.
+
+    Hashes are stored as "scrypt$<n>$<r>$<p>$<salt>$<hash>" (base64 salt and
+    hash), so cost parameters can be raised later and old hashes upgraded on
+    login. hashlib.scrypt releases the GIL, so a bounded thread pool gives
+    real parallelism up to the number of cores without blocking the loop.
+
+    Cost parameters come from PASSWORD_SCRYPT_N / _R / _P and the pool size
+    from PASSWORD_HASH_WORKERS (defaults to the number of CPUs).
+    """
+    def __init__(self, n: Optional[int] = None, r: Optional[int] = None, p: Optional[int] = None, max_workers: Optional[int] = None):
+        self.n = n or int(environ.get("PASSWORD_SCRYPT_N", 2 ** 14))
+        self.r = r or int(environ.get("PASSWORD_SCRYPT_R", 8))
+        self.p = p or int(environ.get("PASSWORD_SCRYPT_P", 1))
+        self.max_workers = max_workers or int(environ.get("PASSWORD_HASH_WORKERS", cpu_count() or 1))
+        self.executor = None
+
+    def get_executor(self) -> ThreadPoolExecutor:
+        # Created on first use so importing this module starts no threads
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="password-hash")
+        return self.executor
+
+    def derive(self, password: str, salt: bytes, n: int, r: int, p: int) -> bytes:
+        # scrypt needs 128 * r * n bytes per lane; leave headroom over OpenSSL's 32 MiB default
+        maxmem = 128 * r * n * p + 16 * 1024 * 1024
+        return hashlib.scrypt(password.encode(), salt=salt, n=n, r=r, p=p, maxmem=maxmem, dklen=32)
+
+    def hash_sync(self, password: str) -> str:
+        salt = urandom(16)
+        derived = self.derive(password, salt, self.n, self.r, self.p)
+        return f"{SCHEME}${self.n}${self.r}${self.p}${b64encode(salt).decode()}${b64encode(derived).decode()}"
+
+    def verify_sync(self, password: str, stored: str) -> bool:
+        if not self.is_hashed(stored):
+            # Legacy plaintext row
+            return hmac.compare_digest(password.encode(), stored.encode())
+
+        try:
+            _, n, r, p, salt, expected = stored.split("$")
+            derived = self.derive(password, b64decode(salt), int(n), int(r), int(p))
+            return hmac.compare_digest(derived, b64decode(expected))
+        except ValueError:
+            return False
+
+    def is_hashed(self, stored: str) -> bool:
+        return stored.startswith(f"{SCHEME}$")
+
+    def needs_rehash(self, stored: str) -> bool:
+        # Plaintext, or hashed with parameters other than the current ones
+        if not self.is_hashed(stored):
+            return True
+        return stored.split("$")[1:4] != [str(self.n), str(self.r), str(self.p)]
+
+    async def hash(self, password: str) -> str:
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.get_executor(), self.hash_sync, password)
+
+    async def verify(self, password: str, stored: str) -> bool:
+        if not self.is_hashed(stored):
+            # Plaintext comparison is cheap, no need to hop threads
+            return self.verify_sync(password, stored)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.get_executor(), self.verify_sync, password, stored)
+
+    def shutdown(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=True)
+            self.executor = None
@@ -0,0 +1,105 @@
+from threading import Lock
+from typing import Dict
+from pymongo import monitoring
+
+
+class PoolStats(monitoring.ConnectionPoolListener):
+    """
+    Live connection pool counters fed by pymongo's pool events.
+
+    Registered on every client built by utils/dbHandler.py, so the numbers
+    cover the sync and the async client together. Events arrive from pymongo's
+    own threads (sync client) and from the event loop (async client), hence
+    the lock. checked_out and waiting are current values; the rest are totals
+    since the process started, with wait times in milliseconds.
+    """
+    def __init__(self):
+        self.lock = Lock()
+        self.reset()
+
+    def reset(self):
+        self.checked_out = 0
+        self.max_checked_out = 0
+        self.waiting = 0
+        self.max_waiting = 0
+        self.checkouts = 0
+        self.checkout_failures = 0
+        self.waits = 0
+        self.wait_ms_total = 0.0
+        self.wait_ms_max = 0.0
+        self.created = 0
+        self.closed = 0
+        self.pools_cleared = 0
+
+    def record_wait(self, duration):
+        # duration (seconds) is None on servers/drivers that do not report it
+        if duration is None:
+            return
+        wait_ms = duration * 1000
+        self.waits += 1
+        self.wait_ms_total += wait_ms
+        self.wait_ms_max = max(self.wait_ms_max, wait_ms)
+
+    def connection_check_out_started(self, event):
+        with self.lock:
+            self.waiting += 1
+            self.max_waiting = max(self.max_waiting, self.waiting)
+
+    def connection_checked_out(self, event):
+        with self.lock:
+            self.waiting -= 1
+            self.checkouts += 1
+            self.checked_out += 1
+            self.max_checked_out = max(self.max_checked_out, self.checked_out)
+            self.record_wait(event.duration)
+
+    def connection_check_out_failed(self, event):
+        with self.lock:
+            self.waiting -= 1
+            self.checkout_failures += 1
+            self.record_wait(event.duration)
+
+    def connection_checked_in(self, event):
+        with self.lock:
+            self.checked_out -= 1
+
+    def connection_created(self, event):
+        with self.lock:
+            self.created += 1
+
+    def connection_closed(self, event):
+        with self.lock:
+            self.closed += 1
+
+    def pool_cleared(self, event):
+        with self.lock:
+            self.pools_cleared += 1
+
+    def connection_ready(self, event):
+        pass
+
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def snapshot(self) -> Dict[str, float]:
+        with self.lock:
+            return {
+                "checked_out": self.checked_out,
+                "max_checked_out": self.max_checked_out,
+                "waiting": self.waiting,
+                "max_waiting": self.max_waiting,
+                "open": self.created - self.closed,
+                "created": self.created,
+                "closed": self.closed,
+                "checkouts": self.checkouts,
+                "checkout_failures": self.checkout_failures,
+                "pools_cleared": self.pools_cleared,
+                "wait_ms_avg": round(self.wait_ms_total / self.waits, 3) if self.waits else 0.0,
+                "wait_ms_max": round(self.wait_ms_max, 3)
+            }
@@ -0,0 +1,120 @@
+from bisect import bisect_left
+from typing import Any, Iterable, List, Tuple
+
+
+def normalize(text: str) -> str:
+    # Case-insensitive matching, like the en/strength 2 collation of the fallback indexes
+    return text.casefold().strip()
+
+
+def prepare_entries(items: Iterable[Tuple[str, Any]], unique: bool = False) -> List[Tuple[str, Any]]:
+    """
+    Sorted (normalized key, value) entries for a snapshot
+
+    Pure CPU work on its own data, so SearchUtility runs it in a thread
+    instead of sorting on the event loop.
+
+    Args:
+        items: (text, value) pairs; text is what gets matched, value what is returned
+        unique (bool): keep one entry per key
+
+    Returns:
+        List[Tuple[str, Any]]: entries ready for PrefixIndex.install
+    """
+    entries = sorted((normalize(text), value) for text, value in items if text)
+    if unique:
+        entries = [entry for position, entry in enumerate(entries) if position == 0 or entry[0] != entries[position - 1][0]]
+    return entries
+
+
+class PrefixIndex:
+    """
+    In-process sorted array of (normalized key, value) pairs for autocomplete.
+
+    A lookup is one bisect to the first key at or after the prefix and a
+    short forward scan while keys still start with it, so it costs
+    microseconds whatever the number of entries. New entries are inserted
+    in place at their bisect position.
+
+    As with SkillIndex, entries added while a build is reading its snapshot
+    are queued and merged once it finishes, and the index is per process:
+    SearchUtility's refresh picks up what other workers saved.
+    """
+    def __init__(self, unique: bool = False):
+        self.ready = False
+        self.building = False
+        # unique: one entry per key (usernames, skill names); otherwise per (key, value)
+        self.unique = unique
+        self.entries: List[Tuple[str, Any]] = []
+        self.pending: List[Tuple[str, Any]] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def start_build(self):
+        self.building = True
+
+    def build(self, items: Iterable[Tuple[str, Any]]):
+        """
+        Replace the index with a snapshot, on the calling thread
+
+        Args:
+            items: (text, value) pairs; text is what gets matched, value what is returned
+        """
+        self.install(prepare_entries(items, self.unique))
+
+    def install(self, entries: List[Tuple[str, Any]]):
+        # Swap in entries from prepare_entries, then merge the ones added meanwhile
+        self.entries = entries
+
+        pending, self.pending = self.pending, []
+        for key, value in pending:
+            self.insert(key, value)
+
+        self.building = False
+        self.ready = True
+
+    def insert(self, key: str, value: Any):
+        if self.unique:
+            position = bisect_left(self.entries, (key,))
+            if position < len(self.entries) and self.entries[position][0] == key:
+                return
+        else:
+            position = bisect_left(self.entries, (key, value))
+            if position < len(self.entries) and self.entries[position] == (key, value):
+                return
+        self.entries.insert(position, (key, value))
+
+    def add(self, text: str, value: Any):
+        if not text:
+            return
+        key = normalize(text)
+        if self.building:
+            self.pending.append((key, value))
+            return
+        if not self.ready:
+            # Picked up from the database when the index is built
+            return
+        self.insert(key, value)
+
+    def complete(self, prefix: str, limit: int = 10) -> List[Any]:
+        """
+        Values whose text starts with prefix, in alphabetical order
+
+        Args:
+            prefix (str): what has been typed so far
+            limit (int): maximum number of values
+
+        Returns:
+            List[Any]: matching values
+        """
+        prefix = normalize(prefix)
+        results = []
+        position = bisect_left(self.entries, (prefix,))
+        while position < len(self.entries) and len(results) < limit:
+            key, value = self.entries[position]
+            if not key.startswith(prefix):
+                break
+            results.append(value)
+            position += 1
+        return results
@@ -0,0 +1,258 @@
+import asyncio
+import re
+from abc import ABC, abstractmethod
+from math import ceil
+from collections import OrderedDict, deque
+from os import environ
+from time import monotonic
+from typing import Deque, Dict, List, Optional, Tuple
+from fastapi.responses import JSONResponse
+
+from utils.metrics import shedRequests
+
+# (method, path pattern, route class), first match wins; anything else is "read" or "write" by method
+ROUTE_CLASSES: List[Tuple[str, re.Pattern, str]] = [
+    ("POST", re.compile(r"^/community/search/skills/?$"), "search"),
+    ("GET", re.compile(r"^/search/autocomplete/?$"), "autocomplete"),
+    ("GET", re.compile(r"^/(community|user)/export/?$"), "export"),
+    # scrypt makes every signup and login cost tens of milliseconds of CPU
+    ("POST", re.compile(r"^/user/(signup|login)/?$"), "auth"),
+    # Batch lookups are reads sent as POST
+    ("POST", re.compile(r"^/(community/batch|user/profiles/batch)/?$"), "read"),
+]
+# Health checks and scrapes must keep answering while the app sheds load
+EXEMPT_PATHS = {"/", "/ready", "/metrics"}
+
+# Route class -> (tokens per second, burst) per client; override with RATE_LIMIT_<CLASS>="<rate>,<burst>"
+DEFAULT_LIMITS = {
+    "search": (5, 20),
+    "autocomplete": (20, 40),
+    "export": (0.1, 2),
+    "auth": (1, 10),
+    "write": (5, 20),
+    "read": (50, 100),
+}
+
+
+def route_class(method: str, path: str) -> str:
+    for rule_method, pattern, name in ROUTE_CLASSES:
+        if method == rule_method and pattern.match(path):
+            return name
+    return "read" if method in ("GET", "HEAD") else "write"
+
+
+def limit_for(name: str) -> Tuple[float, float]:
+    raw = environ.get(f"RATE_LIMIT_{name.upper()}")
+    if not raw:
+        return DEFAULT_LIMITS[name]
+    rate, burst = raw.split(",")
+    return float(rate), float(burst)
+
+
+def default_client_header() -> str:
+    # Vercel sets VERCEL=1 and overwrites x-forwarded-for with the real client address
+    return "x-forwarded-for" if environ.get("VERCEL") else ""
+
+
+class RateLimitBackend(ABC):
+    """
+    Where token buckets live. The in-memory backend is per process; a backend
+    shared by every worker (Redis, MongoDB) only has to implement take().
+    """
+    @abstractmethod
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        """
+        Take one token from the bucket at key, refilled at rate tokens per second up to burst
+
+        Args:
+            key (str): bucket key, route class and client
+            rate (float): tokens added per second
+            burst (float): bucket capacity, also its initial level
+
+        Returns:
+            float: 0 if a token was taken, otherwise seconds until one is available
+        """
+
+
+class MemoryBackend(RateLimitBackend):
+    """
+    Token buckets in a dict, least recently used first.
+
+    Each bucket is (tokens, last refill); take() refills lazily from the time
+    elapsed, so idle clients cost nothing. Past max_buckets the least recently
+    used bucket is dropped, which at worst hands a long idle client a full
+    bucket again.
+    """
+    def __init__(self, max_buckets: Optional[int] = None):
+        self.max_buckets = max_buckets or int(environ.get("RATE_LIMIT_MAX_CLIENTS", 100000))
+        self.buckets: "OrderedDict[str, Tuple[float, float]]" = OrderedDict()
+
+    async def take(self, key: str, rate: float, burst: float) -> float:
+        now = monotonic()
+        bucket = self.buckets.pop(key, None)
+        if bucket is None:
+            tokens = burst
+        else:
+            tokens = min(burst, bucket[0] + (now - bucket[1]) * rate)
+
+        wait = 0.0
+        if tokens >= 1:
+            tokens -= 1
+        else:
+            wait = (1 - tokens) / rate
+        self.buckets[key] = (tokens, now)
+        if len(self.buckets) > self.max_buckets:
+            self.buckets.popitem(last=False)
+        return wait
+
+    def __len__(self) -> int:
+        return len(self.buckets)
+
+
+class LoadShedder:
+    """
+    Global cap on requests in flight, with a short queue in front of it.
+
+    Up to max_in_flight requests run at once. Past that, a request waits for
+    a slot in arrival order, but it is shed straight away when max_queued are
+    already waiting or the oldest waiter has been queued longer than
+    max_queue_delay (the queue is not draining, so waiting would only add
+    latency before the same 503), and it gives up once its own wait passes
+    max_queue_delay. The cap is per process: it protects this worker's event
+    loop and connection pool, whatever the other workers are doing.
+    """
+    def __init__(self, max_in_flight: Optional[int] = None, max_queued: Optional[int] = None, max_queue_delay: Optional[float] = None):
+        self.max_in_flight = max_in_flight or int(environ.get("RATE_LIMIT_MAX_IN_FLIGHT", 200))
+        self.max_queued = max_queued if max_queued is not None else int(environ.get("RATE_LIMIT_MAX_QUEUED", 100))
+        self.max_queue_delay = max_queue_delay if max_queue_delay is not None else float(environ.get("RATE_LIMIT_MAX_QUEUE_DELAY", 0.5))
+        self.in_flight = 0
+        self.waiters: Deque[Tuple[float, asyncio.Future]] = deque()
+
+    async def acquire(self) -> Optional[str]:
+        """
+        Wait for a slot
+
+        Returns:
+            Optional[str]: None once the slot is held, otherwise why the request was shed
+        """
+        if self.in_flight < self.max_in_flight and not self.waiters:
+            self.in_flight += 1
+            return None
+        if len(self.waiters) >= self.max_queued:
+            return "queue_full"
+        now = monotonic()
+        if self.waiters and now - self.waiters[0][0] > self.max_queue_delay:
+            return "queue_delay"
+
+        waiter = asyncio.get_running_loop().create_future()
+        entry = (now, waiter)
+        self.waiters.append(entry)
+        try:
+            # release() hands its slot over by resolving the future, so in_flight stays as it is
+            await asyncio.wait_for(asyncio.shield(waiter), self.max_queue_delay)
+            return None
+        except asyncio.TimeoutError:
+            return "queue_delay" if self.withdraw(entry) else None
+        except asyncio.CancelledError:
+            # Client gone while queued; a slot handed over meanwhile goes to the next waiter
+            if not self.withdraw(entry):
+                self.release()
+            raise
+
+    def withdraw(self, entry: Tuple[float, asyncio.Future]) -> bool:
+        # False when release() handed this waiter a slot before it could leave the queue
+        waiter = entry[1]
+        if waiter.done():
+            return False
+        waiter.cancel()
+        self.waiters.remove(entry)
+        return True
+
+    def release(self):
+        while self.waiters:
+            _, waiter = self.waiters.popleft()
+            if not waiter.done():
+                waiter.set_result(None)
+                return
+        self.in_flight -= 1
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "in_flight": self.in_flight,
+            "queued": len(self.waiters),
+            "max_in_flight": self.max_in_flight,
+            "max_queued": self.max_queued
+        }
+
+
+class RateLimitMiddleware:
+    """
+    ASGI middleware: per-client token buckets per route class, then the load shedder.
+
+    A client over its bucket gets 429 with Retry-After; a request shed for
+    overload gets 503 with Retry-After: 1. Both are counted in shedRequests
+    by route class and reason. The client is the first address of the
+    header named by RATE_LIMIT_CLIENT_HEADER, set by the proxy in front of
+    the app (x-forwarded-for by default on Vercel, where every request's
+    socket peer is the proxy), or else the socket peer. Written as plain ASGI rather
+    than @app.middleware so a streamed export keeps its slot until the last
+    chunk is sent. RATE_LIMIT=0 turns limits and shedding off.
+    """
+    def __init__(self, app, backend: Optional[RateLimitBackend] = None, shedder: Optional[LoadShedder] = None):
+        self.app = app
+        self.enabled = environ.get("RATE_LIMIT", "1") != "0"
+        self.backend = backend or MemoryBackend()
+        self.shedder = shedder or loadShedder
+        self.client_header = environ.get("RATE_LIMIT_CLIENT_HEADER", default_client_header()).lower().encode()
+        self.limits = {name: limit_for(name) for name in DEFAULT_LIMITS}
+
+    def client_of(self, scope) -> str:
+        if self.client_header:
+            for name, value in scope.get("headers", []):
+                if name == self.client_header:
+                    return value.decode("latin-1").split(",")[0].strip()
+        client = scope.get("client")
+        return client[0] if client else "unknown"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not self.enabled or scope["path"] in EXEMPT_PATHS:
+            await self.app(scope, receive, send)
+            return
+
+        name = route_class(scope["method"], scope["path"])
+        rate, burst = self.limits[name]
+        try:
+            wait = await self.backend.take(f"{name}:{self.client_of(scope)}", rate, burst)
+        except Exception as e:
+            # A broken backend must not take the app down with it: let the request through
+            print("Error message from utils/rateLimit.py __call__ function")
+            print("Error taking rate limit token:", e)
+            wait = 0
+        if wait:
+            shedRequests.inc(1, name, "rate_limit")
+            response = JSONResponse(
+                status_code=429,
+                content={"detail": "Too many requests"},
+                headers={"Retry-After": str(ceil(wait))}
+            )
+            await response(scope, receive, send)
+            return
+
+        reason = await self.shedder.acquire()
+        if reason is not None:
+            shedRequests.inc(1, name, reason)
+            response = JSONResponse(
+                status_code=503,
+                content={"detail": "Server busy, try again shortly"},
+                headers={"Retry-After": "1"}
+            )
+            await response(scope, receive, send)
+            return
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            self.shedder.release()
+
+
+# One per process, read by /metrics
+loadShedder = LoadShedder()
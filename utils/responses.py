@@ -0,0 +1,41 @@
+from typing import Any, AsyncIterator, Dict, List
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+import orjson
+
+
+def encode_default(obj: Any) -> Any:
+    # Types orjson does not know natively; datetime, dict, list etc. never get here
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    if hasattr(obj, "model_dump"):
+        return obj.model_dump(mode="json")
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dump_json(content: Any, option: int = 0) -> bytes:
+    return orjson.dumps(content, default=encode_default, option=option)
+
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+async def ndjson_stream(batches: AsyncIterator[List[Dict]]) -> AsyncIterator[bytes]:
+    # One chunk per batch of documents, one JSON document per line; for StreamingResponse.
+    # pymongo returns naive UTC datetimes, written with +00:00 so consumers need not guess the zone
+    async for batch in batches:
+        yield b"".join(dump_json(doc, orjson.OPT_NAIVE_UTC) + b"\n" for doc in batch)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSONResponse rendered with orjson.
+
+    Meant for trusted documents read back from our own collections: they go
+    straight to bytes, with ObjectId and datetime handled by the encoder,
+    instead of being validated into a pydantic model and dumped again.
+    """
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dump_json(content)
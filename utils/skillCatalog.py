@@ -0,0 +1,120 @@
+import re
+from typing import Dict, Iterable, Optional
+
+from utils.cache import TTLCache
+
+# Separators between two word characters are dropped: "Node.js", "node js" and "NodeJS" share a key,
+# while leading/trailing symbols that carry meaning survive (".NET", "C++", "C#")
+SEPARATORS = re.compile(r"(?<=\w)[\s._\-]+(?=\w)")
+WHITESPACE = re.compile(r"\s+")
+
+# Spelling variant -> canonical key (both already separator-free and casefolded)
+ALIASES = {
+    "reactjs": "react",
+    "vuejs": "vue",
+    "expressjs": "express",
+    "node": "nodejs",
+    "js": "javascript",
+    "ecmascript": "javascript",
+    "ts": "typescript",
+    "py": "python",
+    "python3": "python",
+    "golang": "go",
+    "k8s": "kubernetes",
+    "postgres": "postgresql",
+    "psql": "postgresql",
+    "mongo": "mongodb",
+    "cpp": "c++",
+    "csharp": "c#",
+    "dotnet": ".net",
+    "tf": "tensorflow",
+    "amazonwebservices": "aws",
+    "googlecloud": "gcp",
+}
+
+# How well-known skills are displayed, whatever spelling created them
+DISPLAY_NAMES = {
+    "react": "React",
+    "vue": "Vue.js",
+    "express": "Express",
+    "nodejs": "Node.js",
+    "nextjs": "Next.js",
+    "javascript": "JavaScript",
+    "typescript": "TypeScript",
+    "python": "Python",
+    "go": "Go",
+    "kubernetes": "Kubernetes",
+    "postgresql": "PostgreSQL",
+    "mongodb": "MongoDB",
+    "c++": "C++",
+    "c#": "C#",
+    ".net": ".NET",
+    "tensorflow": "TensorFlow",
+    "pytorch": "PyTorch",
+    "aws": "AWS",
+    "gcp": "GCP",
+    "fastapi": "FastAPI",
+    "graphql": "GraphQL",
+    "springboot": "Spring Boot",
+}
+
+
+def canonical_key(name: str) -> str:
+    """
+    Canonical form of a skill name: casefolded, separators between words
+    removed, then mapped through ALIASES. Two spellings with the same key are
+    the same skill.
+    """
+    key = SEPARATORS.sub("", name.casefold().strip())
+    return ALIASES.get(key, key)
+
+
+def display_name(name: str, key: Optional[str] = None) -> str:
+    # Known skills get their usual spelling, anything else keeps the spelling that created it
+    key = key or canonical_key(name)
+    return DISPLAY_NAMES.get(key, WHITESPACE.sub(" ", name.strip()))
+
+
+class SkillCatalog:
+    """
+    In-process copy of the skills collection: canonical key <-> integer id <-> display name.
+
+    Skill ids are small integers handed out by a counter in MongoDB, so they
+    index and compare far more cheaply than free-text names, and every
+    spelling of a skill resolves to the same id. The catalog only grows; a
+    key missing here may still have been created by another worker, so
+    lookups that miss go back to MongoDB (see SkillUtility). Keys MongoDB
+    did not have either are remembered in `missing` for miss_ttl seconds, so
+    repeated searches for an unknown skill do not each pay that round trip.
+    """
+    def __init__(self, miss_ttl: float = 30, max_misses: int = 4096):
+        self.loaded = False
+        self.ids: Dict[str, int] = {}
+        self.names: Dict[int, str] = {}
+        self.missing = TTLCache(maxsize=max_misses, ttl=miss_ttl)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def load(self, docs: Iterable[Dict]):
+        for doc in docs:
+            self.remember(doc["_id"], doc["key"], doc["name"])
+        self.loaded = True
+
+    def remember(self, skill_id: int, key: str, name: str):
+        self.ids[key] = skill_id
+        self.names[skill_id] = name
+        self.missing.invalidate(key)
+
+    def remember_missing(self, key: str):
+        self.missing.set(key, True)
+
+    def known_missing(self, key: str) -> bool:
+        # True while a recent lookup found no such skill in MongoDB
+        return self.missing.get(key, False)
+
+    def resolve(self, name: str) -> Optional[int]:
+        return self.ids.get(canonical_key(name))
+
+    def name_of(self, skill_id: int) -> Optional[str]:
+        return self.names.get(skill_id)
@@ -0,0 +1,337 @@
+from array import array
+from bisect import bisect_right
+from calendar import timegm
+from datetime import datetime, timedelta
+from heapq import merge
+from typing import Dict, FrozenSet, Iterable, Iterator, List, Optional, Set, Tuple
+from bson import ObjectId
+
+OID_SIZE = 12
+# (requested skills, match_all) totals kept by SkillIndex.count
+MAX_CACHED_COUNTS = 256
+EMPTY = array('I')
+EPOCH = datetime(1970, 1, 1)
+
+
+def to_millis(dt: datetime) -> int:
+    # Truncated to milliseconds exactly as BSON stores it; naive datetimes are UTC
+    return timegm(dt.utctimetuple()) * 1000 + dt.microsecond // 1000
+
+
+def from_millis(ms: int) -> datetime:
+    # Naive UTC, the same shape pymongo returns for stored dates
+    return EPOCH + timedelta(milliseconds=ms)
+
+
+def prepare_index(communities: Iterable[Tuple[ObjectId, datetime, List[int]]], pending: List[Tuple[ObjectId, int, List[int]]]) -> Tuple[bytearray, array, Dict[int, array]]:
+    """
+    Code a snapshot of communities in rank order and build their posting lists
+
+    Pure CPU work on its own data, so CommunityUtility runs it in a thread
+    instead of stalling the event loop for a large collection.
+
+    Args:
+        communities: (_id, registeration_date_time, skill_ids) for every community
+        pending: (_id, epoch ms, skill_ids) of communities saved while the snapshot was read
+
+    Returns:
+        Tuple[bytearray, array, Dict[int, array]]: packed ObjectIds, epoch milliseconds and postings per code
+    """
+    ranked = [(to_millis(registered), community_id, skills) for community_id, registered, skills in communities]
+    ranked.extend((ms, community_id, skills) for community_id, ms, skills in pending)
+    ranked.sort(key=lambda item: (item[0], item[1].binary))
+
+    oids = bytearray()
+    millis = array('q')
+    postings: Dict[int, array] = {}
+    seen = set()
+    for ms, community_id, skills in ranked:
+        if community_id in seen:
+            # Saved while building and already in the snapshot
+            continue
+        seen.add(community_id)
+        code = len(millis)
+        oids += community_id.binary
+        millis.append(ms)
+        # Codes are handed out in order, so every posting list comes out sorted
+        for skill in set(skills):
+            postings.setdefault(skill, array('I')).append(code)
+    return oids, millis, postings
+
+
+class SkillIndex:
+    """
+    In-process inverted index from skill id (see utils/skillCatalog.py) to
+    the communities listing it.
+
+    Communities are integer-coded in registration order: code -> ObjectId is a
+    packed bytearray (12 bytes per community) and code -> registration time is
+    an array of epoch milliseconds. Each posting list is an array('I') of codes
+    which stays sorted because new communities are only ever appended.
+
+    Codes follow rank order (registration time, then _id), except for
+    communities that arrive late: concurrent saves can finish in the opposite
+    order to their timestamps. Those are still appended, their codes kept in
+    `late` and ranked at query time, until the next build puts them in place.
+
+    Results are ranked by the number of requested skills matched, then by
+    recency, and paged with the same (matched, registeration_date_time, _id)
+    keyset the Mongo search uses, so cursors work against either. Since codes
+    are in rank order, a search walks posting lists newest first and stops
+    after one page instead of scoring every candidate.
+
+    The index is per process; each worker builds and maintains its own, and
+    CommunityUtility's refresh picks up communities other workers saved.
+    """
+    def __init__(self):
+        self.ready = False
+        self.building = False
+        self.oids = bytearray()
+        self.millis = array('q')
+        self.postings: Dict[int, array] = {}
+        self.late: Set[int] = set()
+        self.pending: List[Tuple[ObjectId, int, List[int]]] = []
+        self.counts: Dict[Tuple[FrozenSet[int], bool], int] = {}
+
+    def __len__(self) -> int:
+        return len(self.millis)
+
+    def oid(self, code: int) -> ObjectId:
+        return ObjectId(self.oid_bytes(code))
+
+    def oid_bytes(self, code: int) -> bytes:
+        return bytes(self.oids[code * OID_SIZE:(code + 1) * OID_SIZE])
+
+    def rank_key(self, code: int, matched: int) -> Tuple[int, int, bytes]:
+        return matched, self.millis[code], self.oid_bytes(code)
+
+    def append(self, community_id: ObjectId, ms: int, skills: Iterable[int]):
+        code = len(self.millis)
+        self.oids += community_id.binary
+        self.millis.append(ms)
+        skills = set(skills)
+        for skill in skills:
+            self.postings.setdefault(skill, array('I')).append(code)
+        # Cached totals are kept exact instead of being thrown away on every new community
+        for requested, match_all in self.counts:
+            matched = len(requested & skills)
+            if matched and (matched == len(requested) or not match_all):
+                self.counts[(requested, match_all)] += 1
+
+    def start_build(self):
+        # Saves from here on are replayed once the snapshot has been indexed
+        self.building = True
+
+    def take_pending(self) -> List[Tuple[ObjectId, int, List[int]]]:
+        # Saves seen so far go into the snapshot; later ones keep queuing until install
+        pending, self.pending = self.pending, []
+        return pending
+
+    def build(self, communities: Iterable[Tuple[ObjectId, datetime, List[int]]]):
+        """
+        Rebuild the index from scratch, on the calling thread
+
+        Args:
+            communities: (_id, registeration_date_time, skill_ids) for every community
+        """
+        self.start_build()
+        self.install(*prepare_index(communities, self.take_pending()))
+
+    def install(self, oids: bytearray, millis: array, postings: Dict[int, array]):
+        # Swap in a prepared snapshot (see prepare_index), then replay the saves made meanwhile
+        self.oids, self.millis, self.postings = oids, millis, postings
+        self.late = set()
+        self.counts = {}
+        self.building = False
+        self.ready = True
+
+        pending = self.take_pending()
+        for community_id, ms, skills in pending:
+            if not self.contains(community_id, ms):
+                self.add(community_id, from_millis(ms), skills)
+
+    def add(self, community_id: ObjectId, registered: datetime, skills: Iterable[int]):
+        """
+        Index a newly saved community
+
+        Args:
+            community_id (ObjectId): id of the community
+            registered (datetime): registeration_date_time of the community
+            skills (Iterable[int]): skill ids of its tech stack
+        """
+        ms = to_millis(registered)
+        if self.building:
+            self.pending.append((community_id, ms, list(skills)))
+            return
+        if not self.ready:
+            # Picked up from the database when the index is built
+            return
+
+        newest = self.newest_in_order(len(self) - 1)
+        if newest >= 0 and (ms, community_id.binary) < self.rank_key(newest, 0)[1:]:
+            # A concurrent save with a later timestamp finished first, or another worker's community caught up by a refresh
+            self.late.add(len(self))
+        self.append(community_id, ms, skills)
+
+    def newest_in_order(self, code: int) -> int:
+        # The closest code at or below this one that did not arrive late, -1 if none
+        while code in self.late:
+            code -= 1
+        return code
+
+    def cutoff(self, ms: int, oid: bytes) -> int:
+        """
+        Highest code whose in-order communities all rank below (ms, oid), -1 if none
+
+        In-order codes rank in code order, so this is a binary search; late
+        codes at or below the cutoff are not covered and are checked by the caller.
+        """
+        key = (ms, oid)
+        low, high = -1, len(self) - 1
+        while low < high:
+            middle = (low + high + 1) // 2
+            code = self.newest_in_order(middle)
+            if code < 0 or (self.millis[code], self.oid_bytes(code)) < key:
+                low = middle
+            else:
+                high = middle - 1
+        return low
+
+    def contains(self, community_id: ObjectId, ms: int) -> bool:
+        key = (ms, community_id.binary)
+        code = self.cutoff(ms, community_id.binary) + 1
+        while code in self.late:
+            code += 1
+        if code < len(self) and self.rank_key(code, 0)[1:] == key:
+            return True
+        return any(self.rank_key(code, 0)[1:] == key for code in self.late)
+
+    def search(self, skills: List[int], match_all: bool = False, limit: int = 10, after: Optional[Tuple] = None) -> List[Tuple[ObjectId, int]]:
+        """
+        Find communities having any (or all) of the given skills
+
+        Args:
+            skills (List[int]): ids of the requested skills
+            match_all (bool): require every skill instead of at least one
+            limit (int): number of results
+            after (Optional[Tuple]): (matched, registeration_date_time, _id) of the last result already seen
+
+        Returns:
+            List[Tuple[ObjectId, int]]: (community id, number of requested skills matched), best first
+        """
+        postings = sorted((self.postings.get(skill, EMPTY) for skill in set(skills)), key=len)
+        if not postings:
+            return []
+        requested = len(postings)
+
+        bound = None
+        if after:
+            matched, registered, last_id = after
+            bound = (matched, to_millis(registered), ObjectId(last_id).binary)
+
+        # Best matches first: every requested skill, then one fewer, ... down to one
+        levels = [requested] if match_all else range(requested, 0, -1)
+        results: List[Tuple[int, int]] = []
+        for matched in levels:
+            if bound and matched > bound[0]:
+                continue
+            start = self.cutoff(bound[1], bound[2]) if bound and matched == bound[0] else None
+            results.extend(self.walk_level(postings, matched, limit - len(results), start))
+            if len(results) == limit:
+                break
+
+        # Late arrivals sit at the end of the postings out of rank order, so they are ranked here
+        late = []
+        for code in self.late:
+            matched = sum(1 for posting in postings if self.has(posting, code))
+            if not matched or (match_all and matched < requested):
+                continue
+            if bound and self.rank_key(code, matched) >= bound:
+                continue
+            late.append((code, matched))
+        if late:
+            results = sorted(results + late, key=lambda result: self.rank_key(*result), reverse=True)[:limit]
+
+        return [(self.oid(code), matched) for code, matched in results]
+
+    def walk_level(self, postings: List[array], matched: int, limit: int, start: Optional[int]) -> List[Tuple[int, int]]:
+        """
+        Newest in-order communities having exactly `matched` of the requested skills
+
+        A community in `matched` of the lists must be in at least one of the
+        len(postings) - matched + 1 shortest ones, so only those are walked
+        (newest first, merged) and the rest are probed with bisect. The walk
+        stops as soon as `limit` communities are found.
+
+        Args:
+            postings (List[array]): posting lists of the requested skills, shortest first
+            matched (int): exact number of requested skills
+            limit (int): number of results wanted
+            start (Optional[int]): highest code to consider, None for all
+        """
+        if limit <= 0:
+            return []
+        walked = postings[:len(postings) - matched + 1]
+        probed = postings[len(postings) - matched + 1:]
+
+        def newest_first(posting: array) -> Iterator[int]:
+            end = len(posting) if start is None else bisect_right(posting, start)
+            return (posting[position] for position in range(end - 1, -1, -1))
+
+        codes = newest_first(walked[0]) if len(walked) == 1 else merge(*map(newest_first, walked), reverse=True)
+
+        results = []
+        previous, seen = None, 0
+        # A code in several walked lists comes out of the merge once per list, one after the other
+        for code in codes:
+            if code == previous:
+                seen += 1
+                continue
+            if previous is not None and self.qualifies(previous, seen, probed, matched):
+                results.append((previous, matched))
+                if len(results) == limit:
+                    return results
+            previous, seen = code, 1
+        if previous is not None and self.qualifies(previous, seen, probed, matched):
+            results.append((previous, matched))
+        return results
+
+    def qualifies(self, code: int, seen: int, probed: List[array], matched: int) -> bool:
+        if code in self.late:
+            return False
+        for posting in probed:
+            if seen > matched:
+                return False
+            if self.has(posting, code):
+                seen += 1
+        return seen == matched
+
+    def count(self, skills: List[int], match_all: bool = False) -> int:
+        """
+        Number of communities having any (or all) of the given skills, ignoring paging
+
+        Counting probes every candidate, so totals are cached per request and
+        kept up to date by append; every page of a search asks for the same one.
+        """
+        key = (frozenset(skills), match_all)
+        if key in self.counts:
+            return self.counts[key]
+
+        postings = sorted((self.postings.get(skill, EMPTY) for skill in key[0]), key=len)
+        if not postings:
+            return 0
+        if match_all:
+            shortest, others = postings[0], postings[1:]
+            total = sum(1 for code in shortest if all(self.has(posting, code) for posting in others))
+        else:
+            total = len(set().union(*postings))
+
+        if len(self.counts) >= MAX_CACHED_COUNTS:
+            # Oldest first
+            del self.counts[next(iter(self.counts))]
+        self.counts[key] = total
+        return total
+
+    def has(self, posting: array, code: int) -> bool:
+        position = bisect_right(posting, code) - 1
+        return position >= 0 and posting[position] == code
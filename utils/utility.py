@@ -1,27 +1,53 @@
-from typing import Optional, Union, Dict
+from typing import AsyncIterator, Callable, Optional, Union, Dict, Tuple
+from collections import Counter
+import asyncio
 import pytz
 from datetime import datetime
+from os import environ
 from bson import ObjectId
+from pymongo import InsertOne, DeleteMany, ReturnDocument
+from pymongo.errors import DuplicateKeyError
 
-from utils.dbHandler import MongoDB
+from utils.dbHandler import AsyncMongoDB, seek_query
+from utils.pagination import clamp_limit
+from utils.skillIndex import SkillIndex, prepare_index, to_millis
+from utils.skillCatalog import SkillCatalog, canonical_key, display_name
+from utils.prefixIndex import PrefixIndex, prepare_entries
+from utils.indexRefresh import IndexRefresher
+from utils.indexes import CASE_INSENSITIVE
+from utils.cache import TTLCache
+from utils.passwords import PasswordHasher
+from utils.metrics import instrumented
+from utils.writePipeline import WritePipeline
+from utils.fields import COMMUNITY_FIELDS, COMMUNITY_SUMMARY_FIELDS, projection, pick
 from schema.UserClient import *
 from schema.UserDb import *
 from schema.CommunityClient import *
 from schema.CommunityDb import *
+from schema.SkillDb import SkillData
 
-mongoDBHandler = MongoDB()
+# Route handlers await this one so a slow query never blocks the event loop.
+# It connects on first use; indexes are created by scripts/createIndexes.py, not at import
+asyncMongoDBHandler = AsyncMongoDB()
+# canonical skill key <-> integer skill id <-> display name, loaded by SkillUtility
+skillCatalog = SkillCatalog(
+    miss_ttl=float(environ.get("SKILL_MISS_TTL", 30)),
+    max_misses=int(environ.get("SKILL_MISS_CACHE_SIZE", 4096))
+)
+# skill id -> communities, built by CommunityUtility.build_skill_index
+skillIndex = SkillIndex()
+# Autocomplete: community names -> (name, id), usernames and skill names, built by SearchUtility
+autocompleteIndex = {
+    "community": PrefixIndex(),
+    "user": PrefixIndex(unique=True),
+    "skill": PrefixIndex(unique=True)
+}
+# scrypt hashing on a bounded worker pool
+passwordHasher = PasswordHasher()
+# Secondary writes that requests need not wait for, coalesced into bulk writes; flushed on shutdown
+writePipeline = WritePipeline(asyncMongoDBHandler.bulk_write)
 
 
-try:
-    if not mongoDBHandler.connect():
-        raise Exception("MongoDB connection failed")
-except Exception as e:
-    print(e)
-
-# Create Indexes on MongoDB fields for faster lookups
-mongoDBHandler.create_index("community_skills", "skill")
-mongoDBHandler.create_index("community", "registeration_date_time")
-
 class Utilities:
     def __init__(self):
         self.tz = pytz.timezone('Asia/Kolkata')
@@ -42,11 +68,136 @@ class Utilities:
         return ist.strftime("%d %B %Y %I:%M %p IST")
 
 
+class SkillUtility:
+    """
+    Canonical skill catalog kept in the skills collection
+
+    Every spelling of a skill maps to one canonical key (utils/skillCatalog.py),
+    and each key gets a small integer id from the "skills" counter. Community
+    and profile skills are interned on save, so the documents store the ids
+    next to the canonical names.
+    """
+    async def load_catalog(self) -> bool:
+        # Once per process; later entries are picked up as they are interned or looked up
+        if skillCatalog.loaded:
+            return True
+        try:
+            docs = await asyncMongoDBHandler.database["skills"].find({}).to_list()
+            skillCatalog.load(docs)
+            return True
+        except Exception as e:
+            print("Error message from utils/utility.py load_catalog function")
+            print("Error loading skill catalog:", e)
+            return False
+
+    async def lookup(self, key: str) -> Optional[Dict]:
+        # Entries created by other workers since the catalog was loaded
+        skill = await asyncMongoDBHandler.find_one("skills", {"key": key})
+        if skill:
+            skillCatalog.remember(skill["_id"], skill["key"], skill["name"])
+        return skill
+
+    async def next_id(self) -> int:
+        counter = await asyncMongoDBHandler.database["counters"].find_one_and_update(
+            {"_id": "skills"},
+            {"$inc": {"seq": 1}},
+            upsert=True,
+            return_document=ReturnDocument.AFTER
+        )
+        return counter["seq"]
+
+    async def create(self, key: str, name: str) -> int:
+        skill = await self.lookup(key)
+        if skill:
+            return skill["_id"]
+
+        skill = SkillData(id=await self.next_id(), key=key, name=display_name(name, key))
+        try:
+            await asyncMongoDBHandler.database["skills"].insert_one(skill.model_dump(by_alias=True))
+        except DuplicateKeyError:
+            # Another worker interned the same key first; its id wins and ours stays unused
+            return (await self.lookup(key))["_id"]
+
+        skillCatalog.remember(skill.id, skill.key, skill.name)
+        autocompleteIndex["skill"].add(skill.name, skill.name)
+        return skill.id
+
+    async def intern(self, names: List[str]) -> List[Tuple[int, str]]:
+        """
+        Ids and canonical names for skills, adding new skills to the catalog
+
+        Args:
+            names (List[str]): skills as submitted, in any spelling
+
+        Returns:
+            List[Tuple[int, str]]: (skill id, canonical name) per distinct skill, in submitted order
+        """
+        await self.load_catalog()
+        interned = {}
+        for name in names or []:
+            key = canonical_key(name)
+            if not key or key in interned:
+                continue
+            skill_id = skillCatalog.ids.get(key)
+            if skill_id is None:
+                skill_id = await self.create(key, name)
+            interned[key] = skill_id
+        return [(skill_id, skillCatalog.name_of(skill_id)) for skill_id in interned.values()]
+
+    async def resolve(self, names: List[str]) -> Dict[str, Optional[int]]:
+        """
+        Ids of existing skills, without adding anything to the catalog
+
+        Args:
+            names (List[str]): skills in any spelling
+
+        Returns:
+            Dict[str, Optional[int]]: canonical key -> skill id, None for skills nobody has
+        """
+        await self.load_catalog()
+        resolved = {}
+        for name in names or []:
+            key = canonical_key(name)
+            if not key or key in resolved:
+                continue
+            skill_id = skillCatalog.ids.get(key)
+            if skill_id is None and not skillCatalog.known_missing(key):
+                skill = await self.lookup(key)
+                if skill:
+                    skill_id = skill["_id"]
+                else:
+                    skillCatalog.remember_missing(key)
+            resolved[key] = skill_id
+        return resolved
+
+
+@instrumented
 class UserUtility:
     def __init__(self):
         self.utility = Utilities()
+        self.skills = SkillUtility()
+        # username -> user document, read through by get_user
+        self.user_cache = TTLCache(
+            maxsize=int(environ.get("USER_CACHE_SIZE", 4096)),
+            ttl=float(environ.get("USER_CACHE_TTL", 60))
+        )
+        # username -> _id; ids never change, so these can live much longer
+        self.user_id_cache = TTLCache(
+            maxsize=int(environ.get("USER_ID_CACHE_SIZE", 16384)),
+            ttl=float(environ.get("USER_ID_CACHE_TTL", 3600))
+        )
+
+    def invalidate_user(self, username: str):
+        self.user_cache.invalidate(username)
+        self.user_id_cache.invalidate(username)
 
-    def save_user(self, user: Register) -> Optional[ObjectId]|None:
+    def cache_stats(self) -> Dict[str, Dict[str, int]]:
+        return {
+            "user": self.user_cache.stats(),
+            "user_id": self.user_id_cache.stats()
+        }
+
+    async def save_user(self, user: Register) -> Optional[ObjectId]|None:
         """
         Save user details to MongoDB
 
@@ -61,10 +212,15 @@ class UserUtility:
             user_data = user.model_dump()
             user_data["role"] = "user"
             user_data["registeration_date_time"] = f"{formatted_date} {formatted_time}"
+            # Slow hash, computed off the event loop
+            user_data["password"] = await passwordHasher.hash(user.password)
             user_data = UserData(**user_data)
 
             # Save data to MongoDB
-            student_inquiry_id:ObjectId = mongoDBHandler.insert("user", user_data)
+            student_inquiry_id:ObjectId = await asyncMongoDBHandler.insert("user", user_data)
+            self.invalidate_user(user.username)
+            if student_inquiry_id:
+                autocompleteIndex["user"].add(user.username, user.username)
             return student_inquiry_id
         
         except Exception as e:
@@ -72,9 +228,9 @@ class UserUtility:
             print(e)
             return None
     
-    def get_user(self, username: str) -> Union[Dict, None]:
+    async def get_user(self, username: str) -> Union[Dict, None]:
         """
-        Get user details from MongoDB
+        Get user details, from the cache when possible, otherwise from MongoDB
 
         Args:
             username (str): username of the user
@@ -83,24 +239,85 @@ class UserUtility:
             Union[Dict, None]: user details
         """
         try:
-            return mongoDBHandler.find_one("user", {"username": username})
+            user = self.user_cache.get(username)
+            if user is None:
+                # Unknown usernames are not cached, a signup elsewhere must be visible at once
+                user = await asyncMongoDBHandler.find_one("user", {"username": username})
+                if not user:
+                    return None
+                self.user_cache.set(username, user)
+                self.user_id_cache.set(username, user["_id"])
+            return dict(user)
         except Exception as e:
             print("Exception while getting data from MongoDB\nError Message from utils/utility.py get_user function")
             print(e)
             return None
+
+    async def get_user_id(self, username: str) -> Optional[ObjectId]:
+        """
+        Resolve a username to the user's _id
+
+        Args:
+            username (str): username of the user
+
+        Returns:
+            Optional[ObjectId]: user id, None if the user does not exist
+        """
+        user_id = self.user_id_cache.get(username)
+        if user_id is None:
+            # Only the _id, not the password hash and the rest of the user document
+            user = await asyncMongoDBHandler.find_one("user", {"username": username}, {"_id": 1})
+            user_id = user["_id"] if user else None
+            if user_id is not None:
+                self.user_id_cache.set(username, user_id)
+        return user_id
     
-    def validate_password(self, given_password, original_password):
-        return given_password == original_password
+    async def validate_password(self, given_password: str, user: Dict) -> bool:
+        """
+        Check a login password, upgrading the stored hash when needed
+
+        Legacy plaintext rows, and hashes made with older cost parameters,
+        are rehashed transparently after a successful check.
+
+        Args:
+            given_password (str): password from the login request
+            user (Dict): user document
+
+        Returns:
+            bool: whether the password is correct
+        """
+        stored_password = user["password"]
+        if not await passwordHasher.verify(given_password, stored_password):
+            return False
+
+        if passwordHasher.needs_rehash(stored_password):
+            try:
+                new_password = await passwordHasher.hash(given_password)
+                # Matching on the old value keeps a concurrent rehash from being overwritten
+                await asyncMongoDBHandler.update(
+                    "user",
+                    {"_id": user["_id"], "password": stored_password},
+                    {"password": new_password}
+                )
+                self.user_cache.invalidate(user["username"])
+            except Exception as e:
+                print("Exception while rehashing password\nError Message from utils/utility.py validate_password function")
+                print(e)
+        return True
     
-    def filter_user_data(self, user) -> Register:
+    def filter_user_data(self, user) -> UserDetails:
+        # The password hash never leaves the server
         filtered_user = {
             "username": user["username"],
             "name": user["name"],
-            "email": user["email"],
-            "password": user["password"]
+            "email": user["email"]
         }
         
-        return Register(**filtered_user)
+        return UserDetails(**filtered_user)
+
+    def public_user(self, user: Dict, fields: Optional[Tuple[str, ...]] = None) -> Dict:
+        # filter_user_data narrowed to a ?fields= selection
+        return pick(self.filter_user_data(user).model_dump(), fields)
     
     def filter_user_profile_data(self, user) -> UserProfile:
         filtered_user = {
@@ -112,55 +329,177 @@ class UserUtility:
         
         return UserProfile(**filtered_user)
 
-    def save_profile(self, user_id: ObjectId, profile_data: UserProfile) -> bool:
+    def build_skill_docs(self, user_id: ObjectId, skills: List[Tuple[int, str]]) -> List[UserSkills]:
+        # skills as interned by SkillUtility: (skill id, canonical name)
+        return [
+            UserSkills(
+                user_id=user_id,
+                skill=skill,
+                skill_id=skill_id
+                # level=skill.level
+            )
+            for skill_id, skill in skills or []
+        ]
+
+    def build_project_docs(self, user_id: ObjectId, projects: List[Project]) -> List[UserProjects]:
+        return [
+            UserProjects(
+                user_id=user_id,
+                title=project.title,
+                # description=project.description,
+                link=project.link
+            )
+            for project in projects or []
+        ]
+
+    async def save_skills_and_projects(self, user_id: ObjectId, profile_data: UserProfile) -> bool:
+        """
+        Write a profile's skills and projects with one batch per collection
+
+        Args:
+            user_id (ObjectId): owner of the profile
+            profile_data (UserProfile): submitted profile
+
+        Returns:
+            bool: False if any batch failed, fully or partially
+        """
+        skills = await self.skills.intern(profile_data.skills) if profile_data.skills else []
+        batches = []
+        for collection_name, docs in (
+            ("user_skills", self.build_skill_docs(user_id, skills)),
+            ("user_projects", self.build_project_docs(user_id, profile_data.projects))
+        ):
+            if docs:
+                batches.append(asyncMongoDBHandler.insert_many(collection_name, docs))
+
+        results = await asyncio.gather(*batches)
+        return all(result and not result["errors"] for result in results)
+
+    def diff_rows(self, stored: List[Dict], desired: List[Dict], key: Callable[[Dict], object]) -> Tuple[List[ObjectId], List[Dict]]:
+        """
+        Smallest set of deletes and inserts turning the stored rows into the desired ones
+
+        Rows are compared on key, duplicates included, so a row that is both
+        stored and submitted is left alone whatever its position.
+
+        Args:
+            stored (List[Dict]): rows currently in the collection
+            desired (List[Dict]): rows the profile should end up with
+            key (Callable[[Dict], object]): what makes two rows the same
+
+        Returns:
+            Tuple[List[ObjectId], List[Dict]]: _ids of the stored rows to delete, desired rows to insert
+        """
+        unmatched = Counter(key(row) for row in desired)
+        deletes = []
+        for row in stored:
+            if unmatched[key(row)] > 0:
+                unmatched[key(row)] -= 1
+            else:
+                deletes.append(row["_id"])
+
+        inserts = []
+        for row in desired:
+            if unmatched[key(row)] > 0:
+                unmatched[key(row)] -= 1
+                inserts.append(row)
+        return deletes, inserts
+
+    async def update_skills_and_projects(self, user_id: ObjectId, profile_data: UserProfile) -> Optional[bool]:
+        """
+        Apply only the difference between stored and submitted skills and projects
+
+        Lists that were not submitted (or are empty) are left untouched, as
+        before. Skills are compared on their canonical key, so resubmitting
+        "reactjs" for a stored "React" changes nothing; projects on title and link.
+
+        Args:
+            user_id (ObjectId): owner of the profile
+            profile_data (UserProfile): submitted profile
+
+        Returns:
+            Optional[bool]: whether anything was written, None if a batch failed
+        """
+        changes = []
+        if profile_data.skills:
+            stored = await asyncMongoDBHandler.find("user_skills", {"user_id": user_id}, {"skill": 1})
+            desired = [doc.model_dump() for doc in self.build_skill_docs(user_id, await self.skills.intern(profile_data.skills))]
+            changes.append(("user_skills", self.diff_rows(stored, desired, key=lambda row: canonical_key(row["skill"]))))
+        if profile_data.projects:
+            stored = await asyncMongoDBHandler.find("user_projects", {"user_id": user_id}, {"title": 1, "link": 1})
+            desired = [doc.model_dump() for doc in self.build_project_docs(user_id, profile_data.projects)]
+            changes.append(("user_projects", self.diff_rows(stored, desired, key=lambda row: (row["title"], row["link"]))))
+
+        batches = []
+        for collection_name, (deletes, inserts) in changes:
+            operations = [DeleteMany({"_id": {"$in": deletes}})] if deletes else []
+            operations += [InsertOne(row) for row in inserts]
+            if operations:
+                batches.append(asyncMongoDBHandler.bulk_write(collection_name, operations))
+        if not batches:
+            return False
+
+        results = await asyncio.gather(*batches)
+        if not all(result and not result["errors"] for result in results):
+            return None
+        return True
+
+    async def save_profile(self, user_id: ObjectId, profile_data: UserProfile) -> bool:
         try:
             # Save User Casual Data
             profile_dict = profile_data.model_dump(exclude={'skills', 'projects'})
             profile_dict['user_id'] = user_id            
+            profile_dict['version'] = self.new_profile_version()
             profile = UserProfileData(**profile_dict)
             
-            # Save to MongoDB
-            mongoDBHandler.insert("user_profiles", profile)
-
-            # Save Skills
-            if profile_data.skills:
-                for skill in profile_data.skills:
-                    skill_doc = UserSkills(
-                        user_id=user_id,
-                        skill=skill,
-                        # level=skill.level
-                    )
-                    mongoDBHandler.insert("user_skills", skill_doc)
-
-            # Save Projects
-            if profile_data.projects:
-                for project in profile_data.projects:
-                    project_doc = UserProjects(
-                        user_id=user_id,
-                        title=project.title,
-                        # description=project.description,
-                        link=project.link
-                    )
-                    mongoDBHandler.insert("user_projects", project_doc)
-            
-            return True
+            # Save Skills and Projects, one batch per collection
+            if not await self.save_skills_and_projects(user_id, profile_data):
+                return False
+
+            # Profile (and its version) last, so a reader never pairs the new version with old skills
+            return bool(await asyncMongoDBHandler.insert("user_profiles", profile))
         
         except Exception as e:
             print("Exception while saving data in MongoDB\nError Message from utils/utility.py save_profile function")
             print(e)
             return 
     
-    def get_profile(self, user_id: ObjectId) -> Union[Dict, None]:
+    def new_profile_version(self) -> str:
+        # Changes on every profile write; used as the profile's ETag stamp
+        return str(ObjectId())
+
+    async def get_profile_version(self, username: str) -> Optional[str]:
+        """
+        Get the version stamp of a user's profile without assembling it
+
+        Args:
+            username (str): username of the user
+
+        Returns:
+            Optional[str]: version, None if unknown (no profile, or saved before versions existed)
+        """
+        try:
+            user_id = await self.get_user_id(username)
+            if not user_id:
+                return None
+            profile = await asyncMongoDBHandler.find_one("user_profiles", {"user_id": user_id}, {"_id": 0, "version": 1})
+            return profile.get("version") if profile else None
+        except Exception as e:
+            print("Exception while getting data from MongoDB\nError Message from utils/utility.py get_profile_version function")
+            print(e)
+            return None
+
+    async def get_profile(self, user_id: ObjectId) -> Union[Dict, None]:
         try:
-            return mongoDBHandler.find_one("user_profiles", {"user_id": user_id})
+            return await asyncMongoDBHandler.find_one("user_profiles", {"user_id": user_id})
         except Exception as e:
             print("Exception while getting data from MongoDB\nError Message from utils/utility.py get_profile function")
             print(e)
             return None
 
-    def get_skills(self, user_id: ObjectId) -> Dict[str, str] | None:
+    async def get_skills(self, user_id: ObjectId) -> Dict[str, str] | None:
         try:
-            skills = mongoDBHandler.find("user_skills", {"user_id": user_id})
+            skills = await asyncMongoDBHandler.find("user_skills", {"user_id": user_id}, {"_id": 0, "skill": 1})
             skills = [
                 skill["skill"]
                 for skill in skills
@@ -172,9 +511,9 @@ class UserUtility:
             print(e)
             return None
     
-    def get_projects(self, user_id: ObjectId) -> Union[List[Dict], None]:
+    async def get_projects(self, user_id: ObjectId) -> Union[List[Dict], None]:
         try:
-            projects = mongoDBHandler.find("user_projects", {"user_id": user_id})
+            projects = await asyncMongoDBHandler.find("user_projects", {"user_id": user_id}, {"_id": 0, "title": 1, "link": 1})
             projects = [
                 {
                     "title": project["title"],
@@ -189,51 +528,250 @@ class UserUtility:
             print(e)
             return None
 
-    def update_profile(self, user_id: ObjectId, profile_data: UserProfile) -> bool:
+    def build_profile_pipeline(self, match: Dict, fields: Optional[Tuple[str, ...]] = None) -> List[Dict]:
+        """
+        user -> user_profiles/user_skills/user_projects, assembled server side
+
+        The profile is always joined (its version backs the ETag); skills and
+        projects only when fields asks for them, which saves a $lookup each.
+        """
+        pipeline = [
+            {
+                "$match": match
+            },
+            {
+                "$lookup": {
+                    "from": "user_profiles",
+                    "localField": "_id",
+                    "foreignField": "user_id",
+                    "as": "profile"
+                }
+            }
+        ]
+        shape = {
+            "_id": 0,
+            "username": 1,
+            "profile": {"$arrayElemAt": ["$profile", 0]}
+        }
+        if fields is None or "skills" in fields:
+            pipeline.append({
+                "$lookup": {
+                    "from": "user_skills",
+                    "localField": "_id",
+                    "foreignField": "user_id",
+                    "as": "skills"
+                }
+            })
+            shape["skills"] = "$skills.skill"
+        if fields is None or "projects" in fields:
+            pipeline.append({
+                "$lookup": {
+                    "from": "user_projects",
+                    "localField": "_id",
+                    "foreignField": "user_id",
+                    "as": "projects"
+                }
+            })
+            shape["projects"] = {
+                "$map": {
+                    "input": "$projects",
+                    "in": {"title": "$$this.title", "link": "$$this.link"}
+                }
+            }
+        pipeline.append({"$project": shape})
+        return pipeline
+
+    def public_profile(self, full_profile: Dict, fields: Optional[Tuple[str, ...]] = None) -> Dict:
+        # Trusted documents from our own collections, shaped like UserProfile without validating them
+        profile = full_profile["profile"]
+        public = {
+            "bio": profile.get("bio"),
+            "linkedin_url": profile.get("linkedin_url"),
+            "github_url": profile.get("github_url"),
+            "portfolio_url": profile.get("portfolio_url"),
+            "years_exp": profile["years_exp"],
+            "skills": full_profile.get("skills"),
+            "projects": full_profile.get("projects")
+        }
+        return pick(public, fields)
+
+    async def get_full_profile(self, username: str, fields: Optional[Tuple[str, ...]] = None) -> Union[Dict, None]:
+        """
+        Get a user's profile, skills and projects in one aggregation
+
+        Args:
+            username (str): username of the user
+            fields (Optional[Tuple[str, ...]]): profile fields wanted, everything when None
+
+        Returns:
+            Union[Dict, None]: None if the user does not exist, otherwise
+            {"profile": profile fields or None, "skills": [...], "projects": [...]}
+        """
         try:
-            # Save User Casual Data
-            profile_dict = profile_data.model_dump(exclude={'skills', 'projects'})
-            profile_dict['user_id'] = user_id            
-            profile = UserProfileData(**profile_dict)
+            results = await asyncMongoDBHandler.aggregate("user", self.build_profile_pipeline({"username": username}, fields))
+            if not results:
+                return None
             
-            # Save to MongoDB
-            mongoDBHandler.update("user_profiles", {"user_id": user_id}, profile)
-
-            # Save Skills
-            if profile_data.skills:
-                mongoDBHandler.delete_many("user_skills", {"user_id": user_id})
-                for skill in profile_data.skills:
-                    skill_doc = UserSkills(
-                        user_id=user_id,
-                        skill=skill.skill,
-                        # level=skill.level
-                    )
-                    mongoDBHandler.insert("user_skills", skill_doc)
-
-            # Save Projects
-            if profile_data.projects:
-                mongoDBHandler.delete_many("user_projects", {"user_id": user_id})
-                for project in profile_data.projects:
-                    project_doc = UserProjects(
-                        user_id=user_id,
-                        title=project.title,
-                        # description=project.description,
-                        link=project.link
+            full_profile = results[0]
+            full_profile.setdefault("profile", None)
+            return full_profile
+        
+        except Exception as e:
+            print("Exception while getting data from MongoDB\nError Message from utils/utility.py get_full_profile function")
+            print(e)
+            return None
+
+    async def get_full_profiles(self, usernames: List[str], fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Optional[Dict]]:
+        """
+        Get many users' profiles, skills and projects in one aggregation
+
+        The same pipeline as get_full_profile, matched with $in, so the cost
+        is one round trip per batch rather than per user.
+
+        Args:
+            usernames (List[str]): usernames of the users
+            fields (Optional[Tuple[str, ...]]): profile fields wanted, everything when None
+
+        Returns:
+            Dict[str, Optional[Dict]]: username -> None if the user does not exist,
+            otherwise {"username", "profile": profile fields or None, "skills": [...], "projects": [...]};
+            None on error
+        """
+        found = {username: None for username in usernames}
+        try:
+            results = await asyncMongoDBHandler.aggregate(
+                "user", self.build_profile_pipeline({"username": {"$in": list(found)}}, fields)
+            )
+            if results is None:
+                return None
+            for full_profile in results:
+                full_profile.setdefault("profile", None)
+                found[full_profile["username"]] = full_profile
+            return found
+
+        except Exception as e:
+            print("Exception while getting data from MongoDB\nError Message from utils/utility.py get_full_profiles function")
+            print(e)
+            return None
+
+    async def export_users(self, with_skills: bool = False, batch_size: int = 1000, after: ObjectId = None) -> AsyncIterator[List[Dict]]:
+        """
+        Every user in _id order, one batch at a time, for bulk consumers
+
+        Args:
+            with_skills (bool): join skills from user_skills, one $in query per batch
+            batch_size (int): users per batch
+            after (ObjectId): resume after this user id
+
+        Yields:
+            List[Dict]: users as {"id", "username", "name", "email", "registeration_date_time"}, never the password
+        """
+        try:
+            projection = {"username": 1, "name": 1, "email": 1, "registeration_date_time": 1}
+            async for users in asyncMongoDBHandler.stream_batches("user", projection=projection, batch_size=batch_size, after=after):
+                if with_skills:
+                    skills = {user["_id"]: [] for user in users}
+                    rows = asyncMongoDBHandler.database["user_skills"].find(
+                        {"user_id": {"$in": list(skills)}}, {"_id": 0, "user_id": 1, "skill": 1}
                     )
-                    mongoDBHandler.insert("user_projects", project_doc)
-            
-            return True
+                    async for row in rows:
+                        skills[row["user_id"]].append(row["skill"])
+
+                batch = []
+                for user in users:
+                    user = {"id": user.pop("_id"), **user}
+                    if with_skills:
+                        user["skills"] = skills[user["id"]]
+                    batch.append(user)
+                yield batch
+
+        except Exception as e:
+            # Re-raised: a half-sent stream must end in an error, not look complete
+            print("Exception while reading data from MongoDB\nError Message from utils/utility.py export_users function")
+            print(e)
+            raise
+
+    async def update_profile(self, user_id: ObjectId, profile_data: UserProfile, username: str = None) -> bool:
+        """
+        Update a profile by writing only what changed
+
+        Skills and projects get one bulk_write per collection holding just the
+        needed deletes and inserts, and the profile document a $set of the
+        changed fields. Resubmitting an unchanged profile writes nothing and
+        keeps its version, so cached ETags stay valid.
+
+        Args:
+            user_id (ObjectId): owner of the profile
+            profile_data (UserProfile): submitted profile
+            username (str): invalidated in the user cache when something changed
+
+        Returns:
+            bool: False if any write failed
+        """
+        try:
+            profile_dict = profile_data.model_dump(exclude={'skills', 'projects'})
+            profile_dict['user_id'] = user_id
+            fields = UserProfileData(**profile_dict).model_dump(exclude={'user_id', 'version'})
+            stored_profile = await asyncMongoDBHandler.find_one("user_profiles", {"user_id": user_id}, projection(fields)) or {}
+            changed_fields = {field: value for field, value in fields.items() if stored_profile.get(field) != value}
+
+            # Skills and projects first; None means a batch failed, possibly after writing part of it
+            lists_changed = await self.update_skills_and_projects(user_id, profile_data)
+            if lists_changed is False and not changed_fields:
+                return True
+
+            # Profile (and its version) last, so a reader never pairs the new version with old skills
+            changed_fields['version'] = self.new_profile_version()
+            saved = await asyncMongoDBHandler.update("user_profiles", {"user_id": user_id}, changed_fields)
+            if username:
+                # The _id mapping stays valid, only the document may be stale
+                self.user_cache.invalidate(username)
+            return saved and lists_changed is not None
         
         except Exception as e:
             print("Exception while saving data in MongoDB\nError Message from utils/utility.py update_profile function")
             print(e)
             return
         
+@instrumented
 class CommunityUtility:
     def __init__(self):
         self.utility = Utilities()
+        self.skills = SkillUtility()
+        self.skill_index_task = None
+        self.skill_index_refresher = IndexRefresher("skill", self.refresh_skill_index)
+        # Past this many out-of-order communities, searches pay for ranking them and the index is rebuilt
+        self.skill_index_max_late = int(environ.get("SKILL_INDEX_MAX_LATE", 1000))
+
+    def public_community(self, comm: Dict, fields: Optional[Tuple[str, ...]] = None) -> Dict:
+        # Trusted document from our own collection, shaped like Community without validating it;
+        # fields narrows it to a ?fields= selection, read with community_projection(fields)
+        community = {
+            "creator_username": comm.get("creator_username"),
+            "name": comm.get("name"),
+            "tech_stack": comm.get("tech_stack", []),
+            "experience": comm.get("experience")
+        }
+        return pick(community, fields)
+
+    def public_community_summary(self, comm: Dict, fields: Optional[Tuple[str, ...]] = None) -> Dict:
+        # Shaped like CommunityResponse; FastJSONResponse renders the ObjectId
+        summary = {
+            "id": comm["_id"],
+            "name": comm.get("name"),
+            "experience": comm.get("experience")
+        }
+        return pick(summary, fields)
 
-    def save_community(self, community: Community) -> Optional[ObjectId]|None:
+    def community_projection(self, fields: Optional[Tuple[str, ...]] = None, *required: str) -> Dict[str, int]:
+        # Only what the response needs: skill_ids and anything added later stay on the server
+        return projection(fields or COMMUNITY_FIELDS, *required)
+
+    def wants_tech_stack(self, fields: Optional[Tuple[str, ...]]) -> bool:
+        # Without tech_stack in the projection every document would look unmigrated
+        return fields is None or "tech_stack" in fields
+
+    async def save_community(self, community: Community) -> Optional[ObjectId]|None:
         """
         Save community details to MongoDB
 
@@ -245,20 +783,33 @@ class CommunityUtility:
         """
         try:
             now = datetime.now(pytz.UTC)
+            skills = await self.skills.intern(community.tech_stack)
             community_data = community.model_dump()
+            # Canonical names, so "reactjs" and "React.js" are both stored as "React"
+            community_data["tech_stack"] = [skill for _, skill in skills]
+            community_data["skill_ids"] = [skill_id for skill_id, _ in skills]
             community_data["registeration_date_time"] = now
             community_data = CommunityData(**community_data)
 
-            # Save data to MongoDB
-            community_id:ObjectId = mongoDBHandler.insert("community", community_data)
+            # Save data to MongoDB, tech stack embedded for single-document reads
+            community_id:ObjectId = await asyncMongoDBHandler.insert("community", community_data)
+            if not community_id:
+                return None
+            skillIndex.add(community_id, now, community_data.skill_ids)
+            autocompleteIndex["community"].add(community.name, (community.name, community_id))
 
-            # Save Tech Stack
-            for tech_stack in community.tech_stack:
-                tech_stack_doc = CommunitySkill(
+            # Keep community_skills in step, one row per skill. Reads and the skill index use
+            # the embedded tech_stack/skill_ids, so with WRITE_PIPELINE=1 the rows are queued
+            # instead of making the client wait for them
+            tech_stack_docs = [
+                CommunitySkill(
                     community_id=community_id,
-                    skill=tech_stack
+                    skill=skill,
+                    skill_id=skill_id
                 )
-                mongoDBHandler.insert("community_skills", tech_stack_doc)
+                for skill_id, skill in skills
+            ]
+            await writePipeline.submit("community_skills", [InsertOne(doc.model_dump()) for doc in tech_stack_docs])
 
             return community_id
         
@@ -267,108 +818,579 @@ class CommunityUtility:
             print(e)
             return None
         
-    def get_community(self, community_id: str) -> Community|None:
-        try:
-            community_data = mongoDBHandler.find_one("community", {"_id": ObjectId(community_id)})
-            required_tech_stacks = mongoDBHandler.find("community_skills", {"community_id": ObjectId(community_id)})
+    async def fill_missing_tech_stacks(self, communities: List[Dict]) -> List[Dict]:
+        """
+        Attach tech stacks to communities saved before tech_stack was embedded
+
+        Documents not yet backfilled by scripts/migrateTechStack.py are read
+        from community_skills with a single $in query, so reads keep working
+        while the migration runs.
+        """
+        pending = [comm["_id"] for comm in communities if "tech_stack" not in comm]
+        if not pending:
+            return communities
+
+        tech_stacks = {community_id: [] for community_id in pending}
+        required_tech_stacks = await asyncMongoDBHandler.find(
+            "community_skills", {"community_id": {"$in": pending}}, {"_id": 0, "community_id": 1, "skill": 1}
+        )
+        for tech_stack in required_tech_stacks:
+            tech_stacks[tech_stack["community_id"]].append(tech_stack["skill"])
 
+        for comm in communities:
+            if "tech_stack" not in comm:
+                comm["tech_stack"] = tech_stacks[comm["_id"]]
+        return communities
+
+    async def get_community(self, community_id: str, fields: Optional[Tuple[str, ...]] = None) -> Dict|None:
+        try:
+            community_data = await asyncMongoDBHandler.find_one(
+                "community", {"_id": ObjectId(community_id)}, self.community_projection(fields)
+            )
             if not community_data:
                 return None
             
-            community_data["tech_stack"] = [tech_stack["skill"] for tech_stack in required_tech_stacks]
-            community_data = Community(**community_data)  
-            return community_data
+            if self.wants_tech_stack(fields):
+                community_data, = await self.fill_missing_tech_stacks([community_data])
+            return self.public_community(community_data, fields)
         
         except Exception as e:
             print("Exception while getting data from MongoDB\nError Message from utils/utility.py get_community function")
             print(e)
             return None
         
-    def get_latest_communities(self, limit: int = 10, page:int = 1) -> List[Community]:
+    async def get_communities(self, community_ids: List[str], fields: Optional[Tuple[str, ...]] = None) -> Dict[str, Optional[Dict]]:
+        """
+        Get many communities at once, as get_community would return each of them
+
+        One $in query for the communities plus at most one for tech stacks not
+        yet embedded, however many ids are asked for.
+
+        Args:
+            community_ids (List[str]): community ids, invalid ones are reported as not found
+            fields (Optional[Tuple[str, ...]]): community fields wanted, everything when None
+
+        Returns:
+            Dict[str, Optional[Dict]]: requested id, as sent -> community, None when it does not exist; None on error
+        """
+        found = {community_id: None for community_id in community_ids}
+        try:
+            # Ids are hex in any case, so several request strings can name the same community
+            requested: Dict[ObjectId, List[str]] = {}
+            for community_id in found:
+                if ObjectId.is_valid(community_id):
+                    requested.setdefault(ObjectId(community_id), []).append(community_id)
+            if not requested:
+                return found
+
+            communities = await asyncMongoDBHandler.find("community", {"_id": {"$in": list(requested)}}, self.community_projection(fields))
+            if self.wants_tech_stack(fields):
+                communities = await self.fill_missing_tech_stacks(communities)
+            for comm in communities:
+                community = self.public_community(comm, fields)
+                for community_id in requested[comm["_id"]]:
+                    found[community_id] = community
+            return found
+
+        except Exception as e:
+            print("Exception while getting data from MongoDB\nError Message from utils/utility.py get_communities function")
+            print(e)
+            return None
+
+    async def export_communities(self, with_tech_stack: bool = False, batch_size: int = 1000, after: ObjectId = None) -> AsyncIterator[List[Dict]]:
+        """
+        Every community in _id order, one batch at a time, for bulk consumers
+
+        Args:
+            with_tech_stack (bool): include tech stacks; embedded, so only communities
+                not yet migrated cost a community_skills query per batch
+            batch_size (int): communities per batch
+            after (ObjectId): resume after this community id
+
+        Yields:
+            List[Dict]: communities as {"id", "name", "creator_username", "experience", "registeration_date_time"}
+        """
+        try:
+            projection = {"name": 1, "creator_username": 1, "experience": 1, "registeration_date_time": 1}
+            if with_tech_stack:
+                projection["tech_stack"] = 1
+            async for communities in asyncMongoDBHandler.stream_batches("community", projection=projection, batch_size=batch_size, after=after):
+                if with_tech_stack:
+                    communities = await self.fill_missing_tech_stacks(communities)
+                yield [{"id": comm.pop("_id"), **comm} for comm in communities]
+
+        except Exception as e:
+            # Re-raised: a half-sent stream must end in an error, not look complete
+            print("Exception while reading data from MongoDB\nError Message from utils/utility.py export_communities function")
+            print(e)
+            raise
+
+    def split_page(self, communities: List[Dict], limit: int, sort_fields: Tuple = ("registeration_date_time",)) -> Tuple[List[Dict], Optional[Tuple]]:
+        # One extra document is fetched to tell whether another page exists
+        if len(communities) <= limit:
+            return communities, None
+        
+        communities = communities[:limit]
+        last = communities[-1]
+        return communities, tuple(last[field] for field in sort_fields) + (last["_id"],)
+
+    async def get_latest_communities(self, limit: int = 10, page:int = 1, after: Tuple = None, fields: Optional[Tuple[str, ...]] = None) -> Tuple[List[Dict], Optional[Tuple]]:
+        """
+        Get the newest communities, one page at a time
+
+        Args:
+            limit (int): page size
+            page (int): page number, used only when no keyset position is given
+            after (Tuple): (registeration_date_time, _id) of the last community already seen
+            fields (Optional[Tuple[str, ...]]): community fields wanted, everything when None
+
+        Returns:
+            Tuple[List[Dict], Optional[Tuple]]: communities (shaped like Community) and the keyset position of the next page, if any
+        """
         try:
-            skip = (page - 1) * limit
-            communities = mongoDBHandler.find_with_sort(
+            limit = clamp_limit(limit)
+            skip = None if after else (page - 1) * limit
+            communities = await asyncMongoDBHandler.find_with_sort(
                 collection_name="community",
                 sort_field="registeration_date_time",
                 skip=skip,
-                limit=limit
+                limit=limit + 1,
+                after=after,
+                projection=self.community_projection(fields, "registeration_date_time")
             )
             if not communities:
-                return []
-            
-            community_ids = [comm["_id"] for comm in communities]
-
-            required_tech_stacks = mongoDBHandler.find("community_skills", {"community_id": {"$in": community_ids}})
-            for comm in communities:
-                comm["tech_stack"] = [tech_stack["skill"] for tech_stack in required_tech_stacks if tech_stack["community_id"] == comm["_id"]]
+                return [], None
             
-            return [Community(**comm) for comm in communities]
+            communities, next_key = self.split_page(communities, limit)
+            if self.wants_tech_stack(fields):
+                communities = await self.fill_missing_tech_stacks(communities)
+            return [self.public_community(comm, fields) for comm in communities], next_key
         except Exception as e:
             print("Error fetching latest communities:", e)
-            return []
+            return [], None
+
+    async def build_skill_index(self) -> bool:
+        """
+        Build the in-memory skill index from the skill_ids embedded in community
 
-    def search_community_by_skills(self, skills: List[str], limit: int = 10) -> List[Community] | None:
+        Communities without skill_ids (not yet migrated by
+        scripts/migrateSkillIds.py) are indexed without skills.
+
+        Returns:
+            bool: whether the index is ready to serve searches
+        """
         try:
-            pipeline = [
-                {
-                    "$match": {
-                        "skill": {"$in": skills}
-                    }
-                },
-                {
-                    "$group": {
-                        "_id": "$community_id",
-                        "tech_stack": {"$addToSet": "$skill"}
-                    }
-                },
-                {
-                    "$lookup": {
-                        "from": "community",
-                        "localField": "_id",
-                        "foreignField": "_id",
-                        "as": "community_details"
-                    }
-                },
-                {
-                    "$unwind": "$community_details"
-                },
-                {
-                    "$limit": limit
-                },
-                {
-                    "$sort": {
-                        "community_details.registeration_date_time": -1
-                    }
-                },
-                {
-                    "$project": {
-                        "name": "$community_details.name",
-                        "creator_username": "$community_details.creator_username",
-                        "exp_level": "$community_details.exp_level",
-                        "registeration_date_time": "$community_details.registeration_date_time",
-                        "tech_stack": 1,
-                        "_id": 0
-                    }
-                }
+            skillIndex.start_build()
+            started = datetime.now(pytz.UTC)
+            await self.skills.load_catalog()
+            communities = [
+                (comm["_id"], comm["registeration_date_time"], comm.get("skill_ids", []))
+                async for comm in asyncMongoDBHandler.database["community"]
+                .find({}, {"registeration_date_time": 1, "skill_ids": 1})
+                .batch_size(5000)
             ]
-            results = mongoDBHandler.aggregate("community_skills", pipeline)
+            # Sorting and coding a large snapshot is CPU work: done in a thread so the
+            # event loop keeps serving requests, which queue their saves until install
+            prepared = await asyncio.to_thread(prepare_index, communities, skillIndex.take_pending())
+            del communities
+            skillIndex.install(*prepared)
+            self.skill_index_refresher.built(started)
+            print(f"Skill index built: {len(skillIndex)} communities, {len(skillIndex.postings)} skills")
+            return True
+        
+        except Exception as e:
+            skillIndex.building = False
+            print("Error message from utils/utility.py build_skill_index function")
+            print("Error building skill index:", e)
+            return False
+
+    def start_skill_index_build(self, rebuild: bool = False):
+        """
+        Build the skill index in the background unless it is ready or already being built
+
+        Called on the first search rather than at startup, so a cold start does
+        not scan every community before serving its first request. A rebuild
+        keeps serving the current index until the new one is installed.
+
+        Args:
+            rebuild (bool): build again even though the index is ready
+        """
+        if (skillIndex.ready and not rebuild) or skillIndex.building:
+            return
+        if self.skill_index_task is None or self.skill_index_task.done():
+            self.skill_index_task = asyncio.create_task(self.build_skill_index())
+
+    def stop_skill_index_build(self):
+        self.skill_index_refresher.stop()
+        if self.skill_index_task is not None:
+            self.skill_index_task.cancel()
+            self.skill_index_task = None
+
+    async def refresh_skill_index(self, since: datetime) -> int:
+        """
+        Index communities saved by other workers since the given time
+
+        Run by skill_index_refresher; communities this worker saved, or
+        already picked up by an earlier refresh, are skipped. Most of them
+        arrive out of rank order, so once too many have piled up the index
+        is rebuilt to put them in place.
+
+        Args:
+            since (datetime): registeration_date_time to read from
+
+        Returns:
+            int: number of communities added
+        """
+        communities = await asyncMongoDBHandler.find(
+            "community",
+            {"registeration_date_time": {"$gte": since}},
+            {"registeration_date_time": 1, "skill_ids": 1}
+        )
+        added = 0
+        for comm in communities:
+            registered = comm["registeration_date_time"]
+            if skillIndex.contains(comm["_id"], to_millis(registered)):
+                continue
+            skillIndex.add(comm["_id"], registered, comm.get("skill_ids", []))
+            added += 1
+        if len(skillIndex.late) > self.skill_index_max_late:
+            self.start_skill_index_build(rebuild=True)
+        return added
+
+    async def search_community_by_skills(self, skills: List[str], limit: int = 10, after: Tuple = None, match_all: bool = False, with_total: bool = False) -> Tuple[List[Dict], Optional[Tuple], Optional[int]]:
+        """
+        Search communities by tech stack, best match first
+
+        Results are ranked by how many of the requested skills a community has,
+        then by recency. Skills are resolved to catalog ids first, so any
+        spelling finds the same communities. Served from the in-memory skill
+        index once it is built, from MongoDB until then; both page on the same keyset.
+
+        Args:
+            skills (List[str]): requested skills, in any spelling
+            limit (int): page size
+            after (Tuple): (matched, registeration_date_time, _id) of the last community already seen
+            match_all (bool): only return communities having every requested skill
+            with_total (bool): also count every matching community, across all pages
+
+        Returns:
+            Tuple[List[Dict], Optional[Tuple], Optional[int]]: communities (shaped like Community),
+            the keyset position of the next page if any, and the total when requested
+        """
+        try:
+            limit = clamp_limit(limit)
+            resolved = await self.skills.resolve(skills)
+            skill_ids = [skill_id for skill_id in resolved.values() if skill_id is not None]
+            # A skill nobody has matches nothing, and under match_all rules out every community
+            if not skill_ids or (match_all and len(skill_ids) < len(resolved)):
+                return [], None, 0 if with_total else None
+
+            total = None
+            if skillIndex.ready:
+                # Picks up other workers' communities for later searches, at most every few seconds
+                self.skill_index_refresher.start()
+                results = await self.search_skill_index(skill_ids, limit + 1, after, match_all)
+                if with_total:
+                    total = skillIndex.count(skill_ids, match_all)
+            else:
+                self.start_skill_index_build()
+                results, total = await self.search_skills_in_db(skill_ids, limit + 1, after, match_all, with_total)
             if not results:
-                return None
-            return [Community(**comm) for comm in results]
+                return [], None, total
+            
+            results, next_key = self.split_page(results, limit, sort_fields=("matched", "registeration_date_time"))
+            return [self.public_community(comm) for comm in results], next_key, total
             
         except Exception as e:
             print("Error message from utils/utility.py search_community_by_skills function")
             print("Error searching communities by tech stack:", e)
-            return None
+            return [], None, None
+
+    async def search_skill_index(self, skill_ids: List[int], limit: int, after: Tuple, match_all: bool) -> List[Dict]:
+        ranked = skillIndex.search(skill_ids, match_all=match_all, limit=limit, after=after)
+        if not ranked:
+            return []
+
+        communities = await asyncMongoDBHandler.find(
+            "community",
+            {"_id": {"$in": [community_id for community_id, _ in ranked]}},
+            self.community_projection(None, "registeration_date_time")
+        )
+        communities = {comm["_id"]: comm for comm in await self.fill_missing_tech_stacks(communities)}
+
+        requested = {canonical_key(skillCatalog.name_of(skill_id)) for skill_id in skill_ids}
+        results = []
+        for community_id, matched in ranked:
+            comm = communities.get(community_id)
+            if comm:
+                # Only the requested skills, as with the database search
+                comm["tech_stack"] = [skill for skill in comm["tech_stack"] if canonical_key(skill) in requested]
+                comm["matched"] = matched
+                results.append(comm)
+        return results
+
+    def build_search_pipeline(self, skill_ids: List[int], limit: int, after: Tuple = None, match_all: bool = False, with_total: bool = False) -> List[Dict]:
+        """
+        Aggregation ranking communities by matched skills, then recency
+
+        The $sort on the computed match count cannot use an index, but with the
+        $limit right behind it the server keeps only the top limit documents
+        (a top-k sort) instead of sorting every match in memory. The $match
+        on skill_ids is served by the multikey index.
+
+        Args:
+            skill_ids (List[int]): catalog ids of the requested skills
+            limit (int): number of results
+            after (Tuple): (matched, registeration_date_time, _id) of the last community already seen
+            match_all (bool): require every skill instead of at least one
+            with_total (bool): run the ranking in a $facet next to a count of every match,
+                returning one {"results": [...], "total": [{"total": n}]} document
+
+        Returns:
+            List[Dict]: pipeline for the community collection
+        """
+        skill_ids = list(set(skill_ids))
+        skills = [skillCatalog.name_of(skill_id) for skill_id in skill_ids]
+        # skill_ids is a multikey-indexed array on community, so no $lookup is needed
+        match = {
+            "$match": {
+                "skill_ids": {"$all" if match_all else "$in": skill_ids}
+            }
+        }
+        ranking = [
+            {
+                "$project": {
+                    "name": 1,
+                    "creator_username": 1,
+                    "experience": 1,
+                    "registeration_date_time": 1,
+                    # Only the requested skills, as before; stored names are canonical
+                    "tech_stack": {
+                        "$filter": {"input": "$tech_stack", "cond": {"$in": ["$$this", skills]}}
+                    },
+                    "matched": {
+                        "$size": {"$filter": {"input": "$skill_ids", "cond": {"$in": ["$$this", skill_ids]}}}
+                    }
+                }
+            }
+        ]
+        if after:
+            ranking.append({"$match": seek_query({}, ["matched", "registeration_date_time"], after)})
+        ranking += [
+            {
+                "$sort": {
+                    "matched": -1,
+                    "registeration_date_time": -1,
+                    "_id": -1
+                }
+            },
+            {
+                "$limit": limit
+            }
+        ]
+
+        if not with_total:
+            return [match] + ranking
+        return [
+            match,
+            {
+                "$facet": {
+                    "results": ranking,
+                    # Counted before the keyset seek, so every page reports the same total
+                    "total": [{"$count": "total"}]
+                }
+            }
+        ]
+
+    async def search_skills_in_db(self, skill_ids: List[int], limit: int, after: Tuple, match_all: bool, with_total: bool = False) -> Tuple[List[Dict], Optional[int]]:
+        pipeline = self.build_search_pipeline(skill_ids, limit, after, match_all, with_total)
+        results = await asyncMongoDBHandler.aggregate("community", pipeline) or []
+        if not with_total:
+            return results, None
+
+        facet = results[0] if results else {"results": [], "total": []}
+        total = facet["total"][0]["total"] if facet["total"] else 0
+        return facet["results"], total
         
-    def get_user_communities(self, username: str) -> List[Community] | None:
+    async def get_user_communities(self, username: str, limit: int = 10, after: Tuple = None, fields: Optional[Tuple[str, ...]] = None) -> Tuple[List[Dict], Optional[Tuple]]:
         try:
-            communities = mongoDBHandler.find("community", {"creator_username": username})
-            communities = [CommunityResponse(**comm) for comm in communities]
-            return communities
+            limit = clamp_limit(limit)
+            communities = await asyncMongoDBHandler.find_with_sort(
+                collection_name="community",
+                query={"creator_username": username},
+                sort_field="registeration_date_time",
+                limit=limit + 1,
+                after=after,
+                projection=projection(fields or COMMUNITY_SUMMARY_FIELDS, "registeration_date_time")
+            )
+            if not communities:
+                return [], None
+            
+            communities, next_key = self.split_page(communities, limit)
+            return [self.public_community_summary(comm, fields) for comm in communities], next_key
         except Exception as e:
             print("Error message from utils/utility.py get_user_communities function")
             print("Error getting user communities:", e)
-            return None
+            return [], None
 
-        
+
+# Collection and field each autocomplete kind falls back to while its index is being built
+AUTOCOMPLETE_SOURCES = {
+    "community": ("community", "name"),
+    "user": ("user", "username"),
+    "skill": ("skills", "name")
+}
+# Skill ids the autocomplete refresh rereads below the highest one indexed
+SKILL_ID_OVERLAP = 100
+
+
+@instrumented
+class SearchUtility:
+    def __init__(self):
+        self.autocomplete_task = None
+        self.autocomplete_refresher = IndexRefresher("autocomplete", self.refresh_autocomplete_index)
+        # Highest skill id indexed; skills have counter ids rather than ObjectIds
+        self.newest_skill_id = 0
+
+    def start_autocomplete_build(self):
+        # Same lazy pattern as the skill index: first request starts it, MongoDB answers meanwhile
+        if all(index.ready for index in autocompleteIndex.values()):
+            return
+        if any(index.building for index in autocompleteIndex.values()):
+            return
+        if self.autocomplete_task is None or self.autocomplete_task.done():
+            self.autocomplete_task = asyncio.create_task(self.build_autocomplete_index())
+
+    def stop_autocomplete_build(self):
+        self.autocomplete_refresher.stop()
+        if self.autocomplete_task is not None:
+            self.autocomplete_task.cancel()
+            self.autocomplete_task = None
+
+    async def build_autocomplete_index(self) -> bool:
+        """
+        Build the in-memory prefix indexes from community, user and the skill catalog
+
+        Returns:
+            bool: whether the indexes are ready to serve autocomplete
+        """
+        try:
+            for index in autocompleteIndex.values():
+                index.start_build()
+            started = datetime.now(pytz.UTC)
+
+            database = asyncMongoDBHandler.database
+            communities = [
+                (comm["name"], (comm["name"], comm["_id"]))
+                async for comm in database["community"].find({}, {"name": 1}).batch_size(5000)
+            ]
+            users = [
+                (user["username"], user["username"])
+                async for user in database["user"].find({}, {"_id": 0, "username": 1}).batch_size(5000)
+            ]
+            skills = [
+                (skill["name"], skill["_id"])
+                async for skill in database["skills"].find({}, {"name": 1}).batch_size(5000)
+            ]
+
+            # Sorting is CPU work: done in a thread, additions queue until install
+            prepared = {
+                "community": await asyncio.to_thread(prepare_entries, communities, autocompleteIndex["community"].unique),
+                "user": await asyncio.to_thread(prepare_entries, users, autocompleteIndex["user"].unique),
+                "skill": await asyncio.to_thread(prepare_entries, [(name, name) for name, _ in skills], autocompleteIndex["skill"].unique)
+            }
+            for kind, entries in prepared.items():
+                autocompleteIndex[kind].install(entries)
+            self.newest_skill_id = max((skill_id for _, skill_id in skills), default=0)
+            self.autocomplete_refresher.built(started)
+            print(f"Autocomplete index built: {len(communities)} communities, {len(users)} users, {len(skills)} skills")
+            return True
+
+        except Exception as e:
+            for index in autocompleteIndex.values():
+                index.building = False
+            print("Error message from utils/utility.py build_autocomplete_index function")
+            print("Error building autocomplete index:", e)
+            return False
+
+    async def refresh_autocomplete_index(self, since: datetime) -> int:
+        """
+        Add communities, users and skills saved by other workers since the given time
+
+        Run by autocomplete_refresher. Communities and users are read by the
+        creation time in their ObjectId; skills, which have counter ids, from
+        a little below the highest id indexed, since ids are taken before the
+        insert and concurrent creates can land out of order. Entries already
+        indexed are skipped by PrefixIndex.
+
+        Args:
+            since (datetime): creation time to read communities and users from
+
+        Returns:
+            int: number of entries read
+        """
+        database = asyncMongoDBHandler.database
+        since_id = ObjectId.from_datetime(since)
+        communities = await database["community"].find({"_id": {"$gte": since_id}}, {"name": 1}).to_list()
+        users = await database["user"].find({"_id": {"$gte": since_id}}, {"username": 1}).to_list()
+        skills = await database["skills"].find({"_id": {"$gt": self.newest_skill_id - SKILL_ID_OVERLAP}}, {"name": 1}).to_list()
+
+        for comm in communities:
+            autocompleteIndex["community"].add(comm["name"], (comm["name"], comm["_id"]))
+        for user in users:
+            autocompleteIndex["user"].add(user["username"], user["username"])
+        for skill in skills:
+            autocompleteIndex["skill"].add(skill["name"], skill["name"])
+            self.newest_skill_id = max(self.newest_skill_id, skill["_id"])
+        return len(communities) + len(users) + len(skills)
+
+    async def complete_in_db(self, kind: str, prefix: str, limit: int) -> List:
+        # Case-insensitive range on a collated index: [prefix, prefix + U+FFFF) is every string starting with prefix
+        collection_name, field = AUTOCOMPLETE_SOURCES[kind]
+        query = {field: {"$gte": prefix, "$lt": prefix + "\uffff"}}
+        collection = asyncMongoDBHandler.database[collection_name]
+        projection = {field: 1} if kind == "community" else {"_id": 0, field: 1}
+        cursor = collection.find(query, projection).collation(CASE_INSENSITIVE).sort(field, 1).limit(limit)
+        docs = await cursor.to_list()
+        if kind == "community":
+            return [(doc["name"], doc["_id"]) for doc in docs]
+        return [doc[field] for doc in docs]
+
+    async def autocomplete(self, prefix: str, kinds: List[str], limit: int = 8) -> Dict[str, List] | None:
+        """
+        Complete a prefix against community names, usernames and skill names
+
+        Served from the in-memory prefix indexes once built, from collated
+        MongoDB indexes until then.
+
+        Args:
+            prefix (str): text typed so far, matched case-insensitively
+            kinds (List[str]): any of "community", "user", "skill"
+            limit (int): suggestions per kind
+
+        Returns:
+            Dict[str, List] | None: kind -> suggestions (communities as {"id", "name"}), None on error
+        """
+        try:
+            limit = clamp_limit(limit)
+            suggestions = {}
+            if all(autocompleteIndex[kind].ready for kind in kinds):
+                # Picks up other workers' saves for later requests, at most every few seconds
+                self.autocomplete_refresher.start()
+            for kind in kinds:
+                index = autocompleteIndex[kind]
+                if index.ready:
+                    values = index.complete(prefix, limit)
+                else:
+                    self.start_autocomplete_build()
+                    values = await self.complete_in_db(kind, prefix.strip(), limit)
+
+                if kind == "community":
+                    values = [{"id": community_id, "name": name} for name, community_id in values]
+                suggestions[kind] = values
+            return suggestions
+
+        except Exception as e:
+            print("Error message from utils/utility.py autocomplete function")
+            print("Error completing prefix:", e)
+            return None
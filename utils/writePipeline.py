@@ -0,0 +1,178 @@
+import asyncio
+from os import environ
+from typing import Awaitable, Callable, Dict, List, Optional, Tuple
+
+# Server error code for a duplicate key
+DUPLICATE_KEY = 11000
+# First retry delay in seconds, doubled on each further attempt
+RETRY_DELAY = 0.1
+
+
+class WritePipeline:
+    """
+    In-process queue that coalesces fan-out writes into periodic bulk writes.
+
+    Callers submit pymongo write operations (InsertOne, UpdateOne, ...) for a
+    collection and carry on without waiting for them. A single worker task
+    takes the first queued operation, lets more arrive for up to max_delay
+    seconds (or until max_batch are waiting), then sends one unordered
+    bulk_write per collection. A burst of concurrent requests therefore
+    becomes a few large writes instead of many small ones.
+
+    The queue holds at most max_pending operations; past that, submit waits
+    for the worker to catch up (backpressure). A batch that fails as a whole
+    (network error, failover) is retried with exponential backoff. Inserts
+    keep the _id pymongo gave them on the first attempt, so a duplicate key
+    error on a retry means the document was already written. close() flushes
+    what is queued and is awaited in the app lifespan.
+
+    Queuing is opt-in with WRITE_PIPELINE=1, for long-running servers. A
+    write queued after the response has been sent only happens if the
+    process keeps running: a serverless instance (Vercel) can be frozen or
+    recycled right after it responds, losing whatever is still queued. By
+    default submit therefore writes inline, with the same retries, before the
+    request completes.
+
+    Other settings come from WRITE_BATCH_SIZE, WRITE_BATCH_DELAY,
+    WRITE_QUEUE_SIZE, WRITE_RETRIES and WRITE_FLUSH_TIMEOUT. The pipeline is
+    per process and bound to one event loop.
+    """
+    def __init__(
+        self,
+        write: Callable[[str, list, bool], Awaitable[Optional[Dict]]],
+        max_batch: Optional[int] = None,
+        max_delay: Optional[float] = None,
+        max_pending: Optional[int] = None,
+        retries: Optional[int] = None,
+        background: Optional[bool] = None
+    ):
+        # write(collection_name, operations, ordered) -> bulk_write summary, None on failure
+        self.write = write
+        self.max_batch = max_batch or int(environ.get("WRITE_BATCH_SIZE", 1000))
+        self.max_delay = max_delay if max_delay is not None else float(environ.get("WRITE_BATCH_DELAY", 0.05))
+        self.max_pending = max_pending or int(environ.get("WRITE_QUEUE_SIZE", 10000))
+        self.retries = retries if retries is not None else int(environ.get("WRITE_RETRIES", 3))
+        self.flush_timeout = float(environ.get("WRITE_FLUSH_TIMEOUT", 10))
+        self.background = background if background is not None else environ.get("WRITE_PIPELINE") == "1"
+        self.queue: Optional[asyncio.Queue] = None
+        self.worker: Optional[asyncio.Task] = None
+        self.closing = False
+        self.submitted = 0
+        self.written = 0
+        self.failed = 0
+        self.retried = 0
+        self.batches = 0
+
+    def start(self):
+        # Started by the first submit, so importing this module creates no task
+        if self.queue is None:
+            self.queue = asyncio.Queue(maxsize=self.max_pending)
+        if self.worker is None or self.worker.done():
+            self.worker = asyncio.create_task(self.run())
+
+    async def submit(self, collection_name: str, operations: list):
+        """
+        Queue write operations, waiting only while the queue is full; written
+        straight away unless the pipeline runs in the background
+
+        Args:
+            collection_name (str): target collection
+            operations (list): pymongo write operations, applied in no particular order
+        """
+        if not self.background:
+            self.submitted += len(operations)
+            await self.write_with_retry(collection_name, operations)
+            self.batches += 1
+            return
+
+        self.start()
+        for operation in operations:
+            await self.queue.put((collection_name, operation))
+        self.submitted += len(operations)
+
+    async def run(self):
+        while True:
+            batch = [await self.queue.get()]
+            try:
+                if not self.closing and self.queue.qsize() < self.max_batch - 1:
+                    # Give concurrent requests a moment to add to this batch
+                    await asyncio.sleep(self.max_delay)
+                while len(batch) < self.max_batch and not self.queue.empty():
+                    batch.append(self.queue.get_nowait())
+                await self.flush(batch)
+            except Exception as e:
+                self.failed += len(batch)
+                print("Error message from utils/writePipeline.py run function")
+                print("Error writing queued batch:", e)
+            finally:
+                for _ in batch:
+                    self.queue.task_done()
+
+    async def flush(self, batch: List[Tuple[str, object]]):
+        by_collection: Dict[str, list] = {}
+        for collection_name, operation in batch:
+            by_collection.setdefault(collection_name, []).append(operation)
+        await asyncio.gather(*(
+            self.write_with_retry(collection_name, operations)
+            for collection_name, operations in by_collection.items()
+        ))
+        self.batches += 1
+
+    async def write_with_retry(self, collection_name: str, operations: list):
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self.retried += 1
+                await asyncio.sleep(RETRY_DELAY * 2 ** (attempt - 1))
+
+            result = await self.write(collection_name, operations, False)
+            if result is None:
+                continue
+
+            errors = [
+                error for error in result["errors"]
+                if not (attempt and error["code"] == DUPLICATE_KEY)
+            ]
+            self.written += len(operations) - len(errors)
+            if errors:
+                # Rejected by the server (validation, duplicate key, ...): retrying would not help
+                self.failed += len(errors)
+                print(f"{len(errors)} queued writes to {collection_name} failed: {errors[0]['message']}")
+            return
+
+        self.failed += len(operations)
+        print(f"{len(operations)} queued writes to {collection_name} dropped after {self.retries} retries")
+
+    async def close(self):
+        """
+        Flush every queued operation, then stop the worker
+
+        Gives up after WRITE_FLUSH_TIMEOUT seconds (MongoDB unreachable at
+        shutdown), counting whatever is still queued as failed.
+        """
+        if self.worker is None:
+            return
+        self.closing = True
+        try:
+            await asyncio.wait_for(self.queue.join(), self.flush_timeout)
+        except asyncio.TimeoutError:
+            print(f"Write pipeline flush timed out, {self.queue.qsize()} queued writes dropped")
+            self.failed += self.queue.qsize()
+
+        self.worker.cancel()
+        try:
+            await self.worker
+        except asyncio.CancelledError:
+            pass
+        self.worker = None
+        self.queue = None
+        self.closing = False
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "pending": self.queue.qsize() if self.queue is not None else 0,
+            "submitted": self.submitted,
+            "written": self.written,
+            "failed": self.failed,
+            "retried": self.retried,
+            "batches": self.batches
+        }